@@ -0,0 +1,31 @@
+"""add file_hash, model_name and prompt_version to candidate analysis
+
+Revision ID: 3f2b7c9d1e4a
+Revises: 108a92b85351
+Create Date: 2026-10-18 09:12:40.118203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '3f2b7c9d1e4a'
+down_revision = '108a92b85351'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('candidateanalysis', sa.Column('file_hash', sqlmodel.sql.sqltypes.AutoString(length=64), nullable=True))
+    op.add_column('candidateanalysis', sa.Column('model_name', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=True))
+    op.add_column('candidateanalysis', sa.Column('prompt_version', sqlmodel.sql.sqltypes.AutoString(length=64), nullable=True))
+    op.create_index(op.f('ix_candidateanalysis_file_hash'), 'candidateanalysis', ['file_hash'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_candidateanalysis_file_hash'), table_name='candidateanalysis')
+    op.drop_column('candidateanalysis', 'prompt_version')
+    op.drop_column('candidateanalysis', 'model_name')
+    op.drop_column('candidateanalysis', 'file_hash')
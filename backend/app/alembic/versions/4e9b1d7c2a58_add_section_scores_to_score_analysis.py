@@ -0,0 +1,39 @@
+"""add section scores to score analysis and score weights to job
+
+Revision ID: 4e9b1d7c2a58
+Revises: c5d8e2a14b93
+Create Date: 2026-10-18 21:12:40.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '4e9b1d7c2a58'
+down_revision = 'c5d8e2a14b93'
+branch_labels = None
+depends_on = None
+
+SECTIONS = ('degree', 'experience', 'technical_skill', 'responsibility', 'certificate', 'soft_skill')
+
+
+def upgrade():
+    op.add_column('job', sa.Column('score_weights', sqlmodel.sql.sqltypes.AutoString(length=1000), nullable=True))
+    for section in SECTIONS:
+        op.add_column('scoreanalysis', sa.Column(f'{section}_score', sa.Integer(), nullable=True))
+        # Backfill from the stored JSON, skipping results without a numeric score
+        op.execute(
+            f"""
+            UPDATE scoreanalysis
+            SET {section}_score = (score_result::json -> '{section}' ->> 'score')::numeric::integer
+            WHERE (score_result::json -> '{section}' ->> 'score') ~ '^-?[0-9]+(\\.[0-9]+)?$'
+            """
+        )
+
+
+def downgrade():
+    for section in reversed(SECTIONS):
+        op.drop_column('scoreanalysis', f'{section}_score')
+    op.drop_column('job', 'score_weights')
@@ -0,0 +1,38 @@
+"""add job full-text search vector
+
+Revision ID: 6f2a9c3e8b14
+Revises: b2e7f94c0d31
+Create Date: 2026-10-18 23:12:47.218903
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '6f2a9c3e8b14'
+down_revision = 'b2e7f94c0d31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Generated column, Postgres fills it for existing rows as well
+    op.add_column('job', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed(
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(description, '')), 'B')",
+            persisted=True,
+        ),
+        nullable=True,
+    ))
+    op.create_index('ix_job_search_vector', 'job', ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def downgrade():
+    op.drop_index('ix_job_search_vector', table_name='job', postgresql_using='gin')
+    op.drop_column('job', 'search_vector')
@@ -0,0 +1,27 @@
+"""add input_hash to score analysis
+
+Revision ID: 7a1c4e8b2f06
+Revises: 3f2b7c9d1e4a
+Create Date: 2026-10-18 10:03:17.552981
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '7a1c4e8b2f06'
+down_revision = '3f2b7c9d1e4a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('scoreanalysis', sa.Column('input_hash', sqlmodel.sql.sqltypes.AutoString(length=64), nullable=True))
+    op.create_index(op.f('ix_scoreanalysis_input_hash'), 'scoreanalysis', ['input_hash'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_scoreanalysis_input_hash'), table_name='scoreanalysis')
+    op.drop_column('scoreanalysis', 'input_hash')
@@ -0,0 +1,34 @@
+"""add candidate skill inverted index
+
+Revision ID: 8d3f6a0b5c17
+Revises: 4e9b1d7c2a58
+Create Date: 2026-10-18 22:05:11.604327
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '8d3f6a0b5c17'
+down_revision = '4e9b1d7c2a58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing analyses are indexed with POST /api/v1/candidate/skills/reindex
+    op.create_table('candidateskill',
+    sa.Column('candidate_analysis_id', sa.Uuid(), nullable=False),
+    sa.Column('kind', sqlmodel.sql.sqltypes.AutoString(length=32), nullable=False),
+    sa.Column('term', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=False),
+    sa.ForeignKeyConstraint(['candidate_analysis_id'], ['candidateanalysis.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('candidate_analysis_id', 'kind', 'term')
+    )
+    op.create_index('ix_candidateskill_kind_term', 'candidateskill', ['kind', 'term'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_candidateskill_kind_term', table_name='candidateskill')
+    op.drop_table('candidateskill')
@@ -0,0 +1,63 @@
+"""add composite indexes for listings and unique job/candidate scores
+
+Revision ID: a7c4e2d91f36
+Revises: 6f2a9c3e8b14
+Create Date: 2026-10-18 23:48:09.537120
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c4e2d91f36'
+down_revision = '6f2a9c3e8b14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_job_owner_id_created_at_id', 'job', ['owner_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_job_created_at_id', 'job', ['created_at', 'id'], unique=False)
+
+    op.drop_index('ix_candidateanalysis_original_file_name', table_name='candidateanalysis')
+    op.create_index('ix_candidateanalysis_original_file_name_created_at', 'candidateanalysis', ['original_file_name', 'created_at'], unique=False)
+
+    # Rescoring used to insert a new row, keep only the latest result of each pair
+    op.execute("""
+        DELETE FROM scoreanalysis AS older
+        USING scoreanalysis AS newer
+        WHERE older.job_id = newer.job_id
+          AND older.candidate_file_name = newer.candidate_file_name
+          AND (older.created_at, older.id) < (newer.created_at, newer.id)
+    """)
+    op.create_unique_constraint('uq_scoreanalysis_job_id_candidate_file_name', 'scoreanalysis', ['job_id', 'candidate_file_name'])
+    # Every lookup by candidate also has the job, the unique constraint serves them
+    op.drop_index('ix_scoreanalysis_candidate_file_name', table_name='scoreanalysis')
+
+    op.drop_index('ix_scoreanalysis_job_id_score', table_name='scoreanalysis')
+    op.create_index(
+        'ix_scoreanalysis_job_id_score',
+        'scoreanalysis',
+        ['job_id', sa.text("(coalesce((score_result ->> 'score')::float, -1)) DESC"), sa.text('id DESC')],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index('ix_scoreanalysis_job_id_score', table_name='scoreanalysis')
+    op.create_index(
+        'ix_scoreanalysis_job_id_score',
+        'scoreanalysis',
+        ['job_id', sa.text("((score_result ->> 'score')::float) DESC NULLS LAST")],
+        unique=False,
+    )
+    op.create_index('ix_scoreanalysis_candidate_file_name', 'scoreanalysis', ['candidate_file_name'], unique=False)
+    op.drop_constraint('uq_scoreanalysis_job_id_candidate_file_name', 'scoreanalysis', type_='unique')
+
+    op.drop_index('ix_candidateanalysis_original_file_name_created_at', table_name='candidateanalysis')
+    op.create_index('ix_candidateanalysis_original_file_name', 'candidateanalysis', ['original_file_name'], unique=False)
+
+    op.drop_index('ix_job_created_at_id', table_name='job')
+    op.drop_index('ix_job_owner_id_created_at_id', table_name='job')
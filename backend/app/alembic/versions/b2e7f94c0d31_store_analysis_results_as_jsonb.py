@@ -0,0 +1,75 @@
+"""store analysis results as jsonb
+
+Revision ID: b2e7f94c0d31
+Revises: 8d3f6a0b5c17
+Create Date: 2026-10-18 22:48:02.117586
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'b2e7f94c0d31'
+down_revision = '8d3f6a0b5c17'
+branch_labels = None
+depends_on = None
+
+COLUMNS = (
+    ('job', 'analysis_result', True),
+    ('candidateanalysis', 'analysis_result', False),
+    ('scoreanalysis', 'score_result', False),
+)
+
+
+def upgrade():
+    # Values that are not valid JSON are kept as a JSON string instead of failing the migration
+    op.execute(
+        """
+        CREATE FUNCTION pg_temp.to_jsonb_lenient(value text) RETURNS jsonb AS $$
+        BEGIN
+            RETURN value::jsonb;
+        EXCEPTION WHEN others THEN
+            RETURN to_jsonb(value);
+        END;
+        $$ LANGUAGE plpgsql IMMUTABLE
+        """
+    )
+    for table, column, nullable in COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            existing_type=sa.VARCHAR(length=10000),
+            type_=postgresql.JSONB(astext_type=sa.Text()),
+            existing_nullable=nullable,
+            postgresql_using=f'pg_temp.to_jsonb_lenient({column})',
+        )
+    op.create_index(
+        'ix_candidateanalysis_analysis_result',
+        'candidateanalysis',
+        ['analysis_result'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'analysis_result': 'jsonb_path_ops'},
+    )
+    op.create_index(
+        'ix_scoreanalysis_job_id_score',
+        'scoreanalysis',
+        ['job_id', sa.text("((score_result ->> 'score')::float) DESC NULLS LAST")],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index('ix_scoreanalysis_job_id_score', table_name='scoreanalysis')
+    op.drop_index('ix_candidateanalysis_analysis_result', table_name='candidateanalysis')
+    for table, column, nullable in COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            existing_type=postgresql.JSONB(astext_type=sa.Text()),
+            type_=sa.VARCHAR(length=10000),
+            existing_nullable=nullable,
+            postgresql_using=f'{column}::text',
+        )
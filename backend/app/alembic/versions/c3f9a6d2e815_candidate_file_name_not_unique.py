@@ -0,0 +1,29 @@
+"""candidate analysis file name not unique
+
+Revision ID: c3f9a6d2e815
+Revises: e4b8d1f7a2c9
+Create Date: 2026-10-19 09:12:40.531207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3f9a6d2e815'
+down_revision = 'e4b8d1f7a2c9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Uploads of the same content under other names point at the one stored file
+    op.drop_index('ix_candidateanalysis_file_name', table_name='candidateanalysis')
+    op.create_index('ix_candidateanalysis_file_name', 'candidateanalysis', ['file_name'], unique=False)
+
+
+def downgrade():
+    # Fails while several analyses share a stored file
+    op.drop_index('ix_candidateanalysis_file_name', table_name='candidateanalysis')
+    op.create_index('ix_candidateanalysis_file_name', 'candidateanalysis', ['file_name'], unique=True)
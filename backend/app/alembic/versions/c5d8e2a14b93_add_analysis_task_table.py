@@ -0,0 +1,39 @@
+"""add analysis task table
+
+Revision ID: c5d8e2a14b93
+Revises: 7a1c4e8b2f06
+Create Date: 2026-10-18 11:26:48.904417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5d8e2a14b93'
+down_revision = '7a1c4e8b2f06'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('analysistask',
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('kind', sqlmodel.sql.sqltypes.AutoString(length=32), nullable=False),
+    sa.Column('status', sqlmodel.sql.sqltypes.AutoString(length=32), nullable=False),
+    sa.Column('payload', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('result', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('error', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('lease_expires_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_analysistask_status'), 'analysistask', ['status'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_analysistask_status'), table_name='analysistask')
+    op.drop_table('analysistask')
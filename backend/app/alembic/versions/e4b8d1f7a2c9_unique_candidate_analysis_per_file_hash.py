@@ -0,0 +1,67 @@
+"""unique candidate analysis per file hash and name
+
+Revision ID: e4b8d1f7a2c9
+Revises: a7c4e2d91f36
+Create Date: 2026-10-19 00:31:56.802144
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4b8d1f7a2c9'
+down_revision = 'a7c4e2d91f36'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Re-uploads used to insert a new row: keep the latest analysis of each
+    # file content and name, and point scores at the row that is kept
+    op.execute("""
+        CREATE TEMP TABLE candidate_duplicate AS
+        SELECT file_name, keep_file_name FROM (
+            SELECT file_name, first_value(file_name) OVER (
+                PARTITION BY file_hash, original_file_name
+                ORDER BY created_at DESC, id DESC
+            ) AS keep_file_name
+            FROM candidateanalysis
+            WHERE file_hash IS NOT NULL
+        ) ranked
+        WHERE file_name <> keep_file_name
+    """)
+    # Latest score of a job per kept candidate, before renaming into the unique key
+    op.execute("""
+        DELETE FROM scoreanalysis WHERE id IN (
+            SELECT id FROM (
+                SELECT score.id, row_number() OVER (
+                    PARTITION BY score.job_id, coalesce(duplicate.keep_file_name, score.candidate_file_name)
+                    ORDER BY score.created_at DESC, score.id DESC
+                ) AS position
+                FROM scoreanalysis score
+                LEFT JOIN candidate_duplicate duplicate ON duplicate.file_name = score.candidate_file_name
+            ) ranked
+            WHERE position > 1
+        )
+    """)
+    op.execute("""
+        UPDATE scoreanalysis SET candidate_file_name = duplicate.keep_file_name
+        FROM candidate_duplicate duplicate
+        WHERE scoreanalysis.candidate_file_name = duplicate.file_name
+    """)
+    op.execute("""
+        DELETE FROM candidateanalysis
+        USING candidate_duplicate duplicate
+        WHERE candidateanalysis.file_name = duplicate.file_name
+    """)
+    op.execute("DROP TABLE candidate_duplicate")
+    op.create_unique_constraint('uq_candidateanalysis_file_hash_original_file_name', 'candidateanalysis', ['file_hash', 'original_file_name'])
+    # Lookups by hash use the leading column of the unique index
+    op.drop_index('ix_candidateanalysis_file_hash', table_name='candidateanalysis')
+
+
+def downgrade():
+    op.create_index('ix_candidateanalysis_file_hash', 'candidateanalysis', ['file_hash'], unique=False)
+    op.drop_constraint('uq_candidateanalysis_file_hash_original_file_name', 'candidateanalysis', type_='unique')
@@ -0,0 +1,41 @@
+"""store score weights as jsonb
+
+Revision ID: f1a8c3e5d702
+Revises: c3f9a6d2e815
+Create Date: 2026-10-19 14:03:27.418552
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1a8c3e5d702'
+down_revision = 'c3f9a6d2e815'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The column was only ever written by the weights endpoint, always valid JSON
+    op.alter_column(
+        'job',
+        'score_weights',
+        existing_type=sqlmodel.sql.sqltypes.AutoString(length=1000),
+        type_=postgresql.JSONB(astext_type=sa.Text()),
+        existing_nullable=True,
+        postgresql_using='score_weights::jsonb',
+    )
+
+
+def downgrade():
+    op.alter_column(
+        'job',
+        'score_weights',
+        existing_type=postgresql.JSONB(astext_type=sa.Text()),
+        type_=sqlmodel.sql.sqltypes.AutoString(length=1000),
+        existing_nullable=True,
+        postgresql_using='score_weights::text',
+    )
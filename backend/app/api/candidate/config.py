@@ -6,10 +6,30 @@ from typing import ClassVar
 
 class CandidateConfig(BaseSettings):
     MODEL_NAME: str = "llama-3.3-70b-versatile"
+    TEMPERATURE: float = 0.5
+
+    # Input token budget for the CV text sent to MODEL_NAME
+    MAX_INPUT_TOKENS: int = 6000
 
     # Get the absolute path to the upload directory
     BASE_DIR: ClassVar[Path] = Path(__file__).parents[3]  # Go up to the backend directory
     CV_UPLOAD_DIR: str = str(BASE_DIR / "upload" / "candidate" / "")
 
+    # Max number of CVs parsed at the same time, off the event loop
+    PARSE_MAX_WORKERS: int = 4
+
+    # Uploads are streamed to disk in chunks and rejected above this size
+    MAX_CV_SIZE: int = 10 * 1024 * 1024
+    UPLOAD_CHUNK_SIZE: int = 256 * 1024
+    # Room for multipart boundaries and headers on top of MAX_CV_SIZE
+    MULTIPART_OVERHEAD: int = 64 * 1024
+
+    # Bulk ingestion: files (or zip members) per request, total request size,
+    # parser processes and LLM calls in flight
+    BULK_MAX_FILES: int = 500
+    BULK_MAX_UPLOAD_SIZE: int = 200 * 1024 * 1024
+    BULK_PARSE_PROCESSES: int = 4
+    BULK_LLM_CONCURRENCY: int = 8
+
 
 candidate_config = CandidateConfig()
@@ -0,0 +1,26 @@
+import os
+from collections.abc import Iterator
+
+import docx2txt
+from pypdf import PdfReader
+
+from app.api.prompt import PAGE_BREAK, normalize_whitespace
+
+
+def extract_pdf_pages(file_path: str) -> Iterator[str]:
+    """Text of each PDF page, lazily, without building Document objects."""
+    reader = PdfReader(file_path)
+    for page in reader.pages:
+        yield page.extract_text() or ""
+
+
+def extract_text(file_path: str) -> str:
+    """Plain text of a PDF or DOCX file, with normalized whitespace."""
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension == ".pdf":
+        text = PAGE_BREAK.join(extract_pdf_pages(file_path))
+    elif extension == ".docx":
+        text = docx2txt.process(file_path)
+    else:
+        raise ValueError(f"Unsupported file type: {extension}")
+    return normalize_whitespace(text)
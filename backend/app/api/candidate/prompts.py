@@ -1,3 +1,10 @@
+import hashlib
+import json
+
+from app.api.prompt import compaction_settings
+
+from .config import candidate_config
+
 system_prompt_candidate = """
 Let's think step by step.
 CV details might be out of order or incomplete.
@@ -116,3 +123,13 @@ fn_candidate_analysis = [
         },
     }
 ]
+
+# Changes whenever the prompt, the function schema or the compaction of the CV
+# changes, so cached analyses produced by an older prompt are not served for
+# new uploads
+PROMPT_VERSION = hashlib.sha256(
+    json.dumps(
+        [system_prompt_candidate, fn_candidate_analysis, compaction_settings(candidate_config.MAX_INPUT_TOKENS)],
+        sort_keys=True,
+    ).encode()
+).hexdigest()[:16]
@@ -18,58 +18,195 @@
 
 #     return result
 
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from .service import save_cv_candidate, read_cv_candidate, analyse_candidate
-from app.api.deps import SessionDep
+from typing import Literal
+
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from .config import candidate_config
+from .service import (
+    stream_cv_candidate,
+    resolve_cv_upload,
+    read_cv_candidate_async,
+    analyse_candidate_async,
+    save_candidate_analysis,
+    new_cv_file_name,
+    extract_cv_zip,
+    ingest_cv_entries,
+    discard_cv_entries,
+    reanalyse_candidate,
+)
+from .skills import SKILL_KINDS, reindex_candidate_skills, search_candidates
+from sqlmodel import select
+from app.api.deps import AsyncSessionDep, get_current_active_superuser
+from app.core.db import run_sync, run_with_session
+from app.api.upload import MAX_BODY_SIZE_KEY, UploadLimitRoute
+from app.api.utils import LOGGER
 from app.models import CandidateAnalysis, CandidateAnalysisPublic
-import json
 
-router = APIRouter()
+router = APIRouter(route_class=UploadLimitRoute)
 
-@router.post("/analyse_candidate")
-async def analyse_candidate_cv(file: UploadFile = File(...), session: SessionDep = None):
+@router.post(
+    "/analyse_candidate",
+    openapi_extra={
+        MAX_BODY_SIZE_KEY: candidate_config.MAX_CV_SIZE + candidate_config.MULTIPART_OVERHEAD
+    },
+)
+async def analyse_candidate_cv(file: UploadFile = File(...), session: AsyncSessionDep = None):
     """
     Save a CV file to the candidate upload directory and analyze it.
+    Parsing, the LLM call and the DB write all run off the event loop.
+    Uploads whose content was already analysed by the current model and
+    prompt are answered from the CandidateAnalysis table.
     """
-    file_name = await save_cv_candidate(file)
-    print("file_name", file_name)
+    temp_path, file_hash = await stream_cv_candidate(file)
+    file_name = new_cv_file_name(file.filename)
 
-    cv_content = read_cv_candidate(file_name=file_name)
-    print("cv_content\n")
+    cached, stored_file_name = await run_sync(
+        session, resolve_cv_upload, temp_path, file_hash, file_name
+    )
+    if cached:
+        LOGGER.info(f"Candidate analysis cache hit: {file_hash}")
+        result = cached.analysis_result
+        if cached.original_file_name != file.filename:
+            # Record the new name so lookups by it resolve; the file itself
+            # stays stored once under the first upload's file_name
+            await run_sync(
+                session, save_candidate_analysis, cached.file_name, file.filename, result, file_hash
+            )
+        return result
+    LOGGER.info(f"file_name {stored_file_name}")
+
+    cv_content = await read_cv_candidate_async(file_name=stored_file_name, file_hash=file_hash)
+
+    result = await analyse_candidate_async(cv_content=cv_content)
+    LOGGER.info(f"analyse_candidate result: {result}")
 
-    result = analyse_candidate(cv_content=cv_content)
-    print("analyse_candidate result:\n", result)
-    
     # Store the analysis result in the database
-    analysis_record = CandidateAnalysis(
-        file_name=file_name,  # Timestamped filename
-        original_file_name=file.filename,  # Original filename
-        analysis_result=json.dumps(result)
+    await run_sync(
+        session,
+        save_candidate_analysis,
+        stored_file_name,  # Timestamped filename of the file on disk
+        file.filename,  # Original filename
+        result,
+        file_hash,
     )
-    session.add(analysis_record)
-    session.commit()
-    session.refresh(analysis_record)
 
     return result
 
+@router.post(
+    "/analyse_candidates",
+    openapi_extra={MAX_BODY_SIZE_KEY: candidate_config.BULK_MAX_UPLOAD_SIZE},
+)
+async def analyse_candidates_bulk(files: list[UploadFile] = File(...)):
+    """
+    Save and analyze many CV files at once; zip archives are unpacked.
+    Streams newline-delimited JSON: one progress event per file, then a summary.
+    """
+    entries = []
+    try:
+        for file in files:
+            if (file.filename or "").lower().endswith(".zip"):
+                await file.seek(0)
+                entries += await run_in_threadpool(extract_cv_zip, file.file)
+            else:
+                try:
+                    temp_path, file_hash = await stream_cv_candidate(file)
+                except HTTPException as e:
+                    entries.append((file.filename, None, None, e.detail))
+                else:
+                    entries.append((file.filename, temp_path, file_hash, None))
+            if len(entries) > candidate_config.BULK_MAX_FILES:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"Too many files, the limit is {candidate_config.BULK_MAX_FILES}",
+                )
+    except BaseException:
+        # Nothing is analysed, none of the files written so far is kept
+        await run_in_threadpool(discard_cv_entries, entries)
+        raise
+
+    return StreamingResponse(ingest_cv_entries(entries), media_type="application/x-ndjson")
+
 @router.get("/analysis_result/{file_name}", response_model=CandidateAnalysisPublic)
-async def get_candidate_analysis_result(file_name: str, session: SessionDep = None):
+async def get_candidate_analysis_result(file_name: str, session: AsyncSessionDep = None):
     """
     Retrieve analysis result for a specific file from the database.
     Can search by either timestamped filename or original filename.
     """
     # First try to find by timestamped filename
-    analysis_record = session.query(CandidateAnalysis).filter(
-        CandidateAnalysis.file_name == file_name
+    analysis_record = (
+        await session.exec(
+            select(CandidateAnalysis).where(CandidateAnalysis.file_name == file_name)
+        )
     ).first()
     
     # If not found, try to find by original filename
     if not analysis_record:
-        analysis_record = session.query(CandidateAnalysis).filter(
-            CandidateAnalysis.original_file_name == file_name
+        analysis_record = (
+            await session.exec(
+                select(CandidateAnalysis)
+                .where(CandidateAnalysis.original_file_name == file_name)
+                .order_by(CandidateAnalysis.created_at.desc())
+            )
         ).first()
     
     if not analysis_record:
         raise HTTPException(status_code=404, detail="Analysis result not found for this file")
     
     return analysis_record
+
+@router.post("/reanalyse/{file_name}")
+async def reanalyse_candidate_cv(file_name: str, session: AsyncSessionDep = None):
+    """
+    Re-analyze a stored CV with the current model and prompt, reusing its
+    extracted text instead of parsing the file again.
+    """
+    analysis_record = (
+        await session.exec(
+            select(CandidateAnalysis)
+            .where(
+                (CandidateAnalysis.file_name == file_name)
+                | (CandidateAnalysis.original_file_name == file_name)
+            )
+            .order_by(CandidateAnalysis.created_at.desc())
+        )
+    ).first()
+    if not analysis_record:
+        raise HTTPException(status_code=404, detail="Analysis result not found for this file")
+    # Parsing and the LLM call block, they run in the threadpool with a session of their own
+    return await run_in_threadpool(run_with_session, reanalyse_candidate, analysis_record.id)
+
+@router.get("/search", response_model=list[CandidateAnalysisPublic])
+async def search_candidate_skills(
+    all_terms: list[str] = Query(default=[], alias="all"),
+    any_terms: list[str] = Query(default=[], alias="any"),
+    none_terms: list[str] = Query(default=[], alias="none"),
+    kind: list[Literal["technical_skill", "certificate", "degree"]] = Query(default=[]),
+    limit: int = Query(default=100, ge=1, le=1000),
+    session: AsyncSessionDep = None,
+):
+    """
+    Candidates with every `all` term, at least one `any` term and no `none`
+    term in their technical skills, certificates or degrees (or only the
+    given `kind`s), e.g. ?all=python&all=aws&none=php. Uses the skill index.
+    """
+    if not (all_terms or any_terms):
+        raise HTTPException(status_code=400, detail="Give at least one 'all' or 'any' term")
+    return await run_sync(
+        session,
+        search_candidates,
+        all_terms,
+        any_terms,
+        none_terms,
+        tuple(kind) or SKILL_KINDS,
+        limit,
+    )
+
+@router.post("/skills/reindex", dependencies=[Depends(get_current_active_superuser)])
+async def reindex_skills():
+    """
+    Rebuild the skill index from all stored analyses. Superusers only.
+    """
+    indexed = await run_in_threadpool(run_with_session, reindex_candidate_skills)
+    return {"indexed": indexed}
@@ -1,16 +1,34 @@
+import asyncio
+import gzip
+import hashlib
 import json
+import multiprocessing
 import os
 import time
+import uuid
+import zipfile
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
+from typing import IO, Any
 
-import jsbeautifier
-from langchain.schema import HumanMessage, SystemMessage
-from langchain_community.document_loaders import Docx2txtLoader, PyPDFLoader
+from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from langchain.schema import BaseMessage, HumanMessage, SystemMessage
 from langchain_openai import ChatOpenAI
 from .config import candidate_config
-from .prompts import fn_candidate_analysis, system_prompt_candidate
+from .extract import extract_text
+from .prompts import PROMPT_VERSION, fn_candidate_analysis, system_prompt_candidate
+from .skills import index_candidate_skills, replace_candidate_skills
+from app.api.llm import get_llm
+from app.api.output import output2json
+from app.api.prompt import compact_prompt
 from app.api.utils import LOGGER
+from app.core.db import open_session
+from app.models import CandidateAnalysis
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, col, select
 
 from dotenv import load_dotenv
 import ollama
@@ -18,88 +36,495 @@ import ollama
 env_path = Path(__file__).parents[3] / '.env'
 load_dotenv(dotenv_path=env_path)
 
-async def save_cv_candidate(file):
-    try:
-        # Ensure the upload directory exists
-        os.makedirs(candidate_config.CV_UPLOAD_DIR, exist_ok=True)
+# Document loaders are blocking, keep them on a bounded pool instead of the event loop
+parse_executor = ThreadPoolExecutor(
+    max_workers=candidate_config.PARSE_MAX_WORKERS, thread_name_prefix="cv-parse"
+)
+
+def new_cv_file_name(original_file_name: str | None) -> str:
+    # Prepend the current datetime to the filename
+    return datetime.now().strftime("%Y%m%d%H%M%S-") + (original_file_name or "")
+
+
+# Leading bytes of every accepted file type (DOCX is a zip archive)
+CV_SIGNATURES = {".pdf": b"%PDF", ".docx": b"PK\x03\x04"}
 
-        # Prepend the current datetime to the filename
-        file_name = datetime.now().strftime("%Y%m%d%H%M%S-") + file.filename
 
-        # Construct the full file path
-        file_path = os.path.join(candidate_config.CV_UPLOAD_DIR, file_name)
+def check_cv_file_name(original_file_name: str | None) -> str:
+    extension = os.path.splitext(original_file_name or "")[1].lower()
+    if extension not in CV_SIGNATURES:
+        raise HTTPException(status_code=415, detail="Only PDF and DOCX files are supported")
+    return extension
 
-        # Read the contents of the uploaded file asynchronously
-        contents = await file.read()
 
-        # Write the uploaded contents to the specified file path
-        with open(file_path, "wb") as f:
-            f.write(contents)
+def check_cv_size(size: int) -> None:
+    if size > candidate_config.MAX_CV_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File exceeds the limit of {candidate_config.MAX_CV_SIZE} bytes",
+        )
+
 
-        LOGGER.info(f"File saved successfully: {file_path}")
-        return file_name
-    except Exception as e:
+def write_cv_stream(src: IO[bytes], extension: str) -> tuple[str, str]:
+    """
+    Copy a file object in chunks to a temporary file in CV_UPLOAD_DIR, hashing it
+    on the way. Wrong types and oversized files are rejected as soon as it shows.
+    Returns (temp_path, file_hash); hand temp_path to store_cv_file or discard_cv_file.
+    """
+    # Ensure the upload directory exists
+    os.makedirs(candidate_config.CV_UPLOAD_DIR, exist_ok=True)
+    temp_path = os.path.join(candidate_config.CV_UPLOAD_DIR, f".{uuid.uuid4().hex}.part")
+
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(temp_path, "wb") as out:
+            while chunk := src.read(candidate_config.UPLOAD_CHUNK_SIZE):
+                if size == 0 and not chunk.startswith(CV_SIGNATURES[extension]):
+                    raise HTTPException(
+                        status_code=415, detail="File content does not match its extension"
+                    )
+                size += len(chunk)
+                check_cv_size(size)
+                digest.update(chunk)
+                out.write(chunk)
+        if size == 0:
+            raise HTTPException(status_code=400, detail="Uploaded file is empty")
+    except BaseException as e:
+        discard_cv_file(temp_path)
         LOGGER.error(f"Error saving file: {str(e)}")
         raise
+    return temp_path, digest.hexdigest()
 
 
-def output2json(output):
-    """GPT Output Object >>> json"""
-    opts = jsbeautifier.default_options()
-    return json.loads(jsbeautifier.beautify(output["tool_calls"][0]["function"]["arguments"], opts))
+def write_cv_upload(file: UploadFile) -> tuple[str, str]:
+    """Check an UploadFile and stream it to disk with write_cv_stream, blocking."""
+    extension = check_cv_file_name(file.filename)
+    if file.size is not None:
+        check_cv_size(file.size)
+    file.file.seek(0)
+    return write_cv_stream(file.file, extension)
 
 
-def load_pdf_docx(file_path):
-    # Determine the file type and choose the appropriate loader
-    if os.path.basename(file_path).lower().endswith((".pdf", ".docx")):
-        loader = (
-            PyPDFLoader(file_path)
-            if file_path.lower().endswith(".pdf")
-            else Docx2txtLoader(file_path)
-        )
+async def stream_cv_candidate(file: UploadFile) -> tuple[str, str]:
+    """write_cv_upload off the event loop."""
+    return await run_in_threadpool(write_cv_upload, file)
+
+
+# (original_file_name, temp_path, file_hash, error) of one file of a bulk upload
+CvEntry = tuple[str | None, str | None, str | None, str | None]
+
+
+def discard_cv_entries(entries: list[CvEntry]) -> None:
+    """Remove the temporary files of CvEntry tuples."""
+    for _, temp_path, _, _ in entries:
+        if temp_path:
+            discard_cv_file(temp_path)
+
+
+def extract_cv_zip(src: IO[bytes]) -> list[CvEntry]:
+    """
+    Stream every PDF/DOCX member of a zip archive to disk with write_cv_stream.
+    Returns [(original_file_name, temp_path, file_hash, error)], error set instead
+    of temp_path/file_hash for members that were rejected. When the archive as a
+    whole is rejected, the members written so far are removed again.
+    """
+    entries: list[CvEntry] = []
+    try:
+        archive = zipfile.ZipFile(src)
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail="Invalid zip archive")
+    try:
+        with archive:
+            for info in archive.infolist():
+                name = os.path.basename(info.filename)
+                if info.is_dir() or not name or name.startswith(".") or info.filename.startswith("__MACOSX/"):
+                    continue
+                if len(entries) >= candidate_config.BULK_MAX_FILES:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"Too many files, the limit is {candidate_config.BULK_MAX_FILES}",
+                    )
+                try:
+                    extension = check_cv_file_name(name)
+                    # Declared size first, the streamed size is checked again while copying
+                    check_cv_size(info.file_size)
+                    with archive.open(info) as member:
+                        temp_path, file_hash = write_cv_stream(member, extension)
+                except HTTPException as e:
+                    entries.append((name, None, None, e.detail))
+                # A corrupt (bad CRC) or encrypted member fails alone
+                except (zipfile.BadZipFile, RuntimeError) as e:
+                    entries.append((name, None, None, f"Unreadable archive member: {e}"))
+                else:
+                    entries.append((name, temp_path, file_hash, None))
+    except BaseException:
+        discard_cv_entries(entries)
+        raise
+    return entries
+
+
+def store_cv_file(temp_path: str, file_name: str) -> str:
+    file_path = os.path.join(candidate_config.CV_UPLOAD_DIR, file_name)
+    os.replace(temp_path, file_path)
+    LOGGER.info(f"File saved successfully: {file_path}")
+    return file_name
+
+
+def discard_cv_file(temp_path: str) -> None:
+    try:
+        os.remove(temp_path)
+    except FileNotFoundError:
+        pass
 
-    # Load and split the document using the selected loader
-    documents = loader.load_and_split()
 
-    return documents
+def read_cv_file(file_path: str) -> str:
+    return extract_text(file_path)
 
 
-def read_cv_candidate(file_name):
+def cv_text_path(file_hash: str) -> str:
+    # Sidecar next to the uploads, one per distinct file content
+    return os.path.join(candidate_config.CV_UPLOAD_DIR, "extracted_text", f"{file_hash}.txt.gz")
+
+
+def load_cv_text(file_hash: str) -> str | None:
+    """Previously extracted text of a file, or None."""
+    try:
+        with gzip.open(cv_text_path(file_hash), "rt", encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def save_cv_text(file_hash: str, text: str) -> None:
+    text_path = cv_text_path(file_hash)
+    os.makedirs(os.path.dirname(text_path), exist_ok=True)
+    temp_path = f"{text_path}.{uuid.uuid4().hex}.part"
+    with gzip.open(temp_path, "wt", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(temp_path, text_path)
+
+
+def read_cv_candidate(file_name: str, file_hash: str | None = None) -> str:
+    """
+    Text of an uploaded CV. With a file_hash the text is extracted once and
+    then served from its compressed sidecar, so re-analysis skips parsing.
+    """
+    if file_hash:
+        text = load_cv_text(file_hash)
+        if text is not None:
+            return text
     file_path = candidate_config.CV_UPLOAD_DIR + '/' + file_name
+    text = read_cv_file(file_path)
+    if file_hash:
+        save_cv_text(file_hash, text)
+    return text
+
+
+_parse_process_pool: ProcessPoolExecutor | None = None
+
+
+def parse_process_pool() -> ProcessPoolExecutor:
+    """
+    Process pool for bulk parsing; PDF text extraction is CPU-bound. Created on
+    first use. Workers come from a forkserver: forking this multithreaded
+    process could copy a lock held by another thread and deadlock the child.
+    """
+    global _parse_process_pool
+    if _parse_process_pool is None:
+        _parse_process_pool = ProcessPoolExecutor(
+            max_workers=candidate_config.BULK_PARSE_PROCESSES,
+            mp_context=multiprocessing.get_context("forkserver"),
+        )
+    return _parse_process_pool
+
+
+async def read_cv_candidate_async(file_name: str, file_hash: str | None = None) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(parse_executor, read_cv_candidate, file_name, file_hash)
+
 
-    documents = load_pdf_docx(file_path=file_path)
-    content = ""
-    for page in documents:
-        content += page.page_content
-    return content
+def candidate_llm() -> ChatOpenAI:
+    return get_llm(candidate_config)
 
 
-def analyse_candidate(cv_content):
+def candidate_messages(cv_content: str) -> list[BaseMessage]:
+    content = compact_prompt("candidate", cv_content, candidate_config.MAX_INPUT_TOKENS)
+    return [
+        SystemMessage(content=system_prompt_candidate),
+        HumanMessage(content=content),
+    ]
+
+
+def analyse_candidate(cv_content: str) -> Any:
     start = time.time()
     LOGGER.info("Start analyse candidate")
 
-    llm = ChatOpenAI(
-        openai_api_base=os.getenv("GROQ_API_BASE"),
-        openai_api_key=os.getenv("OPENAI_API_KEY"),
-        model=candidate_config.MODEL_NAME,
-        temperature=0.5
-        )
+    llm = candidate_llm()
     completion = llm.predict_messages(
-        [
-            SystemMessage(content=system_prompt_candidate),
-            HumanMessage(content=cv_content),
-        ],
+        candidate_messages(cv_content),
         functions=fn_candidate_analysis,
     )
 
     output_analysis = completion.additional_kwargs
-    json_output = output2json(output=output_analysis)
+    json_output = output2json(output_analysis, fn_candidate_analysis)
 
     LOGGER.info("Done analyse candidate")
     LOGGER.info(f"Time analyse candidate: {time.time() - start}")
 
     return json_output
 
+
+async def analyse_candidate_async(cv_content: str) -> Any:
+    """Same as analyse_candidate, but awaits the LLM instead of blocking the loop."""
+    start = time.time()
+    LOGGER.info("Start analyse candidate")
+
+    llm = candidate_llm()
+    completion = await llm.ainvoke(
+        candidate_messages(cv_content),
+        functions=fn_candidate_analysis,
+    )
+
+    output_analysis = completion.additional_kwargs
+    json_output = output2json(output_analysis, fn_candidate_analysis)
+
+    LOGGER.info("Done analyse candidate")
+    LOGGER.info(f"Time analyse candidate: {time.time() - start}")
+
+    return json_output
+
+
+def get_cached_candidate_analysis(session: Session, file_hash: str) -> CandidateAnalysis | None:
+    """Latest analysis of this exact file by the current model and prompt, if any."""
+    statement = (
+        select(CandidateAnalysis)
+        .where(
+            CandidateAnalysis.file_hash == file_hash,
+            CandidateAnalysis.model_name == candidate_config.MODEL_NAME,
+            CandidateAnalysis.prompt_version == PROMPT_VERSION,
+        )
+        .order_by(col(CandidateAnalysis.created_at).desc())
+    )
+    return session.exec(statement).first()
+
+
+def find_stored_cv(session: Session, file_hash: str) -> str | None:
+    """File name of an already uploaded copy of this file that is still on disk."""
+    statement = (
+        select(CandidateAnalysis.file_name)
+        .where(CandidateAnalysis.file_hash == file_hash)
+        .order_by(col(CandidateAnalysis.created_at))
+    )
+    for file_name in session.exec(statement):
+        if os.path.exists(os.path.join(candidate_config.CV_UPLOAD_DIR, file_name)):
+            return file_name
+    return None
+
+
+def resolve_cv_upload(
+    session: Session, temp_path: str, file_hash: str, file_name: str
+) -> tuple[CandidateAnalysis | None, str]:
+    """
+    Decide what to do with a freshly streamed upload. Returns (cached_record, stored_file_name):
+    a cached analysis and its file_name when this content was already analysed by the
+    current model and prompt, otherwise None and the file to parse, reusing an earlier
+    copy on disk if any.
+    """
+    cached = get_cached_candidate_analysis(session, file_hash)
+    if cached:
+        discard_cv_file(temp_path)
+        return cached, cached.file_name
+    stored_file_name = find_stored_cv(session, file_hash)
+    if stored_file_name:
+        discard_cv_file(temp_path)
+        return None, stored_file_name
+    return None, store_cv_file(temp_path, file_name)
+
+
+# Columns an upsert overwrites; the row keeps its id, file_name and created_at
+_UPSERT_COLUMNS = ("analysis_result", "model_name", "prompt_version", "updated_at")
+
+
+def upsert_candidate_analyses(
+    session: Session, records: list[CandidateAnalysis]
+) -> Sequence[CandidateAnalysis]:
+    """
+    INSERT ... ON CONFLICT (file_hash, original_file_name) DO UPDATE of
+    CandidateAnalysis records, in one statement: a file uploaded again
+    under the same name updates its row instead of adding another one.
+    Returns the stored rows, skill index rebuilt; the caller commits.
+    """
+    rows = {}
+    for record in records:
+        values = record.model_dump()
+        # Rows without a hash never conflict, and one statement cannot update a row twice
+        key = (values["file_hash"], values["original_file_name"]) if values["file_hash"] else values["id"]
+        rows[key] = values
+    if not rows:
+        return []
+    insert_statement = insert(CandidateAnalysis).values(list(rows.values()))
+    statement = insert_statement.on_conflict_do_update(
+        constraint="uq_candidateanalysis_file_hash_original_file_name",
+        set_={column: insert_statement.excluded[column] for column in _UPSERT_COLUMNS},
+    ).returning(CandidateAnalysis)
+    stored = session.scalars(statement, execution_options={"populate_existing": True}).all()
+    replace_candidate_skills(session, stored)
+    return stored
+
+
+def save_candidate_analysis(
+    session: Session,
+    file_name: str,
+    original_file_name: str | None,
+    result: dict[str, Any],
+    file_hash: str | None = None,
+) -> CandidateAnalysis:
+    analysis_record = CandidateAnalysis(
+        file_name=file_name,  # Timestamped filename
+        original_file_name=original_file_name,  # Original filename
+        analysis_result=result,
+        file_hash=file_hash,
+        model_name=candidate_config.MODEL_NAME,
+        prompt_version=PROMPT_VERSION,
+    )
+    (analysis_record,) = upsert_candidate_analyses(session, [analysis_record])
+    session.commit()
+    session.refresh(analysis_record)
+    return analysis_record
+
+
+def reanalyse_candidate(session, analysis_id):
+    """
+    Re-run the analysis of a stored CV with the current model and prompt,
+    from its extracted text, and update the record in place.
+    """
+    analysis_record = session.get(CandidateAnalysis, analysis_id)
+    cv_content = load_cv_text(analysis_record.file_hash) if analysis_record.file_hash else None
+    if cv_content is None:
+        stored_file_name = (
+            find_stored_cv(session, analysis_record.file_hash)
+            if analysis_record.file_hash
+            else analysis_record.file_name
+        )
+        if not stored_file_name or not os.path.exists(
+            os.path.join(candidate_config.CV_UPLOAD_DIR, stored_file_name)
+        ):
+            raise HTTPException(status_code=404, detail="CV file not found")
+        cv_content = read_cv_candidate(stored_file_name, analysis_record.file_hash)
+
+    result = analyse_candidate(cv_content=cv_content)
+    analysis_record.analysis_result = result
+    analysis_record.model_name = candidate_config.MODEL_NAME
+    analysis_record.prompt_version = PROMPT_VERSION
+    analysis_record.updated_at = datetime.utcnow()
+    session.add(analysis_record)
+    index_candidate_skills(session, analysis_record, result, replace=True)
+    session.commit()
+    session.refresh(analysis_record)
+    return result
+
+
+def save_candidate_analyses(session, records):
+    """Bulk upsert of analysis records, and their skill index, in a single commit."""
+    upsert_candidate_analyses(session, records)
+    session.commit()
+
+
+async def ingest_cv_entries(entries):
+    """
+    Bulk pipeline for already streamed uploads, as produced by extract_cv_zip:
+    dedupe by hash, parse new files across the process pool, analyse them with
+    at most BULK_LLM_CONCURRENCY LLM calls in flight, then insert all
+    CandidateAnalysis rows at once. Yields one progress event per file and a
+    summary event at the end.
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(candidate_config.BULK_LLM_CONCURRENCY)
+    records = []
+    counts = {"cached": 0, "analysed": 0, "failed": 0}
+
+    def record(original_file_name, result, file_hash, file_name):
+        records.append(
+            CandidateAnalysis(
+                file_name=file_name,
+                original_file_name=original_file_name,
+                analysis_result=result,
+                file_hash=file_hash,
+                model_name=candidate_config.MODEL_NAME,
+                prompt_version=PROMPT_VERSION,
+            )
+        )
+
+    def event(original_file_name, status, error=None):
+        if status in counts:
+            counts[status] += 1
+        return json.dumps({"file_name": original_file_name, "status": status, "error": error}) + "\n"
+
+    with open_session() as session:
+        # Files sharing a hash are analysed once:
+        # {file_hash: (stored_file_name, [original_file_name, ...])}
+        to_analyse = {}
+        seen_names = set()
+        for original_file_name, temp_path, file_hash, error in entries:
+            if error is None and original_file_name in seen_names:
+                discard_cv_file(temp_path)
+                error = "Duplicate file name in upload"
+            if error is not None:
+                yield event(original_file_name, "failed", error)
+                continue
+            seen_names.add(original_file_name)
+            if file_hash in to_analyse:
+                discard_cv_file(temp_path)
+                to_analyse[file_hash][1].append(original_file_name)
+                continue
+            file_name = new_cv_file_name(original_file_name)
+            cached, stored_file_name = await run_in_threadpool(
+                resolve_cv_upload, session, temp_path, file_hash, file_name
+            )
+            if cached:
+                result = cached.analysis_result
+                if cached.original_file_name != original_file_name:
+                    # The new name points at the file stored for the cached one
+                    record(original_file_name, result, file_hash, cached.file_name)
+                yield event(original_file_name, "cached")
+                continue
+            to_analyse[file_hash] = (stored_file_name, [original_file_name])
+
+        async def analyse(file_hash, stored_file_name):
+            file_path = os.path.join(candidate_config.CV_UPLOAD_DIR, stored_file_name)
+            try:
+                cv_content = await run_in_threadpool(load_cv_text, file_hash)
+                if cv_content is None:
+                    cv_content = await loop.run_in_executor(parse_process_pool(), read_cv_file, file_path)
+                    await run_in_threadpool(save_cv_text, file_hash, cv_content)
+                async with semaphore:
+                    result = await analyse_candidate_async(cv_content=cv_content)
+            except Exception as e:
+                LOGGER.error(f"Error analysing {stored_file_name}: {str(e)}")
+                return file_hash, None, str(e)
+            return file_hash, result, None
+
+        pending = [
+            analyse(file_hash, stored_file_name)
+            for file_hash, (stored_file_name, _) in to_analyse.items()
+        ]
+        for done in asyncio.as_completed(pending):
+            file_hash, result, error = await done
+            stored_file_name, original_file_names = to_analyse[file_hash]
+            for original_file_name in original_file_names:
+                if error is not None:
+                    yield event(original_file_name, "failed", error)
+                    continue
+                # Every name of the content refers to the one file stored for it
+                record(original_file_name, result, file_hash, stored_file_name)
+                yield event(original_file_name, "analysed")
+
+        await run_in_threadpool(save_candidate_analyses, session, records)
+
+    yield json.dumps({"status": "done", **counts}) + "\n"
+
+
 # def analyse_candidate(cv_content):
 #     start = time.time()
 #     LOGGER.info("Start analyse candidate")
@@ -0,0 +1,172 @@
+import re
+from collections.abc import Mapping, Sequence
+from typing import Any
+
+from sqlmodel import Session, col, delete, func, select
+
+from app.models import CandidateAnalysis, CandidateSkill
+
+# Analysis sections kept in the CandidateSkill inverted index
+SKILL_KINDS = ("technical_skill", "certificate", "degree")
+
+# "AWS (EC2, S3); Docker | Git" -> AWS, EC2, S3, Docker, Git
+_SPLIT = re.compile(r"[,;|•()\[\]\n]")
+# Anything but letters, digits and the characters of c++, c#, node.js, ci/cd
+_NOISE = re.compile(r"[^\w+#./ -]+")
+_SPACE = re.compile(r"\s+")
+# Trailing versions: "python 3.10", "java 8", "angular v15"
+_VERSION = re.compile(r"\s+v?\d+(\.\d+)*\+?$")
+
+_DEGREE_LEVELS = {
+    "bachelor": re.compile(
+        r"\b(bachelor|bachelors|b\.?sc|b\.?s|b\.?a|b\.?eng|b\.?tech|undergraduate)\b"
+    ),
+    "master": re.compile(r"\b(master|masters|m\.?sc|m\.?s|m\.?a|m\.?eng|m\.?tech|mba)\b"),
+    "doctorate": re.compile(r"\b(phd|ph\.d|doctorate|doctor of)\b"),
+    "associate": re.compile(r"\b(associate)\b"),
+    "diploma": re.compile(r"\b(diploma|certificate of)\b"),
+}
+# Field of study: "Bachelor's degree in Computer Science - FPT University - 2024"
+_DEGREE_FIELD = re.compile(r"\bin ([^,\-(–]+)")
+
+MAX_TERM_LENGTH = 255
+
+
+def normalize_term(text: Any) -> str:
+    """Lowercase, strip punctuation and a trailing version: "Python 3.10 " -> "python"."""
+    text = _SPACE.sub(" ", _NOISE.sub(" ", str(text).lower())).strip(" .-/")
+    return _VERSION.sub("", text).strip(" .-/")[:MAX_TERM_LENGTH]
+
+
+def split_terms(value: Any) -> set[str]:
+    """Normalized terms of a skill or certificate string."""
+    return {term for term in map(normalize_term, _SPLIT.split(str(value))) if term}
+
+
+def degree_terms(value: Any) -> set[str]:
+    """
+    A degree string is matched by its level ("bachelor", "master", ...) and
+    by its field of study ("computer science"), as well as verbatim.
+    """
+    text = str(value).lower()
+    terms = {normalize_term(text)}
+    terms.update(level for level, pattern in _DEGREE_LEVELS.items() if pattern.search(text))
+    field = _DEGREE_FIELD.search(text)
+    if field:
+        terms.add(normalize_term(field.group(1)))
+    return {term for term in terms if term}
+
+
+def skill_terms(result: Mapping[str, Any]) -> set[tuple[str, str]]:
+    """{(kind, term)} of an analysis result, for every SKILL_KINDS section."""
+    terms: set[tuple[str, str]] = set()
+    for kind in SKILL_KINDS:
+        values = result.get(kind) or []
+        if isinstance(values, str):
+            values = [values]
+        for value in values:
+            for term in degree_terms(value) if kind == "degree" else split_terms(value):
+                terms.add((kind, term))
+    return terms
+
+
+def index_candidate_skills(
+    session: Session,
+    analysis_record: CandidateAnalysis,
+    result: dict[str, Any],
+    replace: bool = False,
+) -> None:
+    """
+    Add the CandidateSkill rows of an analysis to the session, after
+    deleting its old ones when replace is set. The caller commits them
+    together with the analysis itself.
+    """
+    if replace:
+        session.execute(
+            delete(CandidateSkill).where(
+                col(CandidateSkill.candidate_analysis_id) == analysis_record.id
+            )
+        )
+    session.add_all(
+        [
+            CandidateSkill(candidate_analysis_id=analysis_record.id, kind=kind, term=term)
+            for kind, term in skill_terms(result)
+        ]
+    )
+
+
+def replace_candidate_skills(session: Session, analysis_records: Sequence[CandidateAnalysis]) -> None:
+    """Bulk variant of index_candidate_skills with replace, one delete for all records."""
+    session.execute(
+        delete(CandidateSkill).where(
+            col(CandidateSkill.candidate_analysis_id).in_([record.id for record in analysis_records])
+        )
+    )
+    for record in analysis_records:
+        index_candidate_skills(session, record, record.analysis_result)
+
+
+def reindex_candidate_skills(session: Session, batch_size: int = 500) -> int:
+    """Rebuild the whole index from analysis_result, e.g. after the index table was added."""
+    session.execute(delete(CandidateSkill))
+    count = 0
+    offset = 0
+    while True:
+        rows = session.exec(
+            select(CandidateAnalysis.id, CandidateAnalysis.analysis_result)
+            .order_by(col(CandidateAnalysis.id))
+            .offset(offset)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        session.add_all(
+            [
+                CandidateSkill(candidate_analysis_id=row_id, kind=kind, term=term)
+                for row_id, analysis_result in rows
+                for kind, term in skill_terms(analysis_result)
+            ]
+        )
+        session.flush()
+        count += len(rows)
+        offset += batch_size
+    session.commit()
+    return count
+
+
+def search_candidates(
+    session, all_terms=(), any_terms=(), none_terms=(), kinds=SKILL_KINDS, limit=100
+):
+    """
+    Candidate analyses having every term of all_terms, at least one of
+    any_terms and none of none_terms, newest first. Terms are normalized
+    like the index, and each condition is one lookup on (kind, term).
+    """
+    def matching(terms):
+        return select(CandidateSkill.candidate_analysis_id).where(
+            CandidateSkill.kind.in_(kinds), CandidateSkill.term.in_(terms)
+        )
+
+    asked = bool(all_terms), bool(any_terms)
+    all_terms = {normalize_term(term) for term in all_terms} - {""}
+    any_terms = {normalize_term(term) for term in any_terms} - {""}
+    none_terms = {normalize_term(term) for term in none_terms} - {""}
+    # Terms such as "!!" match no skill, not every candidate
+    if asked != (bool(all_terms), bool(any_terms)):
+        return []
+
+    statement = select(CandidateAnalysis)
+    if all_terms:
+        statement = statement.where(
+            CandidateAnalysis.id.in_(
+                matching(all_terms)
+                .group_by(CandidateSkill.candidate_analysis_id)
+                .having(func.count(func.distinct(CandidateSkill.term)) == len(all_terms))
+            )
+        )
+    if any_terms:
+        statement = statement.where(CandidateAnalysis.id.in_(matching(any_terms)))
+    if none_terms:
+        statement = statement.where(CandidateAnalysis.id.not_in(matching(none_terms)))
+    statement = statement.order_by(CandidateAnalysis.created_at.desc()).limit(limit)
+    return session.exec(statement).all()
@@ -21,5 +21,13 @@ class Settings(BaseSettings):
     DATE_FMT: str = "%Y-%m-%d %H:%M:%S"
     LOG_DIR: str = f"{basedir}/logs/api.log"
 
+    # Shared LLM HTTP client, see app/api/llm.py
+    LLM_MAX_CONNECTIONS: int = 100
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    LLM_KEEPALIVE_EXPIRY: float = 60.0
+    LLM_CONNECT_TIMEOUT: float = 10.0
+    LLM_READ_TIMEOUT: float = 120.0
+    LLM_MAX_RETRIES: int = 2
+
 
 settings = Settings()
@@ -3,6 +3,10 @@ from pydantic_settings import BaseSettings
 
 class JobConfig(BaseSettings):
     MODEL_NAME: str = "llama-3.3-70b-versatile"
+    TEMPERATURE: float = 0.5
+
+    # Input token budget for the job description sent to MODEL_NAME
+    MAX_INPUT_TOKENS: int = 3000
 
 
 job_config = JobConfig()
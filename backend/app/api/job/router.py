@@ -1,10 +1,8 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter
 from . import service
 # from .models import JobBase
 from app.models import JobBase, JobResponseSchema, JobAnalyzeRequest, Job
-from app.api.deps import get_db  # or SessionDep if that's your alias
-from sqlalchemy.orm import Session
-import json
+from app.api.deps import AsyncSessionDep
 
 router = APIRouter()
 
@@ -17,14 +15,12 @@ router = APIRouter()
 #     return result
 
 @router.post("/analyse_job", response_model=JobResponseSchema)
-async def analyse_job(job_data: JobAnalyzeRequest, session: Session = Depends(get_db)):
-    result = service.analyse_job(job_data=job_data)
+async def analyse_job(job_data: JobAnalyzeRequest, session: AsyncSessionDep = None):
+    result = await service.analyse_job_async(job_data=job_data)
     # Save result to job
-    job = session.get(Job, job_data.id)
+    job = await session.get(Job, job_data.id)
     if job:
-        job.analysis_result = json.dumps(result)
+        job.analysis_result = result
         session.add(job)
-        session.commit()
-        session.refresh(job)
-    print("job result:\n", result)
+        await session.commit()
     return result  # <-- return the analysis result dict
@@ -0,0 +1,56 @@
+import re
+from typing import Any
+
+from sqlalchemy import ColumnElement, Float, cast
+from sqlmodel import col, func
+
+from app.models import Job
+
+# Postgres text search configuration of Job.search_vector
+SEARCH_CONFIG = "english"
+
+# Words only, so user input never reaches the tsquery syntax (& | ! : * ...)
+_WORD = re.compile(r"\w+")
+
+MAX_QUERY_WORDS = 16
+
+
+def word_query(word: str, weights: str = "") -> ColumnElement[Any]:
+    """
+    tsquery matching word stemmed ("developers" finds "developer") or as a
+    prefix ("kube" finds "Kubernetes"). Prefixes go through the simple
+    configuration, a stemmed "analy" would no longer prefix "analyst".
+    weights restricts the match to a part of the document: "A" is the
+    title, "B" the description.
+    """
+    stemmed = func.to_tsquery(SEARCH_CONFIG, f"{word}:{weights}" if weights else word)
+    return stemmed.op("||")(func.to_tsquery("simple", f"{word}:*{weights}"))
+
+
+def job_search(
+    q: str | None = None, title: str | None = None, description: str | None = None
+) -> ColumnElement[Any] | None:
+    """
+    tsquery of a job search, every word has to match, or None without any
+    words to search for. q searches title and description, title and
+    description only their own part of Job.search_vector.
+    """
+    query: ColumnElement[Any] | None = None
+    for text, weights in ((q, ""), (title, "A"), (description, "B")):
+        for word in _WORD.findall((text or "").lower())[:MAX_QUERY_WORDS]:
+            part = word_query(word, weights)
+            query = part if query is None else query.op("&&")(part)
+    return query
+
+
+def search_condition(tsquery: ColumnElement[Any]) -> ColumnElement[bool]:
+    """WHERE clause served by the GIN index on Job.search_vector."""
+    return col(Job.search_vector).op("@@")(tsquery)
+
+
+def search_rank(tsquery: ColumnElement[Any]) -> ColumnElement[float]:
+    """
+    Relevance of a job, title matches counting more than description ones.
+    As double precision, so a cursor holding it compares equal to the row.
+    """
+    return cast(func.ts_rank_cd(col(Job.search_vector), tsquery), Float)
@@ -1,54 +1,67 @@
-import json
 import time
 import re
-import os
 from pathlib import Path
+from typing import Any
 from dotenv import load_dotenv
 
 import ollama
 
-import jsbeautifier
-from langchain.schema import HumanMessage, SystemMessage
-from langchain_openai import ChatOpenAI
+from langchain.schema import BaseMessage, HumanMessage, SystemMessage
 from .config import job_config
 from .prompts import fn_job_analysis, system_prompt_job
 # from utils import LOGGER
 from groq import Groq
-from app.models import JobResponseSchema
+from app.models import JobAnalyzeRequest, JobResponseSchema
 # from app.api.utils import parse_response_to_schema
+from app.api.llm import get_llm
+from app.api.output import output2json
+from app.api.prompt import compact_prompt
 from app.api.utils import LOGGER
 
 env_path = Path(__file__).parents[3] / '.env'
 load_dotenv(dotenv_path=env_path)
 
-def output2json(output):
-    """GPT Output Object >>> json"""
-    opts = jsbeautifier.default_options()
-    return json.loads(jsbeautifier.beautify(output["tool_calls"][0]["function"]["arguments"], opts)) 
+def job_messages(job_data: JobAnalyzeRequest) -> list[BaseMessage]:
+    content = compact_prompt("job", job_data.description or "", job_config.MAX_INPUT_TOKENS)
+    return [
+        SystemMessage(content=system_prompt_job),
+        HumanMessage(content=content),
+    ]
 
-def analyse_job(job_data):
+
+def analyse_job(job_data: JobAnalyzeRequest) -> Any:
     start = time.time()
-    
-    print("job data:\n", job_data)
-
-    llm = ChatOpenAI(
-        openai_api_base=os.getenv("GROQ_API_BASE"),  # Groq endpoint
-        openai_api_key=os.getenv("OPENAI_API_KEY"),
-        model=job_config.MODEL_NAME,
-        temperature=0.5
-        )
+    LOGGER.info("Start analyse job")
+
+    llm = get_llm(job_config)
     completion = llm.predict_messages(
-        [
-            SystemMessage(content=system_prompt_job),
-            HumanMessage(content=job_data.description),
-        ],
+        job_messages(job_data),
+        functions=fn_job_analysis,
+    )
+    output_analysis = completion.additional_kwargs
+    json_output = output2json(output_analysis, fn_job_analysis)
+
+    LOGGER.info("Done analyse job")
+    LOGGER.info(f"Time analyse job: {time.time() - start}")
+
+    return json_output
+
+
+async def analyse_job_async(job_data: JobAnalyzeRequest) -> Any:
+    """Same as analyse_job, but awaits the LLM instead of blocking the loop."""
+    start = time.time()
+    LOGGER.info("Start analyse job")
+
+    llm = get_llm(job_config)
+    completion = await llm.ainvoke(
+        job_messages(job_data),
         functions=fn_job_analysis,
     )
     output_analysis = completion.additional_kwargs
-    print("job_data.description:\n", job_data.description)
-    # print("job_data output_analysis:\n", output_analysis)
-    json_output = output2json(output_analysis)
-    print("Parsed JSON output:", json_output)
+    json_output = output2json(output_analysis, fn_job_analysis)
+
+    LOGGER.info("Done analyse job")
+    LOGGER.info(f"Time analyse job: {time.time() - start}")
 
     return json_output
 
@@ -0,0 +1,81 @@
+import os
+import threading
+from typing import Protocol
+
+import httpx
+from langchain_openai import ChatOpenAI
+from pydantic import SecretStr
+
+from .config import settings
+
+
+class LLMConfig(Protocol):
+    """The settings of a JobConfig, CandidateConfig or ScoreConfig that get_llm reads."""
+
+    MODEL_NAME: str
+    TEMPERATURE: float
+
+
+class LLMClients:
+    """
+    One pooled HTTP client pair per process, shared by every ChatOpenAI model.
+
+    Created at app startup, but also lazily on first use so worker threads and
+    scripts that never run the lifespan get the same pooling.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._http_client: httpx.Client | None = None
+        self._http_async_client: httpx.AsyncClient | None = None
+        self._models: dict[tuple[str, float], ChatOpenAI] = {}
+
+    def startup(self) -> None:
+        with self._lock:
+            if self._http_client is not None:
+                return
+            limits = httpx.Limits(
+                max_connections=settings.LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY,
+            )
+            timeout = httpx.Timeout(
+                settings.LLM_READ_TIMEOUT, connect=settings.LLM_CONNECT_TIMEOUT
+            )
+            self._http_client = httpx.Client(limits=limits, timeout=timeout)
+            self._http_async_client = httpx.AsyncClient(limits=limits, timeout=timeout)
+
+    async def shutdown(self) -> None:
+        with self._lock:
+            http_client, self._http_client = self._http_client, None
+            http_async_client, self._http_async_client = self._http_async_client, None
+            self._models = {}
+        if http_client is not None:
+            http_client.close()
+        if http_async_client is not None:
+            await http_async_client.aclose()
+
+    def get(self, model_name: str, temperature: float) -> ChatOpenAI:
+        self.startup()
+        key = (model_name, temperature)
+        with self._lock:
+            if key not in self._models:
+                api_key = os.getenv("OPENAI_API_KEY")
+                self._models[key] = ChatOpenAI(
+                    base_url=os.getenv("GROQ_API_BASE"),  # Groq endpoint
+                    api_key=SecretStr(api_key) if api_key else None,
+                    model=model_name,
+                    temperature=temperature,
+                    max_retries=settings.LLM_MAX_RETRIES,
+                    http_client=self._http_client,
+                    http_async_client=self._http_async_client,
+                )
+            return self._models[key]
+
+
+llm_clients = LLMClients()
+
+
+def get_llm(model_config: LLMConfig) -> ChatOpenAI:
+    """Shared chat model for a JobConfig, CandidateConfig or ScoreConfig."""
+    return llm_clients.get(model_config.MODEL_NAME, model_config.TEMPERATURE)
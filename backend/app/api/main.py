@@ -4,6 +4,7 @@ from app.api.routes import items, jobs, login, private, users, utils
 from app.api.candidate import router as candidate_router
 from app.api.score import router as score_router
 from app.api.job import router as job_router
+from app.api.task import router as task_router
 from app.core.config import settings
 
 api_router = APIRouter()
@@ -15,6 +16,7 @@ api_router.include_router(jobs.router)
 api_router.include_router(candidate_router, prefix="/candidate", tags=["candidate"])
 api_router.include_router(score_router.router)
 api_router.include_router(job_router.router, prefix="/job", tags=["job"])
+api_router.include_router(task_router)
 
 if settings.ENVIRONMENT == "local":
     api_router.include_router(private.router)
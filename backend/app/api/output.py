@@ -0,0 +1,112 @@
+import json
+import re
+from collections.abc import Sequence
+from typing import Any
+
+import orjson
+
+from .utils import LOGGER
+
+_CODE_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$")
+_TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+_INTEGER = re.compile(r"^[-+]?\d+$")
+
+# Python types of the JSON schema type names, "integer" is handled on its own
+_JSON_TYPES: dict[str, type | tuple[type, ...]] = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "number": (int, float),
+    "boolean": bool,
+}
+
+
+class LLMOutputError(ValueError):
+    """The model's function call arguments cannot be parsed or do not match the schema."""
+
+
+def repair_json(text: str) -> Any:
+    """
+    Lenient parse of almost-JSON: code fences, text around the object,
+    trailing commas and raw control characters inside strings.
+    """
+    text = _CODE_FENCE.sub("", text.strip())
+    start, end = text.find("{"), text.rfind("}")
+    if start != -1 and end > start:
+        text = text[start : end + 1]
+    text = _TRAILING_COMMA.sub(r"\1", text)
+    return json.loads(text, strict=False)
+
+
+def parse_arguments(arguments: str) -> Any:
+    """Function call arguments as a dict: strict orjson first, repair only when that fails."""
+    try:
+        return orjson.loads(arguments)
+    except orjson.JSONDecodeError as e:
+        LOGGER.warning(f"Invalid JSON from LLM, trying to repair it: {str(e)}")
+    try:
+        return repair_json(arguments)
+    except ValueError as e:
+        raise LLMOutputError(f"Cannot parse LLM output: {str(e)}") from e
+
+
+def validate(value: Any, schema: dict[str, Any], path: str = "$") -> Any:
+    """
+    Check value against the JSON schema subset used by the function
+    definitions (type, properties, required, items, minimum, maximum),
+    returning it with integer strings such as "75" coerced to int.
+    """
+    expected = schema.get("type")
+    if expected == "integer":
+        if isinstance(value, str) and _INTEGER.match(value.strip()):
+            value = int(value)
+        elif isinstance(value, float) and value.is_integer():
+            value = int(value)
+        if not isinstance(value, int) or isinstance(value, bool):
+            raise LLMOutputError(f"{path}: expected integer, got {value!r}")
+    elif expected in _JSON_TYPES and not isinstance(value, _JSON_TYPES[expected]):
+        raise LLMOutputError(f"{path}: expected {expected}, got {type(value).__name__}")
+
+    if "minimum" in schema and value < schema["minimum"]:
+        raise LLMOutputError(f"{path}: {value} is below {schema['minimum']}")
+    if "maximum" in schema and value > schema["maximum"]:
+        raise LLMOutputError(f"{path}: {value} is above {schema['maximum']}")
+
+    if expected == "object":
+        missing = [key for key in schema.get("required", []) if key not in value]
+        if missing:
+            raise LLMOutputError(f"{path}: missing {', '.join(missing)}")
+        properties = schema.get("properties", {})
+        value = {
+            key: validate(item, properties[key], f"{path}.{key}") if key in properties else item
+            for key, item in value.items()
+        }
+    elif expected == "array" and "items" in schema:
+        value = [validate(item, schema["items"], f"{path}[{i}]") for i, item in enumerate(value)]
+    return value
+
+
+def function_call(output: dict[str, Any]) -> tuple[str | None, str]:
+    """Name and raw arguments of the first tool or function call in additional_kwargs."""
+    if output.get("tool_calls"):
+        call = output["tool_calls"][0]["function"]
+    elif output.get("function_call"):
+        call = output["function_call"]
+    else:
+        raise LLMOutputError("LLM response has no function call")
+    return call.get("name"), call["arguments"]
+
+
+def output2json(
+    output: dict[str, Any], functions: Sequence[dict[str, Any]] | None = None
+) -> Any:
+    """
+    GPT Output Object >>> json. With the functions passed to the model, the
+    arguments are validated against the schema of the function it called.
+    """
+    name, arguments = function_call(output)
+    result = parse_arguments(arguments)
+    if functions:
+        function = next((fn for fn in functions if fn["name"] == name), functions[0])
+        result = validate(result, function["parameters"])
+    return result
@@ -0,0 +1,102 @@
+import base64
+import uuid
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Any, Literal, TypeVar
+
+import orjson
+from sqlalchemy import tuple_
+from sqlmodel import Session, func, select
+from sqlmodel.sql.expression import SelectOfScalar
+
+T = TypeVar("T")
+
+# exact: count(*), estimate: the planner's row estimate, none: no count query
+CountMode = Literal["exact", "estimate", "none"]
+
+
+class InvalidCursor(ValueError):
+    """The cursor was not returned by the listing it is used with."""
+
+
+def _dump(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def _load(value: Any, key: Any) -> Any:
+    python_type = key.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is uuid.UUID:
+        return uuid.UUID(value)
+    return python_type(value)
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Opaque, URL safe cursor holding the sort key of the last row of a page."""
+    data = orjson.dumps([_dump(value) for value in values])
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, keys: Sequence[Any]) -> list[Any]:
+    """Sort key values of a cursor, converted to the types of keys."""
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = orjson.loads(data)
+        if not isinstance(values, list):
+            raise InvalidCursor("Invalid cursor")
+        # A cursor of another listing can hold a different number of values
+        return [_load(value, key) for value, key in zip(values, keys, strict=True)]
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor("Invalid cursor") from e
+
+
+def paginate(
+    session: Session,
+    statement: SelectOfScalar[T],
+    keys: Sequence[Any],
+    limit: int,
+    cursor: str | None = None,
+    skip: int = 0,
+) -> tuple[list[T], str | None]:
+    """
+    One page of statement (a select of one entity) ordered by keys, all
+    descending and never NULL, the last of them unique (e.g. created_at,
+    id). With a cursor the page starts right after the row it was taken
+    from, which an index on keys finds directly however deep the page is.
+    skip is the offset pagination of the first page. Returns (rows, cursor
+    of the next page or None).
+    """
+    if cursor:
+        values = decode_cursor(cursor, keys)
+        statement = statement.where(tuple_(*keys) < tuple_(*values))
+    page = statement.add_columns(*keys).order_by(*(key.desc() for key in keys))
+    if skip:
+        page = page.offset(skip)
+    # One extra row tells whether there is a next page
+    rows = session.execute(page.limit(limit + 1)).all()
+    next_cursor = encode_cursor(rows[limit - 1][1:]) if len(rows) > limit > 0 else None
+    return [row[0] for row in rows[:limit]], next_cursor
+
+
+def count_rows(
+    session: Session, statement: SelectOfScalar[Any], mode: CountMode = "exact"
+) -> int | None:
+    """
+    Number of rows of statement (the select of a listing, before ordering
+    and paging): an exact count(*), the planner's estimate, which costs no
+    scan, or None.
+    """
+    if mode == "none":
+        return None
+    if mode == "estimate":
+        compiled = statement.compile(bind=session.get_bind())
+        plan = session.connection().exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params
+        ).scalar_one()
+        return int(plan[0]["Plan"]["Plan Rows"])
+    return session.exec(select(func.count()).select_from(statement.subquery())).one()
@@ -0,0 +1,210 @@
+import json
+import re
+import threading
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any
+
+from .utils import LOGGER
+
+if TYPE_CHECKING:
+    from tiktoken import Encoding
+
+# Lines that are only a page number, e.g. "Page 3", "- Page 3 -", "Page 3 of 5", "page 3/5".
+# The word "page" is required, a bare "2019" or "05/2021" is content
+_PAGE_NUMBER = re.compile(r"^[-\s]*page\s*\d+(\s*(of|/)\s*\d+)?[-\s]*$", re.IGNORECASE)
+_INLINE_SPACE = re.compile(r"[ \t\v\u00a0]+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+
+# Text extraction separates pages with a form feed
+PAGE_BREAK = "\f"
+# Lines from the top and the bottom of a page that can be a header or footer
+HEADER_FOOTER_LINES = 2
+# Short lines only, a header or footer is never a paragraph
+HEADER_FOOTER_MAX_LENGTH = 80
+
+# Bump when the compaction rules change, see compaction_settings
+COMPACTION_VERSION = 2
+
+# Rough ratio used when no tokenizer is available
+CHARS_PER_TOKEN = 4
+
+
+def normalize_whitespace(text: str) -> str:
+    """
+    Collapse runs of spaces/tabs, trim every line and keep at most one blank
+    line, page by page: page breaks are kept for strip_boilerplate.
+    """
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    pages = []
+    for page in text.split(PAGE_BREAK):
+        page = "\n".join(_INLINE_SPACE.sub(" ", line).strip() for line in page.split("\n"))
+        pages.append(_BLANK_LINES.sub("\n\n", page).strip())
+    return PAGE_BREAK.join(page for page in pages if page)
+
+
+@lru_cache(maxsize=1)
+def get_encoding() -> "Encoding | None":
+    """
+    The cl100k tokenizer, or None when tiktoken cannot load it (e.g. offline).
+    It is not the Llama tokenizer, but close enough to budget prompts.
+    """
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        LOGGER.warning(f"Tokenizer unavailable, estimating tokens from length: {str(e)}")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    encoding = get_encoding()
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to at most max_tokens, at the last line break that fits when possible."""
+    encoding = get_encoding()
+    if encoding is None:
+        cut = text[: max_tokens * CHARS_PER_TOKEN]
+    else:
+        tokens = encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        cut = encoding.decode(tokens[:max_tokens])
+    if len(cut) == len(text):
+        return text
+    line_end = cut.rfind("\n")
+    if line_end > len(cut) // 2:
+        cut = cut[:line_end]
+    return cut.rstrip()
+
+
+def compaction_settings(max_tokens: int) -> dict[str, int]:
+    """What decides the compacted prompt of an input, for prompt versions."""
+    return {
+        "version": COMPACTION_VERSION,
+        "max_input_tokens": max_tokens,
+        "header_footer_lines": HEADER_FOOTER_LINES,
+        "header_footer_max_length": HEADER_FOOTER_MAX_LENGTH,
+    }
+
+
+def _headers_and_footers(pages: list[list[str]]) -> set[int]:
+    """
+    Positions (index from the top, or negative from the bottom) of the lines
+    that are the same short line on every page, such as a name or
+    "Curriculum Vitae" printed on each page.
+    """
+    if len(pages) < 2:
+        return set()
+    positions = set()
+    for index in [*range(HEADER_FOOTER_LINES), *range(-HEADER_FOOTER_LINES, 0)]:
+        if any(len(page) < HEADER_FOOTER_LINES + 1 for page in pages):
+            break
+        lines = {page[index].lower() for page in pages}
+        if len(lines) == 1 and len(pages[0][index]) <= HEADER_FOOTER_MAX_LENGTH:
+            positions.add(index)
+    return positions
+
+
+def strip_boilerplate(text: str) -> str:
+    """
+    Drop "Page n" lines and the headers and footers repeated at the same
+    place on every page, keeping them on the first page, and collapse
+    whitespace. Text without page breaks only loses its "Page n" lines.
+    """
+    pages = [
+        [line for line in page.split("\n") if not _PAGE_NUMBER.match(line)]
+        for page in normalize_whitespace(text).split(PAGE_BREAK)
+    ]
+    # Headers and footers are found among the non-blank lines of each page
+    content = [[i for i, line in enumerate(page) if line] for page in pages]
+    repeated = _headers_and_footers(
+        [[page[i] for i in indexes] for page, indexes in zip(pages, content, strict=True)]
+    )
+    kept: list[str] = []
+    for number, (page, indexes) in enumerate(zip(pages, content, strict=True)):
+        drop = {indexes[index] for index in repeated} if number else set()
+        kept += [line for i, line in enumerate(page) if i not in drop]
+    # Dropped lines can leave blank lines next to each other
+    return normalize_whitespace("\n".join(kept))
+
+
+def _drop_empty(value: Any) -> Any:
+    if isinstance(value, dict):
+        value = {k: _drop_empty(v) for k, v in value.items()}
+        return {k: v for k, v in value.items() if v not in (None, "", [], {})}
+    if isinstance(value, list):
+        value = [_drop_empty(v) for v in value]
+        return [v for v in value if v not in (None, "", [], {})]
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def compact_json(value: Any) -> str:
+    """Minimal JSON for prompts: no whitespace, no empty fields, unicode kept as is."""
+    return json.dumps(_drop_empty(value), separators=(",", ":"), ensure_ascii=False)
+
+
+class PromptMetrics:
+    """Per prompt kind counters of tokens before and after compaction."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._stats: dict[str, dict[str, int]] = {}
+
+    def record(self, kind: str, original_tokens: int, sent_tokens: int, truncated: bool) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(
+                kind,
+                {"requests": 0, "original_tokens": 0, "sent_tokens": 0, "truncated": 0},
+            )
+            stats["requests"] += 1
+            stats["original_tokens"] += original_tokens
+            stats["sent_tokens"] += sent_tokens
+            stats["truncated"] += int(truncated)
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        with self._lock:
+            return {
+                kind: {
+                    **stats,
+                    "tokens_saved": stats["original_tokens"] - stats["sent_tokens"],
+                    "tokens_saved_per_request": (
+                        (stats["original_tokens"] - stats["sent_tokens"]) / stats["requests"]
+                    ),
+                }
+                for kind, stats in self._stats.items()
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._stats = {}
+
+
+prompt_metrics = PromptMetrics()
+
+
+def compact_prompt(kind: str, text: str, max_tokens: int, original: str | None = None) -> str:
+    """
+    Prompt text for the LLM: boilerplate stripped and cut to the model's
+    input budget. original is what would have been sent without compaction
+    (defaults to text) and only feeds the tokens-saved metrics.
+    """
+    original_tokens = count_tokens(original if original is not None else text)
+    compacted = strip_boilerplate(text)
+    sent_tokens = count_tokens(compacted)
+    truncated = sent_tokens > max_tokens
+    if truncated:
+        compacted = truncate_to_tokens(compacted, max_tokens)
+        sent_tokens = count_tokens(compacted)
+    prompt_metrics.record(kind, original_tokens, sent_tokens, truncated)
+    LOGGER.info(
+        f"Prompt {kind}: {original_tokens} -> {sent_tokens} tokens"
+        + (f" (truncated to {max_tokens})" if truncated else "")
+    )
+    return compacted
@@ -6,9 +6,10 @@ from fastapi import APIRouter, HTTPException
 from sqlmodel import func, select
 
 from app.api.deps import CurrentUser, SessionDep
+from app.api.pagination import CountMode, InvalidCursor, count_rows, paginate
 from app.models import Job, JobCreate, JobPublic, JobsPublic, JobUpdate, JobResponseSchema, Message, JobAnalyzeRequest
 
-from ..job import service
+from ..job import search, service
 
 router = APIRouter(prefix="/jobs", tags=["jobs"])
 
@@ -19,44 +20,40 @@ def read_jobs(
     current_user: CurrentUser,
     skip: int = 0,
     limit: int = 100,
+    cursor: str | None = None,
+    count: CountMode = "exact",
+    q: str | None = None,
     title: str | None = None,
     description: str | None = None,
     created_at: date | None = None,
 ) -> Any:
     """
-    Retrieve jobs.
+    Retrieve jobs, newest first or, when searching, most relevant first.
+    q searches title and description, title and description only their own
+    field. Every word has to match, as a word prefix.
+    Pass the next_cursor of a page as cursor to get the next one.
     """
-    base_statement = select(Job)
-    count_statement = select(func.count()).select_from(Job)
+    statement = select(Job)
 
     if not current_user.is_superuser:
-        base_statement = base_statement.where(Job.owner_id == current_user.id)
-        count_statement = count_statement.where(Job.owner_id == current_user.id)
+        statement = statement.where(Job.owner_id == current_user.id)
 
-    if title:
-        base_statement = base_statement.where(func.lower(Job.title).like(f"%{title.lower()}%"))
-        count_statement = count_statement.where(func.lower(Job.title).like(f"%{title.lower()}%"))
-
-    if description:
-        base_statement = base_statement.where(
-            func.lower(Job.description).like(f"%{description.lower()}%")
-        )
-        count_statement = count_statement.where(
-            func.lower(Job.description).like(f"%{description.lower()}%")
-        )
+    keys = [Job.created_at, Job.id]
+    tsquery = search.job_search(q=q, title=title, description=description)
+    if tsquery is not None:
+        statement = statement.where(search.search_condition(tsquery))
+        keys.insert(0, search.search_rank(tsquery))
 
     if created_at:
-        base_statement = base_statement.where(func.date(Job.created_at) == created_at)
-        count_statement = count_statement.where(func.date(Job.created_at) == created_at)
-
-    # Add sorting by created_at in descending order (newest first)
-    base_statement = base_statement.order_by(Job.created_at.desc())
+        statement = statement.where(func.date(Job.created_at) == created_at)
 
-    count = session.exec(count_statement).one()
-    statement = base_statement.offset(skip).limit(limit)
-    jobs = session.exec(statement).all()
+    try:
+        jobs, next_cursor = paginate(session, statement, keys, limit, cursor, skip)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    total = count_rows(session, statement, count)
 
-    return JobsPublic(data=jobs, count=count)
+    return JobsPublic(data=jobs, count=total, next_cursor=next_cursor)
 
 
 @router.get("/{id}", response_model=JobPublic)
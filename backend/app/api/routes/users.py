@@ -2,7 +2,7 @@ import uuid
 from typing import Any
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import col, delete, func, select
+from sqlmodel import col, delete, select
 
 from app import crud
 from app.api.deps import (
@@ -10,7 +10,9 @@ from app.api.deps import (
     SessionDep,
     get_current_active_superuser,
 )
+from app.api.pagination import CountMode, InvalidCursor, count_rows, paginate
 from app.core.config import settings
+from app.core.principal_cache import principal_cache
 from app.core.security import get_password_hash, verify_password
 from app.models import (
     Item,
@@ -34,18 +36,25 @@ router = APIRouter(prefix="/users", tags=["users"])
     dependencies=[Depends(get_current_active_superuser)],
     response_model=UsersPublic,
 )
-def read_users(session: SessionDep, skip: int = 0, limit: int = 100) -> Any:
+def read_users(
+    session: SessionDep,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: str | None = None,
+    count: CountMode = "exact",
+) -> Any:
     """
-    Retrieve users.
+    Retrieve users. Pass the next_cursor of a page as cursor to get the next one.
     """
+    statement = select(User)
 
-    count_statement = select(func.count()).select_from(User)
-    count = session.exec(count_statement).one()
-
-    statement = select(User).offset(skip).limit(limit)
-    users = session.exec(statement).all()
+    try:
+        users, next_cursor = paginate(session, statement, [User.id], limit, cursor, skip)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    total = count_rows(session, statement, count)
 
-    return UsersPublic(data=users, count=count)
+    return UsersPublic(data=users, count=total, next_cursor=next_cursor)
 
 
 @router.post(
@@ -93,6 +102,7 @@ def update_user_me(
     current_user.sqlmodel_update(user_data)
     session.add(current_user)
     session.commit()
+    principal_cache.invalidate_user(current_user.id)
     session.refresh(current_user)
     return current_user
 
@@ -114,6 +124,7 @@ def update_password_me(
     current_user.hashed_password = hashed_password
     session.add(current_user)
     session.commit()
+    principal_cache.invalidate_user(current_user.id)
     return Message(message="Password updated successfully")
 
 
@@ -136,6 +147,7 @@ def delete_user_me(session: SessionDep, current_user: CurrentUser) -> Any:
         )
     session.delete(current_user)
     session.commit()
+    principal_cache.invalidate_user(current_user.id)
     return Message(message="User deleted successfully")
 
 
@@ -202,6 +214,8 @@ def update_user(
             )
 
     db_user = crud.update_user(session=session, db_user=db_user, user_in=user_in)
+    # Deactivation and privilege changes apply to the user's next request
+    principal_cache.invalidate_user(user_id)
     return db_user
 
 
@@ -223,4 +237,5 @@ def delete_user(
     session.exec(statement)  # type: ignore
     session.delete(user)
     session.commit()
+    principal_cache.invalidate_user(user_id)
     return Message(message="User deleted successfully")
@@ -1,7 +1,13 @@
+from typing import Any
+
 from fastapi import APIRouter, Depends
 from pydantic.networks import EmailStr
 
 from app.api.deps import get_current_active_superuser
+from app.api.prompt import prompt_metrics
+from app.core.password_hasher import password_hasher
+from app.core.pool import async_pool_metrics, pool_metrics
+from app.core.principal_cache import principal_cache
 from app.models import Message
 from app.utils import generate_test_email, send_email
 
@@ -29,3 +35,48 @@ def test_email(email_to: EmailStr) -> Message:
 @router.get("/health-check/")
 async def health_check() -> bool:
     return True
+
+
+@router.get("/prompt-stats/")
+async def prompt_stats() -> dict[str, dict[str, float]]:
+    """
+    Tokens sent to the LLM per prompt kind in this worker, before and after compaction.
+    """
+    return prompt_metrics.stats()
+
+
+@router.get(
+    "/db-pool-stats/",
+    dependencies=[Depends(get_current_active_superuser)],
+)
+def db_pool_stats() -> dict[str, Any]:
+    """
+    Database connection pools of the worker answering, the sync one and the
+    one of async routes: connections in use, checkout latency and
+    connection churn since it started.
+    """
+    return {"sync": pool_metrics.stats(), "async": async_pool_metrics.stats()}
+
+
+@router.get(
+    "/principal-cache-stats/",
+    dependencies=[Depends(get_current_active_superuser)],
+)
+def principal_cache_stats() -> dict[str, Any]:
+    """
+    Access tokens authenticated from the cache of the worker answering,
+    without reading their user, since it started.
+    """
+    return principal_cache.stats()
+
+
+@router.get(
+    "/password-hash-stats/",
+    dependencies=[Depends(get_current_active_superuser)],
+)
+def password_hash_stats() -> dict[str, Any]:
+    """
+    Password hashing threads of the worker answering: hashes queued or
+    running, refused ones, queue wait and hashing time since it started.
+    """
+    return password_hasher.stats()
@@ -0,0 +1,83 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any
+
+from .config import score_config
+from .prompts import PROMPT_VERSION
+
+
+def canonical_payload(job: Any, candidate: Any) -> str:
+    """Stable JSON for a job/candidate pair: sorted keys, no whitespace."""
+    return json.dumps(
+        {"job": job, "candidate": candidate},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+
+
+def score_cache_key(job: Any, candidate: Any) -> str:
+    payload = "|".join(
+        [score_config.MODEL_NAME, PROMPT_VERSION, canonical_payload(job, candidate)]
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ScoreCache:
+    """Thread-safe LRU of score results, counting where each lookup was served from."""
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._data: OrderedDict[str, Any] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.db_hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return self._data[key]
+
+    def peek(self, key: str) -> Any:
+        """Cached value of key, without counting a lookup or refreshing it."""
+        with self._lock:
+            return self._data.get(key)
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def record_db_hit(self) -> None:
+        with self._lock:
+            self.db_hits += 1
+
+    def record_miss(self) -> None:
+        with self._lock:
+            self.misses += 1
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "db_hits": self.db_hits,
+                "misses": self.misses,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = self.db_hits = self.misses = 0
+
+
+score_cache = ScoreCache(maxsize=score_config.CACHE_SIZE)
@@ -1,8 +1,32 @@
+from pathlib import Path
+from typing import ClassVar
+
 from pydantic_settings import BaseSettings
 
 
 class ScoreConfig(BaseSettings):
     MODEL_NAME: str = "llama-3.3-70b-versatile"
+    TEMPERATURE: float = 0.5
+
+    # Input token budget for the job/candidate payload sent to MODEL_NAME
+    MAX_INPUT_TOKENS: int = 6000
+
+    # Number of score results kept in the in-process LRU
+    CACHE_SIZE: int = 1024
+
+    # Max LLM calls in flight for one batch scoring request
+    BATCH_CONCURRENCY: int = 8
+
+    # Embedding pre-filter: "hashing" or the name of a sentence-transformers
+    # model, vector size for hashing, and where the candidate vectors are
+    # persisted between restarts. "hashing" is lexical feature hashing of
+    # words and word pairs, not a learned model: it needs no download and fits
+    # the serverless bundle. A model name needs `pip install sentence-transformers`,
+    # which is left out of requirements.txt because it pulls in torch.
+    EMBEDDING_MODEL: str = "hashing"
+    EMBEDDING_DIM: int = 256
+    BASE_DIR: ClassVar[Path] = Path(__file__).parents[3]  # Go up to the backend directory
+    EMBEDDING_INDEX_PATH: str = str(BASE_DIR / "upload" / "index" / "candidates.npz")
 
 
 score_config = ScoreConfig()
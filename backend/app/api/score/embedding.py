@@ -0,0 +1,229 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import uuid
+from functools import lru_cache
+from itertools import pairwise
+
+import numpy as np
+from sqlmodel import select
+
+from app.api.utils import LOGGER
+from app.models import CandidateAnalysis
+
+from .config import score_config
+from .ranking import SECTIONS
+
+# Keeps tokens such as c++, c#, node.js and ci/cd in one piece
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#./-]*[a-z0-9+#]|[a-z0-9]")
+
+
+def section_text(value):
+    """Text of one analysis section, which is a list of strings or a string."""
+    if isinstance(value, list):
+        return "\n".join(str(item) for item in value if item)
+    return str(value) if value else ""
+
+
+@lru_cache(maxsize=65536)
+def _feature(token, dim):
+    digest = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "little")
+    return digest % dim, 1.0 if digest >> 63 else -1.0
+
+
+class HashingEmbedder:
+    """
+    Signed feature hashing of words and word pairs, log-scaled and L2
+    normalized. Deterministic across processes and needs no model files.
+    """
+
+    def __init__(self, dim):
+        self.dim = dim
+
+    def encode(self, texts):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            words = _TOKEN.findall(text.lower())
+            for token in words + [f"{a} {b}" for a, b in pairwise(words)]:
+                index, sign = _feature(token, self.dim)
+                vectors[i, index] += sign
+        vectors = np.sign(vectors) * np.log1p(np.abs(vectors))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms > 0, norms, 1.0)
+
+
+class SentenceTransformerEmbedder:
+    """A sentence-transformers model on CPU, when that package is installed."""
+
+    def __init__(self, model_name):
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.dim = self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts):
+        return self.model.encode(
+            texts, normalize_embeddings=True, convert_to_numpy=True
+        ).astype(np.float32)
+
+
+def get_embedder():
+    if score_config.EMBEDDING_MODEL == "hashing":
+        return HashingEmbedder(score_config.EMBEDDING_DIM)
+    return SentenceTransformerEmbedder(score_config.EMBEDDING_MODEL)
+
+
+def embed_sections(embedder, analyses):
+    """(len(analyses), len(SECTIONS), dim) vectors, zero for empty sections."""
+    texts = [section_text(analysis.get(section)) for analysis in analyses for section in SECTIONS]
+    vectors = embedder.encode(texts) if texts else np.zeros((0, embedder.dim), np.float32)
+    empty = np.array([not text for text in texts])
+    if len(texts):
+        vectors[empty] = 0.0
+    return vectors.reshape(len(analyses), len(SECTIONS), embedder.dim)
+
+
+class CandidateIndex:
+    """
+    Section embeddings of every CandidateAnalysis in one float32 array,
+    kept in step with the table and saved to EMBEDDING_INDEX_PATH.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._embedder = None
+        self._loaded_from = None
+        self.ids = []
+        self.file_names = []
+        self.original_file_names = []
+        self.versions = []
+        self.vectors = None
+
+    def _reset(self):
+        self.ids, self.file_names, self.original_file_names, self.versions = [], [], [], []
+        self.vectors = np.zeros((0, len(SECTIONS), self._embedder.dim), dtype=np.float32)
+
+    def _load(self):
+        path = score_config.EMBEDDING_INDEX_PATH
+        if self._loaded_from == (path, score_config.EMBEDDING_MODEL):
+            return
+        self._embedder = get_embedder()
+        self._loaded_from = (path, score_config.EMBEDDING_MODEL)
+        self._reset()
+        try:
+            with np.load(path) as data:
+                meta = json.loads(str(data["meta"]))
+                vectors = data["vectors"]
+                same_model = meta["model"] == score_config.EMBEDDING_MODEL
+                if same_model and vectors.shape[2] == self._embedder.dim:
+                    self.ids = meta["ids"]
+                    self.file_names = meta["file_names"]
+                    self.original_file_names = meta["original_file_names"]
+                    self.versions = meta["versions"]
+                    self.vectors = vectors
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            LOGGER.warning(f"Rebuilding candidate embedding index: {str(e)}")
+
+    def _save(self):
+        path = score_config.EMBEDDING_INDEX_PATH
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        meta = {
+            "model": score_config.EMBEDDING_MODEL,
+            "ids": self.ids,
+            "file_names": self.file_names,
+            "original_file_names": self.original_file_names,
+            "versions": self.versions,
+        }
+        temp_path = f"{path}.{uuid.uuid4().hex}.npz"
+        np.savez(temp_path, vectors=self.vectors, meta=np.array(json.dumps(meta)))
+        os.replace(temp_path, path)
+
+    def sync(self, session):
+        """Embed new or re-analysed candidates and drop deleted ones."""
+        with self._lock:
+            self._load()
+            rows = session.exec(
+                select(CandidateAnalysis.id, CandidateAnalysis.updated_at)
+            ).all()
+            current = {str(row_id): updated_at.isoformat() for row_id, updated_at in rows}
+            keep = [
+                i for i, (row_id, version) in enumerate(zip(self.ids, self.versions, strict=True))
+                if current.get(row_id) == version
+            ]
+            indexed = {self.ids[i] for i in keep}
+            stale = [row_id for row_id in current if row_id not in indexed]
+            if not stale and len(keep) == len(self.ids):
+                return
+
+            new_rows = []
+            if stale:
+                new_rows = session.exec(
+                    select(CandidateAnalysis).where(
+                        CandidateAnalysis.id.in_([uuid.UUID(row_id) for row_id in stale])
+                    )
+                ).all()
+            removed = len(self.ids) - len(keep)
+            new_vectors = embed_sections(
+                self._embedder, [row.analysis_result for row in new_rows]
+            )
+            self.ids = [self.ids[i] for i in keep] + [str(row.id) for row in new_rows]
+            self.file_names = [self.file_names[i] for i in keep] + [row.file_name for row in new_rows]
+            self.original_file_names = [self.original_file_names[i] for i in keep] + [
+                row.original_file_name for row in new_rows
+            ]
+            self.versions = [self.versions[i] for i in keep] + [
+                row.updated_at.isoformat() for row in new_rows
+            ]
+            self.vectors = np.concatenate([self.vectors[keep], new_vectors])
+            LOGGER.info(
+                f"Candidate index: {len(new_rows)} embedded, "
+                f"{removed} removed, {len(self.ids)} total"
+            )
+            self._save()
+
+    def search(self, session, job_analysis, weights, top_k, file_names=None):
+        """
+        [(file_name, similarity)] of the top_k candidates closest to a job:
+        the per-section cosine similarities, weighted like the LLM score.
+        file_names restricts the search to those candidates (by file name or
+        original file name) and the requested names are returned.
+        """
+        self.sync(session)
+        with self._lock:
+            job_vectors = embed_sections(self._embedder, [job_analysis])[0]
+            names = np.array(self.file_names, dtype=object)
+            vectors = self.vectors
+            if file_names is not None:
+                requested = list(file_names)
+                originals = np.array(self.original_file_names, dtype=object)
+                by_original = np.isin(originals, requested) & ~np.isin(names, requested)
+                names = np.where(by_original, originals, names)
+                mask = np.isin(names, requested)
+                names, vectors = names[mask], vectors[mask]
+
+        if not len(names):
+            return []
+        # Sections the job does not ask for do not count
+        asked = job_vectors.any(axis=1)
+        weight_vector = np.array([weights.get(section, 0.0) for section in SECTIONS]) * asked
+        if weight_vector.sum() <= 0:
+            # No weighted section is in the job, compare the ones it has alike
+            weight_vector = asked.astype(float) if asked.any() else np.ones(len(SECTIONS))
+        similarities = np.einsum("nsd,sd->ns", vectors, job_vectors) @ weight_vector
+        similarities /= weight_vector.sum()
+        order = np.argsort(-similarities, kind="stable")
+        # Several analyses can share an original file name, keep the best one
+        shortlist = {}
+        for i in order:
+            if names[i] not in shortlist:
+                shortlist[names[i]] = float(similarities[i])
+                if len(shortlist) == top_k:
+                    break
+        return list(shortlist.items())
+
+
+candidate_index = CandidateIndex()
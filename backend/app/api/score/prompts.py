@@ -1,3 +1,10 @@
+import hashlib
+import json
+
+from app.api.prompt import compaction_settings
+
+from .config import score_config
+
 system_prompt_matching = """
 Scoring Guide:
 It's ok to say candidate does not match the requirement.
@@ -130,3 +137,12 @@ fn_matching_analysis = [
         },
     }
 ]
+
+# Changes whenever the prompt, the function schema or the compaction of the
+# payload changes, so cached scores produced by an older prompt are not served
+PROMPT_VERSION = hashlib.sha256(
+    json.dumps(
+        [system_prompt_matching, fn_matching_analysis, compaction_settings(score_config.MAX_INPUT_TOKENS)],
+        sort_keys=True,
+    ).encode()
+).hexdigest()[:16]
@@ -0,0 +1,73 @@
+from collections.abc import Mapping, Sequence
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+
+SECTIONS = (
+    "degree",
+    "experience",
+    "technical_skill",
+    "responsibility",
+    "certificate",
+    "soft_skill",
+)
+
+DEFAULT_WEIGHTS = {
+    "degree": 0.1,  # The importance of the candidate's degree
+    "experience": 0.2,  # The weight given to the candidate's relevant work experience
+    "technical_skill": 0.3,  # Weight for technical skills and qualifications
+    "responsibility": 0.25,  # How well the candidate's past responsibilities align with the job
+    "certificate": 0.1,  # The significance of relevant certifications
+    "soft_skill": 0.05,  # Importance of soft skills like communication, teamwork, etc.
+}
+
+
+def _section_score(value: Any) -> int | None:
+    """Integer score of one section, None when it is missing or not a number."""
+    if not isinstance(value, dict):
+        return None
+    try:
+        return int(value["score"])
+    except (KeyError, TypeError, ValueError, OverflowError):
+        return None
+
+
+def section_scores(score_result: dict[str, Any]) -> dict[str, int | None]:
+    """{section: score or None} of an LLM score result."""
+    return {section: _section_score(score_result.get(section)) for section in SECTIONS}
+
+
+def section_columns(score_result: dict[str, Any]) -> dict[str, int | None]:
+    """ScoreAnalysis column values, e.g. {"degree_score": 80, ...}."""
+    return {f"{section}_score": score for section, score in section_scores(score_result).items()}
+
+
+def score_matrix(rows: Sequence[Mapping[str, float | None]]) -> npt.NDArray[np.float64]:
+    """One row per candidate, one column per section, NaN where a section is missing."""
+    matrix = np.full((len(rows), len(SECTIONS)), np.nan)
+    for i, row in enumerate(rows):
+        for j, section in enumerate(SECTIONS):
+            if row.get(section) is not None:
+                matrix[i, j] = row[section]
+    return matrix
+
+
+def weighted_scores(
+    matrix: npt.NDArray[np.float64], weights: Mapping[str, float]
+) -> npt.NDArray[np.float64]:
+    """
+    Weighted mean of every row in one pass. Missing sections are left out
+    of both the sum and the total weight; rows without any score get NaN.
+    """
+    weight_vector = np.array([weights.get(section, 0.0) for section in SECTIONS])
+    present = ~np.isnan(matrix)
+    total_weight = present @ weight_vector
+    weighted = np.where(present, matrix, 0.0) @ weight_vector
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(total_weight > 0, weighted / total_weight, np.nan)
+
+
+def rank_order(scores: npt.NDArray[np.float64]) -> npt.NDArray[np.intp]:
+    """Indices from the best to the worst score, NaN last, ties in input order."""
+    return np.argsort(np.where(np.isnan(scores), np.inf, -scores), kind="stable")
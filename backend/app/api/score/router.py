@@ -1,9 +1,22 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Response
+from fastapi.concurrency import run_in_threadpool
 from . import service
-from .schemas import ScoreSchema
-from app.models import ScoreAnalysis, ScoreAnalysisPublic
-from app.api.deps import SessionDep
-import json
+from .cache import score_cache, score_cache_key
+from .config import score_config
+from .schemas import (
+    ScoreBatchItem,
+    ScoreBatchSchema,
+    ScoreRankingItem,
+    ScoreSchema,
+    ScoreShortlistItem,
+    ScoreWeightsSchema,
+)
+from app.models import Job, ScoreAnalysis, ScoreAnalysisPublic
+from sqlmodel import select
+from app.api.deps import AsyncSessionDep
+from app.core.db import run_sync, run_with_session
+from app.api.pagination import InvalidCursor
+import uuid
 
 # router = APIRouter()
 router = APIRouter(prefix="/score", tags=["score"])
@@ -14,55 +27,202 @@ router = APIRouter(prefix="/score", tags=["score"])
 
 # @router.post("/analyse", response_model=ResponseSchema)
 @router.post("/score_analyse")
-async def analyse_score(job_candidate_data: ScoreSchema, session: SessionDep = None):
-    result = service.analyse_score(job_candidate_data=job_candidate_data)
+async def analyse_score(job_candidate_data: ScoreSchema, session: AsyncSessionDep = None):
+    key = score_cache_key(job=job_candidate_data.job, candidate=job_candidate_data.candidate)
+    result = await run_sync(session, service.get_cached_score, key)
+    if result is not None:
+        return result
+    result = await service.analyse_score_async(job_candidate_data=job_candidate_data)
+    score_cache.set(key, result)
     return result
 
+@router.post("/score_analyse_batch", response_model=list[ScoreBatchItem])
+async def analyse_score_batch(batch: ScoreBatchSchema, session: AsyncSessionDep = None):
+    """
+    Score one job against many stored candidate analyses, store the results
+    and return them ranked by score (candidates that failed come last).
+    """
+    job, candidates = await run_sync(
+        session, service.load_batch_inputs, batch.job_id, batch.candidate_file_names
+    )
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if not job.analysis_result:
+        raise HTTPException(status_code=400, detail="Job has not been analysed yet")
+    job_analysis = job.analysis_result
+
+    skipped = []
+    if batch.top_k is not None and len(candidates) > batch.top_k:
+        # Embedding the texts blocks, it runs in the threadpool with a session of its own
+        shortlist = await run_in_threadpool(
+            run_with_session, service.shortlist_candidates, job, batch.top_k, list(candidates)
+        )
+        skipped = [name for name in candidates if name not in dict(shortlist)]
+        candidates = {name: candidates[name] for name, _ in shortlist}
+
+    keys = [
+        score_cache_key(job=job_analysis, candidate=candidate)
+        for candidate in candidates.values()
+    ]
+    cached = await run_sync(session, service.get_cached_scores, keys)
+    scored = await service.score_candidates(
+        job_analysis, candidates, cached, score_config.BATCH_CONCURRENCY
+    )
+    await run_sync(session, service.save_score_analyses, job.id, scored)
+
+    # Rank with the job's own section weights, not the defaults of the cached results
+    weighted = service.apply_weights(
+        {name: result for name, (_, result, _) in scored.items() if result is not None},
+        service.job_weights(job),
+    )
+    items = [
+        ScoreBatchItem(
+            candidate_file_name=name,
+            score=weighted[name]["score"] if result else None,
+            score_result=weighted.get(name),
+            error=error,
+        )
+        for name, (_, result, error) in scored.items()
+    ]
+    items += [
+        ScoreBatchItem(candidate_file_name=name, error="Candidate analysis not found")
+        for name in dict.fromkeys(batch.candidate_file_names)
+        if name not in candidates and name not in skipped
+    ]
+    items += [
+        ScoreBatchItem(candidate_file_name=name, error="Not in the embedding shortlist")
+        for name in skipped
+    ]
+    ranked = sorted(
+        [item for item in items if item.score is not None],
+        key=lambda item: item.score,
+        reverse=True,
+    )
+    for rank, item in enumerate(ranked, start=1):
+        item.rank = rank
+    return ranked + [item for item in items if item.score is None]
+
+@router.get("/cache_stats")
+async def get_score_cache_stats():
+    """
+    Hit/miss counters of the score cache in this worker.
+    """
+    return score_cache.stats()
+
+@router.get("/weights/{job_id}", response_model=ScoreWeightsSchema)
+async def get_score_weights(job_id: uuid.UUID, session: AsyncSessionDep = None):
+    """
+    Section weights used to rank the candidates of a job.
+    """
+    job = await session.get(Job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return service.job_weights(job)
+
+@router.put("/weights/{job_id}", response_model=list[ScoreRankingItem])
+async def update_score_weights(
+    job_id: uuid.UUID, weights: ScoreWeightsSchema, session: AsyncSessionDep = None
+):
+    """
+    Change the section weights of a job and return its candidates re-ranked
+    with them, from the stored scores only.
+    """
+    job = await session.get(Job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if sum(weights.model_dump().values()) <= 0:
+        raise HTTPException(status_code=400, detail="At least one weight must be positive")
+    job.score_weights = weights.model_dump()
+    session.add(job)
+    # The stored overall scores follow, so /score_analysis sorts the same way
+    await run_sync(session, service.reweigh_job_scores, job)
+    await session.commit()
+    return await run_sync(session, service.rank_job_candidates, job)
+
+@router.get("/shortlist/{job_id}", response_model=list[ScoreShortlistItem])
+async def get_score_shortlist(job_id: uuid.UUID, top_k: int = 20, session: AsyncSessionDep = None):
+    """
+    Stored candidates closest to a job by embedding similarity, no LLM calls.
+    Feed the result to /score/score_analyse_batch to score only the shortlist.
+    """
+    job = await session.get(Job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if not job.analysis_result:
+        raise HTTPException(status_code=400, detail="Job has not been analysed yet")
+    shortlist = await run_in_threadpool(run_with_session, service.shortlist_candidates, job, top_k)
+    return [
+        ScoreShortlistItem(candidate_file_name=name, similarity=similarity)
+        for name, similarity in shortlist
+    ]
+
+@router.get("/ranking/{job_id}", response_model=list[ScoreRankingItem])
+async def get_score_ranking(job_id: uuid.UUID, limit: int | None = None, session: AsyncSessionDep = None):
+    """
+    Stored candidates of a job ranked by the job's section weights, best first.
+    """
+    job = await session.get(Job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return await run_sync(session, service.rank_job_candidates, job, limit)
+
 @router.post("/save_score_analysis")
 async def save_score_analysis(
     job_id: str,
     candidate_file_name: str,
     score_result: dict,
-    session: SessionDep = None
+    session: AsyncSessionDep = None
 ):
     """
     Save score analysis result to the database.
     """
-    # Create new score analysis record
-    score_analysis = ScoreAnalysis(
-        job_id=job_id,
-        candidate_file_name=candidate_file_name,
-        score_result=json.dumps(score_result)
+    # Stored scores are sorted on in the database, they have to be numbers
+    score = score_result.get("score")
+    if score is not None and (isinstance(score, bool) or not isinstance(score, int | float)):
+        raise HTTPException(status_code=400, detail="score must be a number")
+    # Rescoring replaces the stored result of the pair
+    return await run_sync(
+        session, service.save_score_analysis, job_id, candidate_file_name, score_result
     )
-    session.add(score_analysis)
-    session.commit()
-    session.refresh(score_analysis)
-    
-    return score_analysis
 
 @router.get("/score_analysis/{job_id}", response_model=list[ScoreAnalysisPublic])
-async def get_score_analysis_by_job(job_id: str, session: SessionDep = None):
+async def get_score_analysis_by_job(
+    job_id: str,
+    response: Response,
+    limit: int | None = None,
+    cursor: str | None = None,
+    session: AsyncSessionDep = None,
+):
     """
-    Retrieve all score analysis results for a specific job.
+    Retrieve the score analysis results for a specific job, best score first.
+    With a limit, the cursor of the next page is in the X-Next-Cursor header.
     """
-    score_analyses = session.query(ScoreAnalysis).filter(
-        ScoreAnalysis.job_id == job_id
-    ).all()
-    
+    try:
+        score_analyses, next_cursor = await run_sync(
+            session, service.list_job_scores, job_id, limit, cursor
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return score_analyses
 
 @router.get("/score_analysis/{job_id}/{candidate_file_name}", response_model=ScoreAnalysisPublic)
 async def get_score_analysis_by_job_and_candidate(
     job_id: str, 
     candidate_file_name: str, 
-    session: SessionDep = None
+    session: AsyncSessionDep = None
 ):
     """
     Retrieve score analysis result for a specific job and candidate file.
     """
-    score_analysis = session.query(ScoreAnalysis).filter(
-        ScoreAnalysis.job_id == job_id,
-        ScoreAnalysis.candidate_file_name == candidate_file_name
+    score_analysis = (
+        await session.exec(
+            select(ScoreAnalysis).where(
+                ScoreAnalysis.job_id == job_id,
+                ScoreAnalysis.candidate_file_name == candidate_file_name,
+            )
+        )
     ).first()
     
     if not score_analysis:
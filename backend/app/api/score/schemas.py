@@ -1,4 +1,8 @@
-from pydantic import BaseModel
+import uuid
+
+from pydantic import BaseModel, Field
+
+from .ranking import DEFAULT_WEIGHTS
 
 
 class ScoreSchema(BaseModel):
@@ -13,3 +17,39 @@ class ResponseSchema(BaseModel):
     responsibility: list
     certificate: list
     soft_skill: list
+
+
+class ScoreBatchSchema(BaseModel):
+    job_id: uuid.UUID
+    candidate_file_names: list[str] = Field(min_length=1)
+    # Only LLM-score the top_k candidates of the embedding pre-filter
+    top_k: int | None = Field(default=None, ge=1)
+
+
+class ScoreBatchItem(BaseModel):
+    rank: int | None = None
+    candidate_file_name: str
+    score: float | None = None
+    score_result: dict | None = None
+    error: str | None = None
+
+
+class ScoreWeightsSchema(BaseModel):
+    degree: float = Field(default=DEFAULT_WEIGHTS["degree"], ge=0)
+    experience: float = Field(default=DEFAULT_WEIGHTS["experience"], ge=0)
+    technical_skill: float = Field(default=DEFAULT_WEIGHTS["technical_skill"], ge=0)
+    responsibility: float = Field(default=DEFAULT_WEIGHTS["responsibility"], ge=0)
+    certificate: float = Field(default=DEFAULT_WEIGHTS["certificate"], ge=0)
+    soft_skill: float = Field(default=DEFAULT_WEIGHTS["soft_skill"], ge=0)
+
+
+class ScoreRankingItem(BaseModel):
+    rank: int | None = None
+    candidate_file_name: str
+    score: float | None = None
+    section_scores: dict[str, int | None]
+
+
+class ScoreShortlistItem(BaseModel):
+    candidate_file_name: str
+    similarity: float
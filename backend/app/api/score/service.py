@@ -1,28 +1,43 @@
-import json
+import asyncio
 import time
-import os
+import uuid
 from pathlib import Path
+from typing import Any
 from dotenv import load_dotenv
 
-import jsbeautifier
-from langchain.schema import HumanMessage, SystemMessage
+import numpy as np
+from langchain.schema import BaseMessage, HumanMessage, SystemMessage
+from sqlalchemy import Float, cast
+from sqlalchemy.dialects.postgresql import insert
 from langchain_openai import ChatOpenAI
+from sqlmodel import Session, col, func, or_, select
+from .cache import score_cache, score_cache_key
 from .config import score_config
+from .embedding import candidate_index
+from .ranking import (
+    DEFAULT_WEIGHTS,
+    SECTIONS,
+    rank_order,
+    score_matrix,
+    section_columns,
+    section_scores,
+    weighted_scores,
+)
 from .prompts import fn_matching_analysis, system_prompt_matching
+from .schemas import ScoreSchema
+from app.api.llm import get_llm
+from app.api.output import output2json
+from app.api.pagination import paginate
+from app.api.prompt import compact_json, compact_prompt
 from app.api.utils import LOGGER
+from app.models import CandidateAnalysis, Job, ScoreAnalysis
 
 env_path = Path(__file__).parents[3] / '.env'
 load_dotenv(dotenv_path=env_path)
 
 
-def output2json(output):
-    """GPT Output Object >>> json"""
-    opts = jsbeautifier.default_options()
-    return json.loads(jsbeautifier.beautify(output["tool_calls"][0]["function"]["arguments"], opts))
-
-
-def generate_content(job, candidate):
-    content = "\nRequirement:" + str(job) + "\nCandidate:" + str(candidate)
+def generate_content(job: dict[str, Any], candidate: dict[str, Any]) -> str:
+    content = "\nRequirement:" + compact_json(job) + "\nCandidate:" + compact_json(candidate)
     return content
 
 
@@ -78,54 +93,376 @@ def generate_content(job, candidate):
 #     return json_output
 
 
-def analyse_score(job_candidate_data):
+def score_llm() -> ChatOpenAI:
+    return get_llm(score_config)
+
+
+def score_messages(job_candidate_data: ScoreSchema) -> list[BaseMessage]:
+    job, candidate = job_candidate_data.job, job_candidate_data.candidate
+    content = compact_prompt(
+        "score",
+        generate_content(job=job, candidate=candidate),
+        score_config.MAX_INPUT_TOKENS,
+        # What was sent before payloads were compacted
+        original="\nRequirement:" + str(job) + "\nCandidate:" + str(candidate),
+    )
+    return [
+        SystemMessage(content=system_prompt_matching),
+        HumanMessage(content=content),
+    ]
+
+
+def add_weighted_score(
+    json_output: dict[str, Any], weights: dict[str, float] | None = None
+) -> dict[str, Any]:
+    matrix = score_matrix([section_scores(json_output)])
+    json_output["score"] = float(weighted_scores(matrix, weights or DEFAULT_WEIGHTS)[0])
+    return json_output
+
+
+def analyse_score(job_candidate_data: ScoreSchema) -> dict[str, Any]:
     start = time.time()
     LOGGER.info("Start analyse matching")
-    
-    print("job_candidate_data.job!!!!!!!!!!!!!!:\n", job_candidate_data.job)
-    print("\njob_candidate_data.candidate!!!!!!!!!!!!!!:\n", job_candidate_data.candidate)
 
-    content = generate_content(job=job_candidate_data.job, candidate=job_candidate_data.candidate)
-
-    llm = ChatOpenAI(
-        openai_api_base=os.getenv("GROQ_API_BASE"),  # Groq endpoint
-        openai_api_key=os.getenv("OPENAI_API_KEY"),
-        model=score_config.MODEL_NAME,
-        temperature=0.5
-        )
+    llm = score_llm()
     completion = llm.predict_messages(
-        [
-            SystemMessage(content=system_prompt_matching),
-            HumanMessage(content=content),
-        ],
+        score_messages(job_candidate_data),
         functions=fn_matching_analysis,
     )
     output_analysis = completion.additional_kwargs
 
-    json_output = output2json(output=output_analysis)
+    json_output = add_weighted_score(output2json(output_analysis, fn_matching_analysis))
 
-    # Extract scores and store them in a list
-    weights = {
-        "degree": 0.1,  # The importance of the candidate's degree
-        "experience": 0.2,  # The weight given to the candidate's relevant work experience
-        "technical_skill": 0.3,  # Weight for technical skills and qualifications
-        "responsibility": 0.25,  # How well the candidate's past responsibilities align with the job
-        "certificate": 0.1,  # The significance of relevant certifications
-        "soft_skill": 0.05,  # Importance of soft skills like communication, teamwork, etc.
-    }
-    total_weight = 0
-    weighted_score = 0
+    LOGGER.info("Done analyse matching")
+    LOGGER.info(f"Time analyse matching: {time.time() - start}")
 
-    for section in json_output:
-        if section != "summary_comment":
-            weighted_score += int(json_output[section]["score"]) * weights[section]
-            total_weight += weights[section]
+    return json_output
 
-    final_score = weighted_score / total_weight
 
-    json_output["score"] = final_score
+async def analyse_score_async(job_candidate_data: ScoreSchema) -> dict[str, Any]:
+    """Same as analyse_score, but awaits the LLM instead of blocking the loop."""
+    start = time.time()
+    LOGGER.info("Start analyse matching")
+
+    llm = score_llm()
+    completion = await llm.ainvoke(
+        score_messages(job_candidate_data),
+        functions=fn_matching_analysis,
+    )
+    output_analysis = completion.additional_kwargs
+
+    json_output = add_weighted_score(output2json(output_analysis, fn_matching_analysis))
 
     LOGGER.info("Done analyse matching")
     LOGGER.info(f"Time analyse matching: {time.time() - start}")
 
-    return json_output
\ No newline at end of file
+    return json_output
+
+
+def get_cached_score(session: Session, key: str) -> Any:
+    """Score result for a cache key, from the LRU first and then the ScoreAnalysis table."""
+    result = score_cache.get(key)
+    if result is not None:
+        return result
+    statement = (
+        select(ScoreAnalysis.score_result)
+        .where(ScoreAnalysis.input_hash == key)
+        .order_by(col(ScoreAnalysis.created_at).desc())
+    )
+    result = session.exec(statement).first()
+    if result is None:
+        score_cache.record_miss()
+        return None
+    score_cache.record_db_hit()
+    score_cache.set(key, result)
+    return result
+
+
+def score_input_hash(session, job_id, candidate_file_name):
+    """
+    Cache key of a stored job/candidate pair, built from the same analysis
+    results the frontend sends to /score/score_analyse.
+    """
+    job = session.get(Job, uuid.UUID(str(job_id)))
+    candidate = session.exec(
+        select(CandidateAnalysis)
+        .where(
+            or_(
+                CandidateAnalysis.file_name == candidate_file_name,
+                CandidateAnalysis.original_file_name == candidate_file_name,
+            )
+        )
+        .order_by(CandidateAnalysis.created_at.desc())
+    ).first()
+    if not job or not job.analysis_result or not candidate:
+        return None
+    return score_cache_key(
+        job=job.analysis_result,
+        candidate=candidate.analysis_result,
+    )
+
+
+def load_batch_inputs(session, job_id, candidate_file_names):
+    """Job and candidate analyses of a batch in two queries, keyed by the requested names."""
+    job = session.get(Job, job_id)
+    requested = set(candidate_file_names)
+    rows = session.exec(
+        select(CandidateAnalysis)
+        .where(
+            or_(
+                CandidateAnalysis.file_name.in_(requested),
+                CandidateAnalysis.original_file_name.in_(requested),
+            )
+        )
+        .order_by(CandidateAnalysis.created_at)
+    ).all()
+    # Rows are oldest first, so the latest analysis of a name wins
+    candidates = {}
+    for row in rows:
+        for name in (row.file_name, row.original_file_name):
+            if name in requested:
+                candidates[name] = row.analysis_result
+    return job, candidates
+
+
+def get_cached_scores(session, keys):
+    """Bulk variant of get_cached_score: {key: score_result} for every key already scored."""
+    found = {}
+    missing = []
+    for key in keys:
+        result = score_cache.get(key)
+        if result is not None:
+            found[key] = result
+        else:
+            missing.append(key)
+    if missing:
+        rows = session.exec(
+            select(ScoreAnalysis.input_hash, ScoreAnalysis.score_result)
+            .where(ScoreAnalysis.input_hash.in_(missing))
+            .order_by(ScoreAnalysis.created_at)
+        ).all()
+        for key, score_result in rows:
+            found[key] = score_result
+        for key in missing:
+            if key in found:
+                score_cache.record_db_hit()
+                score_cache.set(key, found[key])
+            else:
+                score_cache.record_miss()
+    return found
+
+
+async def score_candidates(job, candidates, cached, concurrency):
+    """
+    Score one job against many candidates, at most `concurrency` LLM calls at a time.
+    Returns {candidate_file_name: (input_hash, score_result or None, error or None)}.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def score_one(name, candidate):
+        key = score_cache_key(job=job, candidate=candidate)
+        if key in cached:
+            return name, (key, cached[key], None)
+        async with semaphore:
+            try:
+                result = await analyse_score_async(ScoreSchema(job=job, candidate=candidate))
+            except Exception as e:
+                LOGGER.error(f"Error scoring {name}: {str(e)}")
+                return name, (key, None, str(e))
+        score_cache.set(key, result)
+        return name, (key, result, None)
+
+    scored = await asyncio.gather(
+        *[score_one(name, candidate) for name, candidate in candidates.items()]
+    )
+    return dict(scored)
+
+
+# Columns an upsert overwrites; the row keeps its id and created_at
+_UPSERT_COLUMNS = (
+    "score_result",
+    "input_hash",
+    *(f"{section}_score" for section in SECTIONS),
+    "updated_at",
+)
+
+
+def upsert_score_analyses(session, records):
+    """
+    INSERT ... ON CONFLICT (job_id, candidate_file_name) DO UPDATE of
+    ScoreAnalysis records, in one statement: rescoring a candidate for a
+    job replaces its result. Returns the stored rows; the caller commits.
+    """
+    # One statement cannot update a row twice, the last record of a pair wins
+    rows = {
+        (record.job_id, record.candidate_file_name): record.model_dump() for record in records
+    }
+    if not rows:
+        return []
+    statement = insert(ScoreAnalysis).values(list(rows.values()))
+    statement = statement.on_conflict_do_update(
+        constraint="uq_scoreanalysis_job_id_candidate_file_name",
+        set_={column: statement.excluded[column] for column in _UPSERT_COLUMNS},
+    ).returning(ScoreAnalysis)
+    return session.scalars(statement, execution_options={"populate_existing": True}).all()
+
+
+def score_analysis_record(job_id, candidate_file_name, score_result, input_hash=None):
+    return ScoreAnalysis(
+        job_id=uuid.UUID(str(job_id)),
+        candidate_file_name=candidate_file_name,
+        score_result=score_result,
+        input_hash=input_hash,
+        **section_columns(score_result),
+    )
+
+
+def save_score_analysis(session, job_id, candidate_file_name, score_result):
+    """
+    Store the score of one job and candidate pair, replacing a previous one,
+    and commit. Returns the stored row.
+    """
+    input_hash = score_input_hash(session, job_id, candidate_file_name)
+    # The result comes from the client: it answers later cache lookups only
+    # when it is the one this server computed for the same inputs
+    if input_hash is not None and score_cache.peek(input_hash) != score_result:
+        input_hash = None
+    (score_result,) = apply_weights({0: score_result}, stored_weights(session, job_id)).values()
+    (score_analysis,) = upsert_score_analyses(
+        session,
+        [score_analysis_record(job_id, candidate_file_name, score_result, input_hash)],
+    )
+    session.commit()
+    session.refresh(score_analysis)
+    return score_analysis
+
+
+def save_score_analyses(session, job_id, scored):
+    """Upsert the successful results of a batch in a single statement and commit."""
+    weighted = apply_weights(
+        {name: result for name, (_, result, _) in scored.items() if result is not None},
+        stored_weights(session, job_id),
+    )
+    upsert_score_analyses(
+        session,
+        [
+            score_analysis_record(job_id, name, weighted[name], key)
+            for name, (key, result, error) in scored.items()
+            if result is not None
+        ],
+    )
+    session.commit()
+
+
+def job_weights(job):
+    """Section weights of a job, the defaults unless the user changed them."""
+    if job.score_weights:
+        return {**DEFAULT_WEIGHTS, **job.score_weights}
+    return dict(DEFAULT_WEIGHTS)
+
+
+def stored_weights(session, job_id):
+    """
+    Weights the stored "score" of a job's results is computed with, so
+    sorting the rows by it agrees with rank_job_candidates.
+    """
+    job = session.get(Job, uuid.UUID(str(job_id)))
+    return job_weights(job) if job else dict(DEFAULT_WEIGHTS)
+
+
+def reweigh_job_scores(session, job):
+    """
+    Recompute the stored "score" of every result of a job after its weights
+    changed. The caller commits.
+    """
+    rows = session.exec(select(ScoreAnalysis).where(ScoreAnalysis.job_id == job.id)).all()
+    weighted = apply_weights({row.id: row.score_result for row in rows}, job_weights(job))
+    for row in rows:
+        row.score_result = weighted[row.id]
+        session.add(row)
+
+
+def apply_weights(results, weights):
+    """
+    Copies of {name: score_result} with "score" recomputed from weights in
+    one pass. Results without section scores keep their own score.
+    """
+    names = list(results)
+    matrix = score_matrix([section_scores(results[name]) for name in names])
+    scores = weighted_scores(matrix, weights)
+    return {
+        name: {**results[name], "score": float(score)} if not np.isnan(score) else results[name]
+        for name, score in zip(names, scores, strict=True)
+    }
+
+
+def load_job_scores(session, job_id):
+    """
+    Names and section score matrix of the latest ScoreAnalysis of every
+    candidate of a job, read from the numeric columns. Rows stored before
+    those columns existed are filled in from their score_result.
+    """
+    columns = [getattr(ScoreAnalysis, f"{section}_score") for section in SECTIONS]
+    rows = session.exec(
+        select(ScoreAnalysis.candidate_file_name, ScoreAnalysis.score_result, *columns)
+        .where(ScoreAnalysis.job_id == job_id)
+        .order_by(ScoreAnalysis.created_at)
+    ).all()
+    # Rows are oldest first, so the latest score of a candidate wins
+    latest = {}
+    for name, score_result, *scores in rows:
+        if all(score is None for score in scores):
+            latest[name] = section_scores(score_result)
+        else:
+            latest[name] = dict(zip(SECTIONS, scores, strict=True))
+    return list(latest), score_matrix(list(latest.values()))
+
+
+# Overall score of a stored result for sorting, -1 (below any score) when missing
+SCORE_KEY = func.coalesce(
+    cast(ScoreAnalysis.score_result["score"].astext, Float), -1.0, type_=Float
+)
+
+
+def list_job_scores(session, job_id, limit=None, cursor=None):
+    """
+    ScoreAnalysis rows of a job, best score first, and the cursor of the
+    next page. Without a limit every row is returned.
+    """
+    statement = select(ScoreAnalysis).where(ScoreAnalysis.job_id == job_id)
+    keys = [SCORE_KEY, ScoreAnalysis.id]
+    if limit is None:
+        rows = session.exec(statement.order_by(*(key.desc() for key in keys))).all()
+        return rows, None
+    return paginate(session, statement, keys, limit, cursor)
+
+
+def rank_job_candidates(session, job, limit=None):
+    """Stored candidates of a job ranked by the job's weights, without calling the LLM."""
+    names, matrix = load_job_scores(session, job.id)
+    scores = weighted_scores(matrix, job_weights(job))
+    order = rank_order(scores)
+    if limit is not None:
+        order = order[:limit]
+    return [
+        {
+            "rank": rank if not np.isnan(scores[i]) else None,
+            "candidate_file_name": names[i],
+            "score": None if np.isnan(scores[i]) else float(scores[i]),
+            "section_scores": {
+                section: None if np.isnan(matrix[i, j]) else int(matrix[i, j])
+                for j, section in enumerate(SECTIONS)
+            },
+        }
+        for rank, i in enumerate(order, start=1)
+    ]
+
+
+def shortlist_candidates(session, job, top_k, file_names=None):
+    """
+    [(candidate_file_name, similarity)] of the top_k candidates closest to a
+    job by section embeddings, to spend LLM scoring on the shortlist only.
+    """
+    return candidate_index.search(
+        session, job.analysis_result, job_weights(job), top_k, file_names
+    )
@@ -0,0 +1,14 @@
+from pydantic_settings import BaseSettings
+
+
+class TaskConfig(BaseSettings):
+    # Worker threads per API process, 0 disables the local worker pool
+    TASK_WORKERS: int = 2
+    # Seconds an idle worker waits before polling the task table again
+    TASK_POLL_INTERVAL: float = 2.0
+    # Seconds a running task may take before another worker picks it up again
+    TASK_LEASE_SECONDS: int = 600
+    TASK_MAX_ATTEMPTS: int = 3
+
+
+task_config = TaskConfig()
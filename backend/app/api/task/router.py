@@ -0,0 +1,101 @@
+import json
+import uuid
+from typing import Any
+
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+
+from app.api.candidate import service as candidate_service
+from app.api.candidate.config import candidate_config
+from app.api.deps import SessionDep
+from app.api.score.schemas import ScoreSchema
+from app.api.upload import MAX_BODY_SIZE_KEY, UploadLimitRoute
+from app.models import AnalysisTaskPublic, JobAnalyzeRequest
+
+from . import service
+
+router = APIRouter(prefix="/tasks", tags=["tasks"], route_class=UploadLimitRoute)
+
+
+def require_workers() -> None:
+    """Refuse to queue tasks that no worker of this deployment would run."""
+    if not service.workers_enabled():
+        raise HTTPException(
+            status_code=503,
+            detail="Queued analyses are not available in this deployment, use the direct analysis endpoints",
+        )
+
+
+@router.post("/job", response_model=AnalysisTaskPublic, dependencies=[Depends(require_workers)])
+def enqueue_job_analysis(session: SessionDep, job_data: JobAnalyzeRequest) -> Any:
+    """
+    Queue a job description analysis; the result is also saved to the job.
+    """
+    payload = job_data.model_dump(mode="json")
+    return service.enqueue_task(session, "job", payload)
+
+
+@router.post(
+    "/candidate",
+    response_model=AnalysisTaskPublic,
+    dependencies=[Depends(require_workers)],
+    openapi_extra={
+        MAX_BODY_SIZE_KEY: candidate_config.MAX_CV_SIZE + candidate_config.MULTIPART_OVERHEAD
+    },
+)
+def enqueue_candidate_analysis(session: SessionDep, file: UploadFile = File(...)) -> Any:
+    """
+    Save a CV file and queue its analysis. Already analysed files complete immediately.
+    """
+    temp_path, file_hash = candidate_service.write_cv_upload(file)
+    file_name = candidate_service.new_cv_file_name(file.filename)
+
+    cached, stored_file_name = candidate_service.resolve_cv_upload(
+        session, temp_path, file_hash, file_name
+    )
+    if cached:
+        result = cached.analysis_result
+        payload: dict[str, Any] = {"file_name": cached.file_name, "file_hash": file_hash}
+        return service.enqueue_task(session, "candidate", payload, result)
+
+    payload = {
+        "file_name": file_name,
+        "stored_file_name": stored_file_name,
+        "original_file_name": file.filename,
+        "file_hash": file_hash,
+    }
+    return service.enqueue_task(session, "candidate", payload)
+
+
+@router.post("/score", response_model=AnalysisTaskPublic, dependencies=[Depends(require_workers)])
+def enqueue_score_analysis(session: SessionDep, job_candidate_data: ScoreSchema) -> Any:
+    """
+    Queue scoring of a candidate against a job.
+    """
+    payload = job_candidate_data.model_dump(mode="json")
+    return service.enqueue_task(session, "score", payload)
+
+
+@router.get("/{task_id}", response_model=AnalysisTaskPublic)
+def read_task(task_id: uuid.UUID, session: SessionDep) -> Any:
+    """
+    Get the status of a queued analysis.
+    """
+    task = service.get_task(session, task_id)
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return task
+
+
+@router.get("/{task_id}/result")
+def read_task_result(task_id: uuid.UUID, session: SessionDep) -> Any:
+    """
+    Get the result of a finished analysis.
+    """
+    task = service.get_task(session, task_id)
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    if task.status == service.FAILED:
+        raise HTTPException(status_code=400, detail=f"Task failed: {task.error}")
+    if task.status != service.SUCCEEDED:
+        raise HTTPException(status_code=409, detail="Task is not finished yet")
+    return json.loads(task.result) if task.result is not None else None
@@ -0,0 +1,205 @@
+import json
+import threading
+import uuid
+from collections.abc import Callable
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlmodel import Session, and_, col, or_, select
+
+from app.api.candidate import service as candidate_service
+from app.api.job import service as job_service
+from app.api.score import service as score_service
+from app.api.score.cache import score_cache, score_cache_key
+from app.api.score.schemas import ScoreSchema
+from app.api.utils import LOGGER
+from app.core.config import settings
+from app.core.db import open_session
+from app.models import AnalysisTask, Job, JobAnalyzeRequest
+
+from .config import task_config
+
+PENDING = "pending"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+def run_job_task(session: Session, payload: dict[str, Any]) -> Any:
+    job_data = JobAnalyzeRequest(**payload)
+    result = job_service.analyse_job(job_data=job_data)
+    job = session.get(Job, job_data.id) if job_data.id else None
+    if job:
+        job.analysis_result = result
+        session.add(job)
+        session.commit()
+    return result
+
+
+def run_candidate_task(session: Session, payload: dict[str, Any]) -> Any:
+    cv_content = candidate_service.read_cv_candidate(
+        file_name=payload["stored_file_name"], file_hash=payload["file_hash"]
+    )
+    result = candidate_service.analyse_candidate(cv_content=cv_content)
+    candidate_service.save_candidate_analysis(
+        session,
+        payload["file_name"],
+        payload["original_file_name"],
+        result,
+        payload["file_hash"],
+    )
+    return result
+
+
+def run_score_task(session: Session, payload: dict[str, Any]) -> Any:
+    key = score_cache_key(job=payload["job"], candidate=payload["candidate"])
+    result = score_service.get_cached_score(session, key)
+    if result is None:
+        result = score_service.analyse_score(job_candidate_data=ScoreSchema(**payload))
+        score_cache.set(key, result)
+    return result
+
+
+TASK_HANDLERS: dict[str, Callable[[Session, dict[str, Any]], Any]] = {
+    "job": run_job_task,
+    "candidate": run_candidate_task,
+    "score": run_score_task,
+}
+
+
+def enqueue_task(
+    session: Session, kind: str, payload: dict[str, Any], result: Any = None
+) -> AnalysisTask:
+    """
+    Persist a task and wake the local workers. Passing a result stores the
+    task as already succeeded (e.g. on a cache hit).
+    """
+    task = AnalysisTask(kind=kind, payload=json.dumps(payload))
+    if result is not None:
+        task.status = SUCCEEDED
+        task.result = json.dumps(result)
+    session.add(task)
+    session.commit()
+    session.refresh(task)
+    if result is None:
+        worker_pool.notify()
+    return task
+
+
+def claim_task(session: Session) -> AnalysisTask | None:
+    """
+    Mark the oldest runnable task as running and return it. Running tasks
+    whose lease expired (their worker died) are runnable again.
+    """
+    now = datetime.utcnow()
+    statement = (
+        select(AnalysisTask)
+        .where(
+            or_(
+                AnalysisTask.status == PENDING,
+                and_(
+                    AnalysisTask.status == RUNNING,
+                    col(AnalysisTask.lease_expires_at) < now,
+                ),
+            )
+        )
+        .order_by(col(AnalysisTask.created_at))
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    task = session.exec(statement).first()
+    if not task:
+        session.rollback()
+        return None
+    task.status = RUNNING
+    task.attempts += 1
+    task.lease_expires_at = now + timedelta(seconds=task_config.TASK_LEASE_SECONDS)
+    task.updated_at = now
+    session.add(task)
+    session.commit()
+    session.refresh(task)
+    return task
+
+
+def run_task(session: Session, task: AnalysisTask) -> None:
+    try:
+        result = TASK_HANDLERS[task.kind](session, json.loads(task.payload))
+    except Exception as e:
+        session.rollback()
+        LOGGER.error(f"Task {task.id} ({task.kind}) failed: {str(e)}")
+        task.error = str(e)
+        task.status = PENDING if task.attempts < task_config.TASK_MAX_ATTEMPTS else FAILED
+    else:
+        task.result = json.dumps(result)
+        task.error = None
+        task.status = SUCCEEDED
+    task.lease_expires_at = None
+    task.updated_at = datetime.utcnow()
+    session.add(task)
+    session.commit()
+
+
+def run_next_task() -> bool:
+    """Claim and run one task. Returns False when the queue is empty."""
+    with open_session() as session:
+        task = claim_task(session)
+        if not task:
+            return False
+        LOGGER.info(f"Running task {task.id} ({task.kind}), attempt {task.attempts}")
+        run_task(session, task)
+        return True
+
+
+class TaskWorkerPool:
+    """Local threads draining the task table until stopped."""
+
+    def __init__(self, workers: int) -> None:
+        self.workers = workers
+        self._threads: list[threading.Thread] = []
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+
+    def start(self) -> None:
+        self._stop.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._work, name=f"analysis-task-{i}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float | None = None) -> None:
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def notify(self) -> None:
+        self._wakeup.set()
+
+    def _work(self) -> None:
+        while not self._stop.is_set():
+            try:
+                ran = run_next_task()
+            except Exception as e:
+                LOGGER.error(f"Task worker error: {str(e)}")
+                ran = False
+            if not ran:
+                self._wakeup.wait(task_config.TASK_POLL_INTERVAL)
+                self._wakeup.clear()
+
+
+worker_pool = TaskWorkerPool(workers=task_config.TASK_WORKERS)
+
+
+def workers_enabled() -> bool:
+    """
+    Whether this deployment runs the worker pool. A serverless instance is
+    frozen between invocations, so nothing there would claim a queued task.
+    """
+    return settings.DEPLOYMENT_MODE == "server"
+
+
+def get_task(session: Session, task_id: uuid.UUID) -> AnalysisTask | None:
+    return session.get(AnalysisTask, task_id)
@@ -0,0 +1,57 @@
+from collections.abc import Callable, Coroutine
+from typing import Any
+
+from fastapi import HTTPException, Request
+from fastapi.routing import APIRoute
+from starlette.responses import Response
+from starlette.types import Message, Receive
+
+# Set on a route as openapi_extra={MAX_BODY_SIZE_KEY: n} to cap its request body
+MAX_BODY_SIZE_KEY = "x-max-body-size"
+
+
+def body_too_large(max_body_size: int) -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"Request body exceeds the limit of {max_body_size} bytes",
+    )
+
+
+class UploadLimitRoute(APIRoute):
+    """
+    Caps the request body of routes declaring x-max-body-size: a larger
+    Content-Length is rejected before FastAPI starts parsing the multipart
+    body, and the body is counted as it is received, so a chunked upload
+    without Content-Length stops at the limit instead of being spooled whole.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        original_route_handler = super().get_route_handler()
+        max_body_size: int | None = (self.openapi_extra or {}).get(MAX_BODY_SIZE_KEY)
+        if max_body_size is None:
+            return original_route_handler
+
+        async def route_handler(request: Request) -> Response:
+            content_length = request.headers.get("content-length")
+            if (
+                content_length is not None
+                and content_length.isdigit()
+                and int(content_length) > max_body_size
+            ):
+                raise body_too_large(max_body_size)
+
+            received = 0
+            receive: Receive = request.receive
+
+            async def limited_receive() -> Message:
+                nonlocal received
+                message = await receive()
+                if message["type"] == "http.request":
+                    received += len(message.get("body", b""))
+                    if received > max_body_size:
+                        raise body_too_large(max_body_size)
+                return message
+
+            return await original_route_handler(Request(request.scope, limited_receive))
+
+        return route_handler
@@ -69,6 +69,32 @@ class Settings(BaseSettings):
     #         path=self.POSTGRES_DB,
     #     )
       
+    # server: a connection pool per worker (Dockerfile). serverless: no pooled
+    # connections between invocations (vercel.json), set it in the Vercel project
+    DEPLOYMENT_MODE: Literal["server", "serverless"] = "server"
+
+    # Connection pool of each worker; the Dockerfile runs 4 workers against the Neon pooler
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    # Seconds to wait for a free connection before failing the request
+    DB_POOL_TIMEOUT: float = 30
+    # Reconnect connections older than this, before the server side drops them
+    DB_POOL_RECYCLE: int = 300
+    # Test connections on checkout, so a dropped one is replaced instead of failing a query
+    DB_POOL_PRE_PING: bool = True
+
+    # Seconds a verified token keeps authenticating without reading its user.
+    # Changes made through this worker invalidate it at once, others within this.
+    PRINCIPAL_CACHE_TTL: float = 60
+    PRINCIPAL_CACHE_SIZE: int = 10000
+
+    # bcrypt cost of new hashes; a stored hash of another cost is replaced at login
+    PASSWORD_BCRYPT_ROUNDS: int = 12
+    # Threads hashing passwords, apart from the threadpool of the sync routes
+    PASSWORD_HASH_WORKERS: int = 2
+    # Hashes queued or running before more are refused with a 503
+    PASSWORD_HASH_MAX_PENDING: int = 64
+
     SMTP_TLS: bool = True
     SMTP_SSL: bool = False
     SMTP_PORT: int = 587
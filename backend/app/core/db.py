@@ -1,10 +1,156 @@
+import threading
+from collections.abc import AsyncIterator, Callable, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Literal, TypeVar
+
+from sqlalchemy import URL, Engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from sqlmodel import Session, create_engine, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app import crud
 from app.core.config import settings
+from app.core.pool import (
+    MeteredAsyncAdaptedQueuePool,
+    MeteredNullPool,
+    MeteredQueuePool,
+    async_pool_metrics,
+    pool_metrics,
+)
 from app.models import User, UserCreate
 
-engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+T = TypeVar("T")
+DeploymentMode = Literal["server", "serverless"]
+
+
+def engine_options(
+    mode: DeploymentMode | None = None, is_async: bool = False
+) -> dict[str, Any]:
+    """
+    create_engine arguments of a deployment mode. A server keeps a pool of
+    connections per worker. A serverless instance keeps none between
+    invocations: it can be frozen or dropped at any time, holding whatever
+    it has open, and the external pooler (the Neon -pooler host) already
+    reuses the server side connections.
+    """
+    if (mode or settings.DEPLOYMENT_MODE) == "serverless":
+        return {"poolclass": MeteredNullPool}
+    return {
+        "poolclass": MeteredAsyncAdaptedQueuePool if is_async else MeteredQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def async_database_uri(uri: str) -> URL:
+    """The same database through psycopg 3, whose connections are asyncio native."""
+    return make_url(uri).set(drivername="postgresql+psycopg")
+
+
+_engines_lock = threading.Lock()
+_engine: Engine | None = None
+_async_engine: AsyncEngine | None = None
+
+
+def get_engine() -> Engine:
+    """
+    The sync engine of this process, created on first use, so a cold start
+    that never reaches the database does not import its driver.
+    """
+    global _engine
+    if _engine is None:
+        with _engines_lock:
+            if _engine is None:
+                engine = create_engine(
+                    str(settings.SQLALCHEMY_DATABASE_URI), **engine_options()
+                )
+                pool_metrics.install(engine)
+                _engine = engine
+    return _engine
+
+
+def get_async_engine() -> AsyncEngine:
+    """
+    The engine of async routes, so their queries do not block the event
+    loop; created on first use too.
+    """
+    global _async_engine
+    if _async_engine is None:
+        with _engines_lock:
+            if _async_engine is None:
+                engine = create_async_engine(
+                    async_database_uri(str(settings.SQLALCHEMY_DATABASE_URI)),
+                    **engine_options(is_async=True),
+                )
+                async_pool_metrics.install(engine.sync_engine)
+                _async_engine = engine
+    return _async_engine
+
+
+async def dispose_engines() -> None:
+    """Close the connections of the engines created so far."""
+    global _engine, _async_engine
+    with _engines_lock:
+        engine, async_engine = _engine, _async_engine
+        _engine = _async_engine = None
+    if engine is not None:
+        engine.dispose()
+    if async_engine is not None:
+        await async_engine.dispose()
+
+
+@contextmanager
+def open_session(
+    engine: Engine | None = None, mode: DeploymentMode | None = None
+) -> Iterator[Session]:
+    """
+    A sync Session. Serverless, it holds one connection until it is closed,
+    so its commits within an invocation do not each open a new one.
+    """
+    engine = engine or get_engine()
+    if (mode or settings.DEPLOYMENT_MODE) == "serverless":
+        with engine.connect() as connection, Session(bind=connection) as session:
+            yield session
+    else:
+        with Session(engine) as session:
+            yield session
+
+
+@asynccontextmanager
+async def open_async_session(
+    engine: AsyncEngine | None = None, mode: DeploymentMode | None = None
+) -> AsyncIterator[AsyncSession]:
+    """AsyncSession counterpart of open_session."""
+    engine = engine or get_async_engine()
+    # Attributes stay loaded after commit, lazy loading is not available in async code
+    if (mode or settings.DEPLOYMENT_MODE) == "serverless":
+        async with engine.connect() as connection:
+            async with AsyncSession(bind=connection, expire_on_commit=False) as session:
+                yield session
+    else:
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            yield session
+
+
+def run_with_session(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    fn(session, *args, **kwargs) with a sync Session of its own, for
+    blocking work an async route hands to the threadpool.
+    """
+    with open_session() as session:
+        return fn(session, *args, **kwargs)
+
+
+async def run_sync(session: AsyncSession, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    session.run_sync for functions taking sqlmodel's Session, which is what
+    AsyncSession passes them; run_sync itself is typed for sqlalchemy's.
+    """
+    return await session.run_sync(fn, *args, **kwargs)
 
 
 # make sure all SQLModel models are imported (app.models) before initializing DB
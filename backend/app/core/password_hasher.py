@@ -0,0 +1,116 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, ParamSpec, TypeVar
+
+from app.core.config import settings
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+# Queue waits kept for the percentiles
+WAIT_SAMPLES = 1000
+
+
+class PasswordHasherBusy(RuntimeError):
+    """More hashes are queued or running than the hasher accepts."""
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a few threads of its own, so a burst of logins queues here
+    instead of occupying the threadpool every sync route shares. At most
+    max_pending hashes are queued or running, the next ones are refused.
+    Counts queue waits and hashing time.
+    """
+
+    def __init__(self, workers: int, max_pending: int) -> None:
+        self.workers = workers
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._executor: ThreadPoolExecutor | None = None
+        self.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._counts = dict.fromkeys(("submitted", "completed", "rejected"), 0)
+            self._pending = 0
+            self._max_pending_seen = 0
+            self._waits: deque[float] = deque(maxlen=WAIT_SAMPLES)
+            self._run_total = 0.0
+
+    def submit(self, fn: Callable[P, T], *args: P.args, **kwargs: P.kwargs) -> Future[T]:
+        """concurrent.futures.Future of fn(*args, **kwargs) on a hashing thread."""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._counts["rejected"] += 1
+                raise PasswordHasherBusy("Too many password hashes pending")
+            self._pending += 1
+            self._max_pending_seen = max(self._max_pending_seen, self._pending)
+            self._counts["submitted"] += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="password-hasher"
+                )
+            executor = self._executor
+        queued_at = time.perf_counter()
+
+        def task() -> T:
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                finished = time.perf_counter()
+                with self._lock:
+                    self._pending -= 1
+                    self._counts["completed"] += 1
+                    self._waits.append(started - queued_at)
+                    self._run_total += finished - started
+
+        return executor.submit(task)
+
+    def run(self, fn: Callable[P, T], *args: P.args, **kwargs: P.kwargs) -> T:
+        """fn(*args, **kwargs) on a hashing thread, blocking the caller until it is done."""
+        return self.submit(fn, *args, **kwargs).result()
+
+    async def run_async(self, fn: Callable[P, T], *args: P.args, **kwargs: P.kwargs) -> T:
+        """fn(*args, **kwargs) on a hashing thread, without holding a thread while waiting."""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            waits = sorted(self._waits)
+            completed = self._counts["completed"]
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                **self._counts,
+                "pending": self._pending,
+                "max_pending_seen": self._max_pending_seen,
+                "wait_ms": {
+                    "p50": 1000 * _percentile(waits, 0.50),
+                    "p95": 1000 * _percentile(waits, 0.95),
+                    "max": 1000 * waits[-1] if waits else 0.0,
+                },
+                "run_ms_mean": 1000 * self._run_total / completed if completed else 0.0,
+            }
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS, max_pending=settings.PASSWORD_HASH_MAX_PENDING
+)
@@ -0,0 +1,134 @@
+import os
+import threading
+import time
+from collections import deque
+from typing import Any
+
+from sqlalchemy import Engine, event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import (
+    AsyncAdaptedQueuePool,
+    NullPool,
+    Pool,
+    PoolProxiedConnection,
+    QueuePool,
+)
+
+# Checkout latencies kept for the percentiles
+LATENCY_SAMPLES = 1000
+
+
+class PoolMetrics:
+    """
+    Counters of one engine's connection pool in this worker: checkout
+    latency (waiting for a free connection, pre-ping and connecting
+    included), connections in use and connection churn.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._pool: Pool | None = None
+        self.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._counts = dict.fromkeys(
+                ("checkouts", "checkins", "timeouts", "connects", "closes", "invalidations"), 0
+            )
+            self._latencies: deque[float] = deque(maxlen=LATENCY_SAMPLES)
+            self._latency_total = 0.0
+            self._latency_max = 0.0
+            self._max_checked_out = 0
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            self._counts[name] += 1
+
+    def record_checkout(self, seconds: float) -> None:
+        with self._lock:
+            self._counts["checkouts"] += 1
+            self._latencies.append(seconds)
+            self._latency_total += seconds
+            self._latency_max = max(self._latency_max, seconds)
+            # Counted from the events, a NullPool keeps no count of its own
+            checked_out = self._counts["checkouts"] - self._counts["checkins"]
+            self._max_checked_out = max(self._max_checked_out, checked_out)
+
+    def install(self, engine: Engine) -> None:
+        """Listen to the pool events of a sync engine, whose pool should be a metered one."""
+        self._pool = engine.pool
+        if isinstance(engine.pool, _MeteredPool):
+            engine.pool.metrics = self
+        event.listen(engine, "connect", lambda *args: self.count("connects"))
+        event.listen(engine, "close", lambda *args: self.count("closes"))
+        event.listen(engine, "close_detached", lambda *args: self.count("closes"))
+        event.listen(engine, "invalidate", lambda *args: self.count("invalidations"))
+        event.listen(engine, "soft_invalidate", lambda *args: self.count("invalidations"))
+        event.listen(engine, "checkin", lambda *args: self.count("checkins"))
+
+    def stats(self) -> dict[str, Any]:
+        pool = self._pool
+        with self._lock:
+            latencies = sorted(self._latencies)
+            checkouts = self._counts["checkouts"]
+            stats: dict[str, Any] = {
+                "pid": os.getpid(),
+                **self._counts,
+                "max_checked_out": self._max_checked_out,
+                "checkout_ms": {
+                    "mean": 1000 * self._latency_total / checkouts if checkouts else 0.0,
+                    "p50": 1000 * _percentile(latencies, 0.50),
+                    "p95": 1000 * _percentile(latencies, 0.95),
+                    "p99": 1000 * _percentile(latencies, 0.99),
+                    "max": 1000 * self._latency_max,
+                },
+            }
+        if isinstance(pool, QueuePool):
+            stats["pool"] = {
+                "size": pool.size(),
+                "max_overflow": pool._max_overflow,
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": max(pool.overflow(), 0),
+            }
+        return stats
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+class _MeteredPool(Pool):
+    """Times each checkout as seen by the caller, for PoolMetrics."""
+
+    metrics: PoolMetrics | None = None
+
+    def connect(self) -> PoolProxiedConnection:
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            if self.metrics:
+                self.metrics.count("timeouts")
+            raise
+        if self.metrics:
+            self.metrics.record_checkout(time.perf_counter() - start)
+        return connection
+
+
+class MeteredQueuePool(_MeteredPool, QueuePool):
+    pass
+
+
+class MeteredAsyncAdaptedQueuePool(_MeteredPool, AsyncAdaptedQueuePool):
+    pass
+
+
+class MeteredNullPool(_MeteredPool, NullPool):
+    pass
+
+
+pool_metrics = PoolMetrics()
+async_pool_metrics = PoolMetrics()
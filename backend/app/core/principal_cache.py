@@ -0,0 +1,92 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any
+
+from app.core.config import settings
+from app.models import User
+
+
+class PrincipalCache:
+    """
+    Thread-safe LRU of verified access tokens to the user they authenticate,
+    each entry kept until the TTL or the token's own expiry, whichever comes
+    first. Users are stored detached, to be merged into a request's session.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # token: (monotonic expiry, user)
+        self._data: OrderedDict[str, tuple[float, User]] = OrderedDict()
+        self._tokens: dict[uuid.UUID, set[str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, token: str) -> User | None:
+        with self._lock:
+            entry = self._data.get(token)
+            if entry is not None and entry[0] <= time.monotonic():
+                self._remove(token)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(token)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, token: str, user: User, token_expires_at: float) -> None:
+        """token_expires_at is the exp claim of the token, in epoch seconds."""
+        lifetime = min(self.ttl, token_expires_at - time.time())
+        if lifetime <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._remove(token)
+            self._data[token] = (time.monotonic() + lifetime, user)
+            self._tokens.setdefault(user.id, set()).add(token)
+            while len(self._data) > self.maxsize:
+                self._remove(next(iter(self._data)))
+
+    def invalidate_user(self, user_id: uuid.UUID) -> None:
+        """Forget every token of a user, after a change to its row."""
+        with self._lock:
+            for token in list(self._tokens.get(user_id, ())):
+                self._remove(token)
+            self.invalidations += 1
+
+    def _remove(self, token: str) -> None:
+        entry = self._data.pop(token, None)
+        if entry is None:
+            return
+        tokens = self._tokens[entry[1].id]
+        tokens.discard(token)
+        if not tokens:
+            del self._tokens[entry[1].id]
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._tokens.clear()
+            self.hits = self.misses = self.invalidations = 0
+
+
+principal_cache = PrincipalCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE, ttl=settings.PRINCIPAL_CACHE_TTL
+)
@@ -1,15 +1,13 @@
 import logging
 
-from sqlmodel import Session
-
-from app.core.db import engine, init_db
+from app.core.db import init_db, open_session
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
 def init() -> None:
-    with Session(engine) as session:
+    with open_session() as session:
         init_db(session)
 
 
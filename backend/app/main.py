@@ -1,10 +1,18 @@
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 import sentry_sdk
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.routing import APIRoute
 from starlette.middleware.cors import CORSMiddleware
 
+from app.api.llm import llm_clients
 from app.api.main import api_router
+from app.api.task.service import worker_pool, workers_enabled
 from app.core.config import settings
+from app.core.db import dispose_engines
+from app.core.password_hasher import PasswordHasherBusy, password_hasher
 
 
 def custom_generate_unique_id(route: APIRoute) -> str:
@@ -16,8 +24,28 @@ def custom_generate_unique_id(route: APIRoute) -> str:
 if settings.SENTRY_DSN and settings.ENVIRONMENT != "local":
     sentry_sdk.init(dsn=str(settings.SENTRY_DSN), enable_tracing=True)
 
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    # One pooled LLM HTTP client per worker process
+    llm_clients.startup()
+    # Drain queued analyses in this process, including ones left over from a restart.
+    # Not in a serverless instance: it is frozen between invocations, polling
+    # threads would open a connection per poll and stall the task they run.
+    run_workers = workers_enabled()
+    if run_workers:
+        worker_pool.start()
+    yield
+    if run_workers:
+        worker_pool.stop(timeout=5)
+    password_hasher.shutdown()
+    await llm_clients.shutdown()
+    await dispose_engines()
+
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
+    lifespan=lifespan,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     generate_unique_id_function=custom_generate_unique_id,
 )
@@ -36,6 +64,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy(_request: Request, exc: PasswordHasherBusy) -> JSONResponse:
+    # A login burst is turned away rather than queued without bound
+    return JSONResponse(
+        status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"}
+    )
+
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
@@ -1,7 +1,10 @@
 import uuid
 from datetime import datetime
+from typing import Any
 
 from pydantic import EmailStr
+from sqlalchemy import Column, Computed, Index, UniqueConstraint, text
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
 from sqlmodel import Field, Relationship, SQLModel
 
 
@@ -55,7 +58,8 @@ class UserPublic(UserBase):
 
 class UsersPublic(SQLModel):
     data: list[UserPublic]
-    count: int
+    count: int | None
+    next_cursor: str | None = None
 
 
 # Shared properties
@@ -91,7 +95,8 @@ class ItemPublic(ItemBase):
 
 class ItemsPublic(SQLModel):
     data: list[ItemPublic]
-    count: int
+    count: int | None
+    next_cursor: str | None = None
 
 
 # Shared properties
@@ -102,47 +107,136 @@ class JobBase(SQLModel):
 
 # Properties to receive on job creation
 class JobCreate(JobBase):
-    title: str = Field(min_length=1, max_length=255)  # type: ignore
-    description: str | None = Field(default=None, max_length=10000)  # type: ignore
-    files: str | None = Field(default=None, max_length=1000)  # type: ignore
+    title: str = Field(min_length=1, max_length=255)
+    description: str | None = Field(default=None, max_length=10000)
+    files: str | None = Field(default=None, max_length=1000)
 
 
 # Properties to receive on job update
 class JobUpdate(JobBase):
     title: str | None = Field(default=None, min_length=1, max_length=255)  # type: ignore
-    description: str | None = Field(default=None, max_length=10000)  # type: ignore
-    files: str | None = Field(default=None, max_length=1000)  # type: ignore
-    analysis_result: str | None = Field(default=None, max_length=10000)  # type: ignore
+    description: str | None = Field(default=None, max_length=10000)
+    files: str | None = Field(default=None, max_length=1000)
+    analysis_result: dict[str, Any] | None = Field(default=None)
+
+
+JOB_SEARCH_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+)
 
 
 # Database model, database table inferred from class name
 class Job(JobBase, table=True):
+    __table_args__ = (
+        Index("ix_job_search_vector", "search_vector", postgresql_using="gin"),
+        # Job listings, newest first: a user's own jobs and, for superusers, all of them
+        Index("ix_job_owner_id_created_at_id", "owner_id", "created_at", "id"),
+        Index("ix_job_created_at_id", "created_at", "id"),
+    )
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     owner_id: uuid.UUID = Field(
         foreign_key="user.id", nullable=False, ondelete="CASCADE"
     )
     owner: User | None = Relationship(back_populates="jobs")
-    files: str | None = Field(default=None, max_length=1000)  # type: ignore
-    analysis_result: str | None = Field(default=None, max_length=10000)  # New field for analysis result
+    files: str | None = Field(default=None, max_length=1000)
+    analysis_result: dict[str, Any] | None = Field(default=None, sa_column=Column(JSONB))  # Job analysis result
+    score_weights: dict[str, float] | None = Field(default=None, sa_column=Column(JSONB))  # Section weights used to rank candidates
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    # Full-text search document kept by Postgres: title weighted A, description B
+    search_vector: str | None = Field(
+        default=None,
+        sa_column=Column(
+            TSVECTOR,
+            Computed(JOB_SEARCH_VECTOR, persisted=True),
+        ),
+        exclude=True,
+    )
 
 
 # Database model for candidate analysis results
 class CandidateAnalysis(SQLModel, table=True):
+    __table_args__ = (
+        # Containment queries, e.g. analysis_result @> '{"technical_skill": ["Python"]}'
+        Index(
+            "ix_candidateanalysis_analysis_result",
+            "analysis_result",
+            postgresql_using="gin",
+            postgresql_ops={"analysis_result": "jsonb_path_ops"},
+        ),
+        # Latest analysis of an uploaded file name
+        Index("ix_candidateanalysis_original_file_name_created_at", "original_file_name", "created_at"),
+        # One analysis per file content and name, re-uploading it updates the row
+        UniqueConstraint(
+            "file_hash", "original_file_name", name="uq_candidateanalysis_file_hash_original_file_name"
+        ),
+    )
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
-    file_name: str = Field(max_length=255, unique=True, index=True)  # Timestamped filename
-    original_file_name: str | None = Field(default=None, max_length=255, index=True)  # Original filename
-    analysis_result: str = Field(max_length=10000)  # JSON string of analysis result
+    file_name: str = Field(max_length=255, index=True)  # Timestamped filename of the stored file
+    original_file_name: str | None = Field(default=None, max_length=255)  # Original filename
+    analysis_result: dict[str, Any] = Field(sa_column=Column(JSONB, nullable=False))  # Analysis result
+    file_hash: str | None = Field(default=None, max_length=64)  # sha256 of the uploaded file
+    model_name: str | None = Field(default=None, max_length=255)  # Model that produced the analysis
+    prompt_version: str | None = Field(default=None, max_length=64)  # Prompt/function-schema version
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
 
+# Inverted index of the technical_skill, certificate and degree terms of candidate analyses
+class CandidateSkill(SQLModel, table=True):
+    __table_args__ = (Index("ix_candidateskill_kind_term", "kind", "term"),)
+
+    candidate_analysis_id: uuid.UUID = Field(
+        foreign_key="candidateanalysis.id", primary_key=True, ondelete="CASCADE"
+    )
+    kind: str = Field(max_length=32, primary_key=True)  # technical_skill | certificate | degree
+    term: str = Field(max_length=255, primary_key=True)  # Normalized, e.g. "python"
+
+
 # Database model for score analysis results
 class ScoreAnalysis(SQLModel, table=True):
+    __table_args__ = (
+        # One result per job and candidate, rescoring replaces it
+        UniqueConstraint(
+            "job_id", "candidate_file_name", name="uq_scoreanalysis_job_id_candidate_file_name"
+        ),
+        # Best scores of a job first, in the order of the paginated listing
+        Index(
+            "ix_scoreanalysis_job_id_score",
+            "job_id",
+            text("(coalesce((score_result ->> 'score')::float, -1)) DESC"),
+            text("id DESC"),
+        ),
+    )
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     job_id: uuid.UUID = Field(foreign_key="job.id", nullable=False, ondelete="CASCADE")
-    candidate_file_name: str = Field(max_length=255, index=True)  # Candidate file name
-    score_result: str = Field(max_length=10000)  # JSON string of score analysis result
+    candidate_file_name: str = Field(max_length=255)  # Candidate file name
+    score_result: dict[str, Any] = Field(sa_column=Column(JSONB, nullable=False))  # Score analysis result
+    input_hash: str | None = Field(default=None, max_length=64, index=True)  # Score cache key of the job/candidate pair
+    # Per-section scores of score_result, so candidates can be re-ranked without parsing it
+    degree_score: int | None = Field(default=None)
+    experience_score: int | None = Field(default=None)
+    technical_skill_score: int | None = Field(default=None)
+    responsibility_score: int | None = Field(default=None)
+    certificate_score: int | None = Field(default=None)
+    soft_skill_score: int | None = Field(default=None)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+# Database model for queued LLM analyses (job, candidate or score)
+class AnalysisTask(SQLModel, table=True):
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    kind: str = Field(max_length=32)  # job | candidate | score
+    status: str = Field(default="pending", max_length=32, index=True)  # pending | running | succeeded | failed
+    payload: str  # JSON string of the handler input
+    result: str | None = Field(default=None)  # JSON string of the analysis result
+    error: str | None = Field(default=None)
+    attempts: int = 0
+    lease_expires_at: datetime | None = Field(default=None)  # Running tasks past their lease are picked up again
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -151,14 +245,15 @@ class ScoreAnalysis(SQLModel, table=True):
 class JobPublic(JobBase):
     id: uuid.UUID
     owner_id: uuid.UUID
-    files: str | None = Field(default=None, max_length=1000)  # type: ignore
-    analysis_result: str | None = Field(default=None, max_length=10000)  # New field for analysis result
+    files: str | None = Field(default=None, max_length=1000)
+    analysis_result: dict[str, Any] | None = None
     created_at: datetime
 
 
 class JobsPublic(SQLModel):
     data: list[JobPublic]
-    count: int
+    count: int | None
+    next_cursor: str | None = None
 
 
 # Properties to return via API for candidate analysis
@@ -166,7 +261,7 @@ class CandidateAnalysisPublic(SQLModel):
     id: uuid.UUID
     file_name: str
     original_file_name: str | None
-    analysis_result: str
+    analysis_result: dict[str, Any]
     created_at: datetime
     updated_at: datetime
 
@@ -176,18 +271,29 @@ class ScoreAnalysisPublic(SQLModel):
     id: uuid.UUID
     job_id: uuid.UUID
     candidate_file_name: str
-    score_result: str
+    score_result: dict[str, Any]
+    created_at: datetime
+    updated_at: datetime
+
+
+# Properties to return via API for queued analyses
+class AnalysisTaskPublic(SQLModel):
+    id: uuid.UUID
+    kind: str
+    status: str
+    error: str | None
+    attempts: int
     created_at: datetime
     updated_at: datetime
 
 
 class JobResponseSchema(SQLModel):
-    degree: list
-    experience: list
-    technical_skill: list
-    responsibility: list
-    certificate: list
-    soft_skill: list
+    degree: list[Any]
+    experience: list[Any]
+    technical_skill: list[Any]
+    responsibility: list[Any]
+    certificate: list[Any]
+    soft_skill: list[Any]
 
 
 # Generic message
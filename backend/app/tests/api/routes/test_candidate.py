@@ -0,0 +1,505 @@
+import asyncio
+import importlib
+import io
+import json
+import time
+import zipfile
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+import httpx
+import pytest
+from fastapi import APIRouter, FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+from sqlmodel import Session, col, delete, select
+
+from app.api.candidate import service as candidate_service
+from app.api.candidate.config import candidate_config
+from app.api.candidate.skills import search_candidates
+from app.api.upload import MAX_BODY_SIZE_KEY, UploadLimitRoute
+from app.core.config import settings
+from app.main import app
+from app.models import CandidateAnalysis
+from app.tests.utils.utils import random_lower_string
+
+# The package re-exports the APIRouter as `router`, so fetch the module itself
+candidate_router = importlib.import_module("app.api.candidate.router")
+
+LLM_LATENCY = 0.5
+
+
+async def fake_analyse_candidate(cv_content: str) -> dict[str, Any]:
+    await asyncio.sleep(LLM_LATENCY)
+    return {"candidate_name": cv_content}
+
+
+async def fake_read_cv_candidate(file_name: str, file_hash: str | None = None) -> str:
+    # The router hands the upload's content hash on to the text cache
+    assert file_hash
+    return file_name
+
+
+async def post_cvs(file_names: list[str]) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+        start = time.perf_counter()
+        responses = await asyncio.gather(
+            *[
+                ac.post(
+                    f"{settings.API_V1_STR}/candidate/analyse_candidate",
+                    files={"file": (name, b"%PDF-1.4 " + name.encode(), "application/pdf")},
+                )
+                for name in file_names
+            ]
+        )
+        elapsed = time.perf_counter() - start
+    assert all(r.status_code == 200 for r in responses)
+    return elapsed
+
+
+def test_analyse_candidate_concurrent_requests_do_not_serialize(
+    db: Session, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    monkeypatch.setattr(candidate_config, "CV_UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(
+        candidate_router, "analyse_candidate_async", fake_analyse_candidate
+    )
+    monkeypatch.setattr(
+        candidate_router, "read_cv_candidate_async", fake_read_cv_candidate
+    )
+    in_flight = 10
+    file_names = [f"{random_lower_string()}.pdf" for _ in range(in_flight)]
+
+    try:
+        elapsed = asyncio.run(post_cvs(file_names))
+    finally:
+        db.exec(  # type: ignore
+            delete(CandidateAnalysis).where(
+                col(CandidateAnalysis.original_file_name).in_(file_names)
+            )
+        )
+        db.commit()
+
+    # Serialized requests would take in_flight * LLM_LATENCY
+    assert elapsed < in_flight * LLM_LATENCY / 3
+
+
+def test_analyse_candidate_duplicate_upload_is_cached(
+    client: TestClient, db: Session, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    calls: list[str] = []
+
+    async def counting_analyse_candidate(cv_content: str) -> dict[str, Any]:
+        calls.append(cv_content)
+        return {"candidate_name": "Jane"}
+
+    monkeypatch.setattr(candidate_config, "CV_UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(
+        candidate_router, "analyse_candidate_async", counting_analyse_candidate
+    )
+    monkeypatch.setattr(
+        candidate_router, "read_cv_candidate_async", fake_read_cv_candidate
+    )
+    file_name = f"{random_lower_string()}.pdf"
+    contents = b"%PDF-1.4 " + random_lower_string().encode()
+
+    try:
+        for _ in range(2):
+            r = client.post(
+                f"{settings.API_V1_STR}/candidate/analyse_candidate",
+                files={"file": (file_name, contents, "application/pdf")},
+            )
+            assert r.status_code == 200
+            assert r.json() == {"candidate_name": "Jane"}
+    finally:
+        db.exec(  # type: ignore
+            delete(CandidateAnalysis).where(
+                col(CandidateAnalysis.original_file_name) == file_name
+            )
+        )
+        db.commit()
+
+    assert len(calls) == 1
+    assert len(list(tmp_path.iterdir())) == 1
+
+
+def test_analyse_candidate_same_content_new_name_points_at_stored_file(
+    client: TestClient, db: Session, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    async def fake_analyse(cv_content: str) -> dict[str, Any]:
+        return {"candidate_name": cv_content}
+
+    monkeypatch.setattr(candidate_config, "CV_UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(candidate_router, "analyse_candidate_async", fake_analyse)
+    monkeypatch.setattr(
+        candidate_router, "read_cv_candidate_async", fake_read_cv_candidate
+    )
+    names = [f"{random_lower_string()}.pdf" for _ in range(2)]
+    contents = b"%PDF-1.4 " + random_lower_string().encode()
+
+    try:
+        for name in names:
+            r = client.post(
+                f"{settings.API_V1_STR}/candidate/analyse_candidate",
+                files={"file": (name, contents, "application/pdf")},
+            )
+            assert r.status_code == 200
+        stored = db.exec(
+            select(CandidateAnalysis.file_name).where(
+                col(CandidateAnalysis.original_file_name).in_(names)
+            )
+        ).all()
+    finally:
+        db.exec(  # type: ignore
+            delete(CandidateAnalysis).where(
+                col(CandidateAnalysis.original_file_name).in_(names)
+            )
+        )
+        db.commit()
+
+    # Both names refer to the single copy on disk
+    assert len(stored) == 2
+    assert len(set(stored)) == 1
+    assert (tmp_path / stored[0]).is_file()
+
+
+def test_analyse_candidate_rejects_unsupported_file(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    monkeypatch.setattr(candidate_config, "CV_UPLOAD_DIR", str(tmp_path))
+    r = client.post(
+        f"{settings.API_V1_STR}/candidate/analyse_candidate",
+        files={"file": ("cv.txt", b"plain text", "text/plain")},
+    )
+    assert r.status_code == 415
+    r = client.post(
+        f"{settings.API_V1_STR}/candidate/analyse_candidate",
+        files={"file": ("cv.pdf", b"not really a pdf", "application/pdf")},
+    )
+    assert r.status_code == 415
+    assert r.json()["detail"] == "File content does not match its extension"
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_analyse_candidate_rejects_oversized_file(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    monkeypatch.setattr(candidate_config, "CV_UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(candidate_config, "MAX_CV_SIZE", 1024)
+    monkeypatch.setattr(candidate_config, "UPLOAD_CHUNK_SIZE", 256)
+    r = client.post(
+        f"{settings.API_V1_STR}/candidate/analyse_candidate",
+        files={"file": ("cv.pdf", b"%PDF-1.4 " + b"x" * 2048, "application/pdf")},
+    )
+    assert r.status_code == 413
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_upload_limit_counts_chunked_body() -> None:
+    router = APIRouter(route_class=UploadLimitRoute)
+    received: list[int] = []
+
+    @router.post("/upload", openapi_extra={MAX_BODY_SIZE_KEY: 1024})
+    async def upload(file: UploadFile = File(...)) -> int:
+        received.append(file.size or 0)
+        return file.size or 0
+
+    limited = FastAPI()
+    limited.include_router(router)
+
+    def chunks() -> Iterator[bytes]:
+        yield b"--b\r\nContent-Disposition: form-data; name=\"file\"; filename=\"cv.pdf\"\r\n\r\n"
+        for _ in range(8):
+            yield b"x" * 256
+        yield b"\r\n--b--\r\n"
+
+    with TestClient(limited) as c:
+        # A generator body is sent chunked, without Content-Length
+        r = c.post(
+            "/upload",
+            content=chunks(),
+            headers={"Content-Type": "multipart/form-data; boundary=b"},
+        )
+    assert r.status_code == 413
+    assert received == []
+
+
+def test_analyse_candidates_bulk(
+    client: TestClient, db: Session, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    calls: list[str] = []
+
+    async def counting_analyse_candidate(cv_content: str) -> dict[str, Any]:
+        calls.append(cv_content)
+        return {"candidate_name": cv_content}
+
+    def fake_read_cv_file(file_path: str) -> str:
+        return Path(file_path).read_bytes().decode()
+
+    monkeypatch.setattr(candidate_config, "CV_UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(
+        candidate_service, "analyse_candidate_async", counting_analyse_candidate
+    )
+    monkeypatch.setattr(candidate_service, "read_cv_file", fake_read_cv_file)
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        monkeypatch.setattr(candidate_service, "parse_process_pool", lambda: pool)
+        names = [f"{random_lower_string()}.pdf" for _ in range(3)]
+        first = b"%PDF-1.4 " + random_lower_string().encode()
+        second = b"%PDF-1.4 " + random_lower_string().encode()
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w") as zf:
+            zf.writestr(f"cvs/{names[0]}", first)
+            zf.writestr(f"cvs/{names[1]}", first)  # same content, other name
+            zf.writestr("cvs/notes.txt", b"not a cv")
+        try:
+            r = client.post(
+                f"{settings.API_V1_STR}/candidate/analyse_candidates",
+                files=[
+                    ("files", ("cvs.zip", archive.getvalue(), "application/zip")),
+                    ("files", (names[2], second, "application/pdf")),
+                ],
+            )
+            stored = db.exec(
+                select(CandidateAnalysis.file_name).where(
+                    col(CandidateAnalysis.original_file_name).in_(names)
+                )
+            ).all()
+        finally:
+            db.exec(  # type: ignore
+                delete(CandidateAnalysis).where(
+                    col(CandidateAnalysis.original_file_name).in_(names)
+                )
+            )
+            db.commit()
+
+    assert r.status_code == 200
+    events = [json.loads(line) for line in r.text.splitlines()]
+    statuses = {event.get("file_name"): event["status"] for event in events}
+    assert statuses[names[0]] == "analysed"
+    assert statuses[names[1]] == "analysed"
+    assert statuses[names[2]] == "analysed"
+    assert statuses["notes.txt"] == "failed"
+    assert events[-1] == {"status": "done", "cached": 0, "analysed": 3, "failed": 1}
+    # Identical files are parsed and analysed once and stored once
+    assert len(calls) == 2
+    assert len(list(tmp_path.glob("*.pdf"))) == 2
+    assert len(list((tmp_path / "extracted_text").iterdir())) == 2
+    # Every record names a file that was written
+    assert len(stored) == 3
+    assert all((tmp_path / file_name).is_file() for file_name in stored)
+
+
+def test_analyse_candidates_bulk_rejected_upload_leaves_no_files(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    monkeypatch.setattr(candidate_config, "CV_UPLOAD_DIR", str(tmp_path))
+    url = f"{settings.API_V1_STR}/candidate/analyse_candidates"
+    pdf = b"%PDF-1.4 " + random_lower_string().encode()
+
+    r = client.post(
+        url,
+        files=[
+            ("files", ("cv.pdf", pdf, "application/pdf")),
+            ("files", ("cvs.zip", b"not a zip", "application/zip")),
+        ],
+    )
+    assert r.status_code == 400
+    assert list(tmp_path.iterdir()) == []
+
+    # Members written before the archive turns out too large are removed too
+    monkeypatch.setattr(candidate_config, "BULK_MAX_FILES", 2)
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        for i in range(3):
+            zf.writestr(f"cv{i}.pdf", pdf + str(i).encode())
+    r = client.post(
+        url,
+        files=[
+            ("files", ("cv.pdf", pdf, "application/pdf")),
+            ("files", ("cvs.zip", archive.getvalue(), "application/zip")),
+        ],
+    )
+    assert r.status_code == 413
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_reanalyse_candidate_reuses_extracted_text(
+    client: TestClient, db: Session, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    parsed: list[str] = []
+
+    def counting_read_cv_file(file_path: str) -> str:
+        parsed.append(file_path)
+        return Path(file_path).read_bytes().decode()
+
+    def fake_analyse_candidate(cv_content: str) -> dict[str, Any]:
+        return {"candidate_name": cv_content}
+
+    monkeypatch.setattr(candidate_config, "CV_UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(candidate_service, "read_cv_file", counting_read_cv_file)
+    monkeypatch.setattr(candidate_service, "analyse_candidate", fake_analyse_candidate)
+    file_name = f"{random_lower_string()}.pdf"
+    contents = b"%PDF-1.4 " + random_lower_string().encode()
+    file_hash = random_lower_string()
+    (tmp_path / file_name).write_bytes(contents)
+    record = candidate_service.save_candidate_analysis(
+        db, file_name, file_name, {"candidate_name": "old"}, file_hash
+    )
+    record.model_name = "retired-model"
+    db.add(record)
+    db.commit()
+
+    try:
+        for _ in range(2):
+            r = client.post(f"{settings.API_V1_STR}/candidate/reanalyse/{file_name}")
+            assert r.status_code == 200
+            assert r.json() == {"candidate_name": contents.decode()}
+    finally:
+        db.exec(  # type: ignore
+            delete(CandidateAnalysis).where(
+                col(CandidateAnalysis.original_file_name) == file_name
+            )
+        )
+        db.commit()
+
+    assert len(parsed) == 1
+    assert candidate_service.load_cv_text(file_hash) == contents.decode()
+
+
+def test_candidate_messages_keep_dates_and_repeated_roles() -> None:
+    pages = [
+        "Jane Doe\nCurriculum Vitae\n\nSoftware Engineer\nAcme\n2019\n05/2021\nPage 1 of 3",
+        "Jane Doe\nCurriculum Vitae\nSoftware Engineer\nGlobex\n2017\n10\nPage 2 of 3",
+        "Jane Doe\nCurriculum Vitae\nSoftware Engineer\nInitech\n2015\n- Page 3 -",
+    ]
+
+    content = candidate_service.candidate_messages("\f".join(pages))[1].content
+
+    assert content == (
+        "Jane Doe\nCurriculum Vitae\n\n"
+        "Software Engineer\nAcme\n2019\n05/2021\n"
+        "Software Engineer\nGlobex\n2017\n10\n"
+        "Software Engineer\nInitech\n2015"
+    )
+
+
+def test_reanalyse_candidate_not_found(client: TestClient) -> None:
+    r = client.post(f"{settings.API_V1_STR}/candidate/reanalyse/missing.pdf")
+    assert r.status_code == 404
+
+
+def test_search_candidates_by_skills(
+    client: TestClient,
+    superuser_token_headers: dict[str, str],
+    normal_user_token_headers: dict[str, str],
+    db: Session,
+) -> None:
+    analyses = {
+        "cloud": {
+            "technical_skill": ["Python 3.11", "AWS (EC2, S3)", "Docker"],
+            "degree": ["Bachelor's degree in Computer Science - FPT University - 2024"],
+        },
+        "web": {
+            "technical_skill": ["Python", "PHP; Laravel"],
+            "certificate": ["AWS Certified Developer"],
+        },
+        "data": {
+            "technical_skill": ["SQL", "Power BI"],
+            "degree": ["MSc in Data Science"],
+        },
+    }
+    file_names = {name: f"{random_lower_string()}.pdf" for name in analyses}
+    for name, result in analyses.items():
+        candidate_service.save_candidate_analysis(
+            db, file_names[name], file_names[name], result
+        )
+
+    def search(query: str) -> list[str]:
+        r = client.get(f"{settings.API_V1_STR}/candidate/search?{query}")
+        assert r.status_code == 200
+        names = {file_name: name for name, file_name in file_names.items()}
+        return sorted(names[item["file_name"]] for item in r.json() if item["file_name"] in names)
+
+    try:
+        assert search("all=python&all=aws") == ["cloud"]
+        assert search("all=Python&none=php") == ["cloud"]
+        assert search("any=docker&any=power%20bi") == ["cloud", "data"]
+        assert search("all=aws%20certified%20developer&kind=certificate") == ["web"]
+        assert search("all=aws&kind=certificate") == []
+        assert search("all=master&all=data%20science&kind=degree") == ["data"]
+        assert search("all=computer%20science&all=bachelor") == ["cloud"]
+        # Terms that normalize to nothing match nobody
+        assert search("all=%21%21") == []
+        assert search("any=---&none=php") == []
+
+        r = client.get(f"{settings.API_V1_STR}/candidate/search?none=php")
+        assert r.status_code == 400
+
+        url = f"{settings.API_V1_STR}/candidate/skills/reindex"
+        assert client.post(url).status_code == 401
+        assert client.post(url, headers=normal_user_token_headers).status_code == 403
+        r = client.post(url, headers=superuser_token_headers)
+        assert r.json()["indexed"] >= 3
+        assert search("all=python&all=aws") == ["cloud"]
+    finally:
+        db.exec(  # type: ignore
+            delete(CandidateAnalysis).where(
+                col(CandidateAnalysis.file_name).in_(list(file_names.values()))
+            )
+        )
+        db.commit()
+
+
+def test_save_candidate_analysis_upserts_by_file_hash(db: Session) -> None:
+    original_file_name = f"{random_lower_string()}.pdf"
+    file_hash = random_lower_string()
+    first = candidate_service.save_candidate_analysis(
+        db, f"1-{original_file_name}", original_file_name, {"technical_skill": ["Java"]}, file_hash
+    )
+    try:
+        again = candidate_service.save_candidate_analysis(
+            db, f"2-{original_file_name}", original_file_name, {"technical_skill": ["Go"]}, file_hash
+        )
+        assert again.id == first.id
+        # The row keeps the file name references point to
+        assert again.file_name == f"1-{original_file_name}"
+        assert again.analysis_result == {"technical_skill": ["Go"]}
+        assert again.updated_at > again.created_at
+
+        # Bulk variant: one update, one insert under another name
+        other_file_name = f"{random_lower_string()}.pdf"
+        candidate_service.save_candidate_analyses(
+            db,
+            [
+                CandidateAnalysis(
+                    file_name=f"3-{original_file_name}",
+                    original_file_name=original_file_name,
+                    analysis_result={"technical_skill": ["Rust"]},
+                    file_hash=file_hash,
+                ),
+                CandidateAnalysis(
+                    file_name=other_file_name,
+                    original_file_name=other_file_name,
+                    analysis_result={"technical_skill": ["Rust"]},
+                    file_hash=file_hash,
+                ),
+            ],
+        )
+        rows = db.exec(
+            select(CandidateAnalysis).where(CandidateAnalysis.file_hash == file_hash)
+        ).all()
+        assert sorted(row.file_name for row in rows) == sorted(
+            [f"1-{original_file_name}", other_file_name]
+        )
+        assert all(row.analysis_result == {"technical_skill": ["Rust"]} for row in rows)
+        # The skill index follows the latest analysis
+        found = {row.file_name for row in search_candidates(db, all_terms=["rust"])}
+        assert f"1-{original_file_name}" in found
+        assert not {row.file_name for row in search_candidates(db, all_terms=["go"])} & found
+    finally:
+        db.exec(  # type: ignore
+            delete(CandidateAnalysis).where(col(CandidateAnalysis.file_hash) == file_hash)
+        )
+        db.commit()
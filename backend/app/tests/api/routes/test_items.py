@@ -3,6 +3,7 @@ import uuid
 from fastapi.testclient import TestClient
 from sqlmodel import Session
 
+from app.api.pagination import encode_cursor
 from app.core.config import settings
 from app.tests.utils.item import create_random_item
 
@@ -79,6 +80,66 @@ def test_read_items(
     assert len(content["data"]) >= 2
 
 
+
+def test_read_items_with_cursor(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    for _ in range(5):
+        create_random_item(db)
+    seen: list[str] = []
+    params: dict[str, str | int] = {"limit": 2, "count": "none"}
+    while True:
+        response = client.get(
+            f"{settings.API_V1_STR}/items/",
+            headers=superuser_token_headers,
+            params=params,
+        )
+        assert response.status_code == 200
+        content = response.json()
+        assert content["count"] is None
+        assert len(content["data"]) <= 2
+        seen.extend(item["id"] for item in content["data"])
+        if not content["next_cursor"]:
+            break
+        params["cursor"] = content["next_cursor"]
+
+    response = client.get(
+        f"{settings.API_V1_STR}/items/",
+        headers=superuser_token_headers,
+        params={"count": "exact"},
+    )
+    assert len(seen) == len(set(seen)) == response.json()["count"]
+
+    response = client.get(
+        f"{settings.API_V1_STR}/items/",
+        headers=superuser_token_headers,
+        params={"count": "estimate", "limit": 1},
+    )
+    assert response.status_code == 200
+    assert isinstance(response.json()["count"], int)
+
+
+def test_read_items_invalid_cursor(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    response = client.get(
+        f"{settings.API_V1_STR}/items/",
+        headers=superuser_token_headers,
+        params={"cursor": "not-a-cursor"},
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+    # A cursor with one value too many, e.g. from a listing with more sort keys
+    cursor = encode_cursor([str(uuid.uuid4()), str(uuid.uuid4())])
+    response = client.get(
+        f"{settings.API_V1_STR}/items/",
+        headers=superuser_token_headers,
+        params={"cursor": cursor},
+    )
+    assert response.status_code == 400
+
+
 def test_update_item(
     client: TestClient, superuser_token_headers: dict[str, str], db: Session
 ) -> None:
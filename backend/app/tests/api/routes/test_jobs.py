@@ -0,0 +1,143 @@
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.api.job import service as job_service
+from app.core.config import settings
+from app.models import Job
+from app.tests.utils.user import create_random_user
+from app.tests.utils.utils import random_lower_string
+
+
+def test_search_jobs_ranks_title_matches_first(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    tag = random_lower_string()
+    jobs = {
+        "title": {"title": f"Kubernetes Engineer {tag}", "description": "Run clusters"},
+        "description": {
+            "title": f"Backend Developer {tag}",
+            "description": "Python services deployed on Kubernetes",
+        },
+        "other": {"title": f"Data Analyst {tag}", "description": "SQL and dashboards"},
+    }
+    ids = {}
+    for key, job in jobs.items():
+        r = client.post(
+            f"{settings.API_V1_STR}/jobs/", headers=superuser_token_headers, json=job
+        )
+        assert r.status_code == 200
+        assert "search_vector" not in r.json()
+        ids[key] = r.json()["id"]
+
+    r = client.get(
+        f"{settings.API_V1_STR}/jobs/",
+        headers=superuser_token_headers,
+        params={"q": f"kube {tag}"},
+    )
+    assert r.status_code == 200
+    assert r.json()["count"] == 2
+    assert [job["id"] for job in r.json()["data"]] == [ids["title"], ids["description"]]
+
+    r = client.get(
+        f"{settings.API_V1_STR}/jobs/",
+        headers=superuser_token_headers,
+        params={"title": "kubernetes", "description": tag},
+    )
+    assert r.json()["count"] == 0
+
+    r = client.get(
+        f"{settings.API_V1_STR}/jobs/",
+        headers=superuser_token_headers,
+        params={"title": f"developers {tag}", "description": "deploy"},
+    )
+    assert [job["id"] for job in r.json()["data"]] == [ids["description"]]
+
+    # tsquery syntax in user input is treated as plain words
+    r = client.get(
+        f"{settings.API_V1_STR}/jobs/",
+        headers=superuser_token_headers,
+        params={"q": f"analy & ! ( {tag}:*"},
+    )
+    assert r.status_code == 200
+    assert [job["id"] for job in r.json()["data"]] == [ids["other"]]
+
+
+def test_read_jobs_with_cursor_while_searching(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    tag = random_lower_string()
+    for i in range(5):
+        r = client.post(
+            f"{settings.API_V1_STR}/jobs/",
+            headers=superuser_token_headers,
+            json={"title": f"Engineer {tag}", "description": "engineer " * i},
+        )
+        assert r.status_code == 200
+
+    r = client.get(
+        f"{settings.API_V1_STR}/jobs/",
+        headers=superuser_token_headers,
+        params={"q": f"engineer {tag}"},
+    )
+    expected = [job["id"] for job in r.json()["data"]]
+    assert len(expected) == 5
+
+    pages = []
+    params: dict[str, str | int] = {"q": f"engineer {tag}", "limit": 2}
+    while True:
+        r = client.get(
+            f"{settings.API_V1_STR}/jobs/", headers=superuser_token_headers, params=params
+        )
+        assert r.status_code == 200
+        assert r.json()["count"] == 5
+        pages.append([job["id"] for job in r.json()["data"]])
+        if not r.json()["next_cursor"]:
+            break
+        params["cursor"] = r.json()["next_cursor"]
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert sum(pages, []) == expected
+
+
+def test_analyse_job_awaits_the_llm(
+    client: TestClient, db: Session, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    analysis = {
+        section: [random_lower_string()]
+        for section in (
+            "degree",
+            "experience",
+            "technical_skill",
+            "responsibility",
+            "certificate",
+            "soft_skill",
+        )
+    }
+
+    def analyse_job_blocks(*_args: Any, **_kwargs: Any) -> None:
+        raise AssertionError("the route must not block the event loop on the LLM")
+
+    async def fake_analyse_job_async(job_data: Any) -> dict[str, Any]:
+        assert job_data.description == "Python"
+        return analysis
+
+    monkeypatch.setattr(job_service, "analyse_job", analyse_job_blocks)
+    monkeypatch.setattr(job_service, "analyse_job_async", fake_analyse_job_async)
+    user = create_random_user(db)
+    job = Job(title=random_lower_string(), owner_id=user.id)
+    db.add(job)
+    db.commit()
+    try:
+        r = client.post(
+            f"{settings.API_V1_STR}/job/analyse_job",
+            json={"title": job.title, "description": "Python", "id": str(job.id)},
+        )
+        assert r.status_code == 200
+        assert r.json() == analysis
+        db.refresh(job)
+        assert job.analysis_result == analysis
+    finally:
+        db.delete(job)
+        db.commit()
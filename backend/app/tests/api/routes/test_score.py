@@ -0,0 +1,555 @@
+import asyncio
+import json
+from pathlib import Path
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, col, delete, select
+
+from app.api.output import LLMOutputError, output2json
+from app.api.prompt import prompt_metrics
+from app.api.score import service
+from app.api.score.cache import score_cache, score_cache_key
+from app.api.score.config import score_config
+from app.api.score.prompts import fn_matching_analysis
+from app.api.score.ranking import SECTIONS, section_columns
+from app.core.config import settings
+from app.models import CandidateAnalysis, Job, ScoreAnalysis
+from app.tests.utils.user import create_random_user
+from app.tests.utils.utils import random_lower_string
+
+
+def test_score_cache_key_ignores_key_order() -> None:
+    job = {"degree": ["BSc"], "technical_skill": ["Python", "SQL"]}
+    candidate = {"technical_skill": ["Python"], "degree": ["BSc"]}
+    reordered_job = {"technical_skill": ["Python", "SQL"], "degree": ["BSc"]}
+    reordered_candidate = {"degree": ["BSc"], "technical_skill": ["Python"]}
+    assert score_cache_key(job, candidate) == score_cache_key(
+        reordered_job, reordered_candidate
+    )
+    assert score_cache_key(job, candidate) != score_cache_key(candidate, job)
+
+
+def test_analyse_score_is_memoized(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    calls: list[Any] = []
+
+    async def fake_analyse_score_async(job_candidate_data: Any) -> dict[str, Any]:
+        calls.append(job_candidate_data)
+        return {"score": 42.0}
+
+    monkeypatch.setattr(service, "analyse_score_async", fake_analyse_score_async)
+    score_cache.clear()
+    data = {
+        "job": {"technical_skill": [random_lower_string()]},
+        "candidate": {"technical_skill": ["Python"], "degree": ["BSc"]},
+    }
+
+    for _ in range(3):
+        r = client.post(f"{settings.API_V1_STR}/score/score_analyse", json=data)
+        assert r.status_code == 200
+        assert r.json() == {"score": 42.0}
+
+    assert len(calls) == 1
+    r = client.get(f"{settings.API_V1_STR}/score/cache_stats")
+    stats = r.json()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+
+
+def test_score_messages_are_compacted(client: TestClient) -> None:
+    prompt_metrics.clear()
+    data = service.ScoreSchema(
+        job={"technical_skill": ["Python", "SQL"], "certificate": [], "degree": None},
+        candidate={"technical_skill": [" Python "], "summary": ""},
+    )
+
+    content = service.score_messages(data)[1].content
+
+    assert content == (
+        'Requirement:{"technical_skill":["Python","SQL"]}\n'
+        'Candidate:{"technical_skill":["Python"]}'
+    )
+    r = client.get(f"{settings.API_V1_STR}/utils/prompt-stats/")
+    assert r.status_code == 200
+    stats = r.json()["score"]
+    assert stats["requests"] == 1
+    assert stats["tokens_saved"] > 0
+
+
+def score_output(arguments: str) -> dict[str, Any]:
+    return {"tool_calls": [{"function": {"name": "evaluate", "arguments": arguments}}]}
+
+
+def test_output2json_parses_repairs_and_validates() -> None:
+    sections = fn_matching_analysis[0]["parameters"]["required"][:-1]
+    result: dict[str, Any] = {section: {"score": 80, "comment": "ok"} for section in sections}
+    result["summary_comment"] = "Good match"
+    arguments = json.dumps(result)
+
+    assert output2json(score_output(arguments), fn_matching_analysis) == result
+
+    # Fenced, trailing comma, raw newline in a string and a quoted integer
+    sloppy = arguments.replace('"score": 80', '"score": "80"').replace(
+        '"Good match"}', '"Good\nmatch",}'
+    )
+    repaired = output2json(score_output(f"```json\n{sloppy}\n```"), fn_matching_analysis)
+    assert repaired["degree"]["score"] == 80
+    assert repaired["summary_comment"] == "Good\nmatch"
+
+    del result["degree"]
+    with pytest.raises(LLMOutputError, match="missing degree"):
+        output2json(score_output(json.dumps(result)), fn_matching_analysis)
+    result["degree"] = {"score": 120, "comment": "ok"}
+    with pytest.raises(LLMOutputError, match="above 100"):
+        output2json(score_output(json.dumps(result)), fn_matching_analysis)
+
+
+def test_analyse_score_batch_ranks_and_limits_concurrency(
+    client: TestClient, db: Session, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    in_flight = 0
+    max_in_flight = 0
+
+    async def fake_analyse_score_async(job_candidate_data: Any) -> dict[str, Any]:
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.05)
+        in_flight -= 1
+        return {"score": float(job_candidate_data.candidate["sql"])}
+
+    monkeypatch.setattr(service, "analyse_score_async", fake_analyse_score_async)
+    monkeypatch.setattr(score_config, "BATCH_CONCURRENCY", 2)
+    user = create_random_user(db)
+    job = Job(
+        title=random_lower_string(),
+        owner_id=user.id,
+        analysis_result={"technical_skill": [random_lower_string()]},
+    )
+    db.add(job)
+    file_names = [f"{random_lower_string()}.pdf" for _ in range(5)]
+    db.add_all(
+        [
+            CandidateAnalysis(
+                file_name=name,
+                original_file_name=name,
+                analysis_result={"sql": sql},
+            )
+            for sql, name in enumerate(file_names)
+        ]
+    )
+    db.commit()
+
+    try:
+        r = client.post(
+            f"{settings.API_V1_STR}/score/score_analyse_batch",
+            json={
+                "job_id": str(job.id),
+                "candidate_file_names": file_names + ["missing.pdf"],
+            },
+        )
+    finally:
+        db.exec(  # type: ignore
+            delete(CandidateAnalysis).where(
+                col(CandidateAnalysis.file_name).in_(file_names)
+            )
+        )
+        db.delete(job)
+        db.commit()
+
+    assert r.status_code == 200
+    content = r.json()
+    assert [item["candidate_file_name"] for item in content] == list(
+        reversed(file_names)
+    ) + ["missing.pdf"]
+    assert [item["rank"] for item in content] == [1, 2, 3, 4, 5, None]
+    assert content[-1]["error"] == "Candidate analysis not found"
+    assert max_in_flight <= 2
+
+
+def test_score_ranking_reranks_with_job_weights(
+    client: TestClient, db: Session, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    def section_result(degree: int, technical_skill: int) -> dict[str, Any]:
+        return {
+            "degree": {"score": degree, "comment": ""},
+            "technical_skill": {"score": technical_skill, "comment": ""},
+        }
+
+    user = create_random_user(db)
+    job = Job(title=random_lower_string(), owner_id=user.id)
+    db.add(job)
+    db.commit()
+    results = {
+        "scholar.pdf": section_result(degree=100, technical_skill=20),
+        "hacker.pdf": section_result(degree=10, technical_skill=90),
+        "legacy.pdf": section_result(degree=60, technical_skill=60),
+    }
+    for name, result in results.items():
+        columns = section_columns(result) if name != "legacy.pdf" else {}
+        db.add(
+            ScoreAnalysis(
+                job_id=job.id,
+                candidate_file_name=name,
+                score_result=result,
+                **columns,
+            )
+        )
+    db.commit()
+
+    async def analyse_score_fails(*_args: Any) -> None:
+        raise AssertionError("re-ranking must not call the LLM")
+
+    monkeypatch.setattr(service, "analyse_score_async", analyse_score_fails)
+    try:
+        r = client.get(f"{settings.API_V1_STR}/score/ranking/{job.id}")
+        assert r.status_code == 200
+        assert [item["candidate_file_name"] for item in r.json()] == [
+            "hacker.pdf",
+            "legacy.pdf",
+            "scholar.pdf",
+        ]
+
+        weights = {"degree": 1, "technical_skill": 0}
+        r = client.put(f"{settings.API_V1_STR}/score/weights/{job.id}", json=weights)
+        assert r.status_code == 200
+        ranking = r.json()
+        assert [item["candidate_file_name"] for item in ranking] == [
+            "scholar.pdf",
+            "legacy.pdf",
+            "hacker.pdf",
+        ]
+        assert ranking[0] == {
+            "rank": 1,
+            "candidate_file_name": "scholar.pdf",
+            "score": 100.0,
+            "section_scores": {
+                "degree": 100,
+                "experience": None,
+                "technical_skill": 20,
+                "responsibility": None,
+                "certificate": None,
+                "soft_skill": None,
+            },
+        }
+
+        r = client.get(f"{settings.API_V1_STR}/score/weights/{job.id}")
+        assert r.json()["degree"] == 1
+        r = client.get(f"{settings.API_V1_STR}/score/ranking/{job.id}?limit=1")
+        assert [item["candidate_file_name"] for item in r.json()] == ["scholar.pdf"]
+        # The stored scores follow the weights, the listing agrees with the ranking
+        r = client.get(f"{settings.API_V1_STR}/score/score_analysis/{job.id}")
+        assert [
+            (item["candidate_file_name"], item["score_result"]["score"]) for item in r.json()
+        ] == [(item["candidate_file_name"], item["score"]) for item in ranking]
+    finally:
+        db.delete(job)
+        db.commit()
+
+
+def test_score_weights_rejects_all_zero(client: TestClient, db: Session) -> None:
+    user = create_random_user(db)
+    job = Job(title=random_lower_string(), owner_id=user.id)
+    db.add(job)
+    db.commit()
+    zero = dict.fromkeys(SECTIONS, 0)
+    try:
+        r = client.put(f"{settings.API_V1_STR}/score/weights/{job.id}", json=zero)
+        assert r.status_code == 400
+    finally:
+        db.delete(job)
+        db.commit()
+    r = client.get(f"{settings.API_V1_STR}/score/ranking/{job.id}")
+    assert r.status_code == 404
+
+
+
+def test_score_analysis_by_job_pages_best_first(client: TestClient, db: Session) -> None:
+    user = create_random_user(db)
+    job = Job(title=random_lower_string(), owner_id=user.id)
+    db.add(job)
+    db.commit()
+    scores = {"a.pdf": 40, "b.pdf": 90, "c.pdf": 40, "d.pdf": None, "e.pdf": 75}
+    for name, score in scores.items():
+        result = {"score": score} if score is not None else {"error": "failed"}
+        db.add(ScoreAnalysis(job_id=job.id, candidate_file_name=name, score_result=result))
+    db.commit()
+    try:
+        r = client.get(f"{settings.API_V1_STR}/score/score_analysis/{job.id}")
+        assert r.status_code == 200
+        assert "X-Next-Cursor" not in r.headers
+        everything = [item["candidate_file_name"] for item in r.json()]
+        assert everything[:2] == ["b.pdf", "e.pdf"]
+        assert everything[-1] == "d.pdf"
+
+        pages = []
+        params: dict[str, str | int] = {"limit": 2}
+        while True:
+            r = client.get(
+                f"{settings.API_V1_STR}/score/score_analysis/{job.id}", params=params
+            )
+            assert r.status_code == 200
+            pages.append([item["candidate_file_name"] for item in r.json()])
+            if "X-Next-Cursor" not in r.headers:
+                break
+            params["cursor"] = r.headers["X-Next-Cursor"]
+        assert [len(page) for page in pages] == [2, 2, 1]
+        assert sum(pages, []) == everything
+    finally:
+        db.delete(job)
+        db.commit()
+
+
+
+def test_save_score_analysis_does_not_feed_the_cache(
+    client: TestClient, db: Session, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    calls: list[Any] = []
+
+    async def fake_analyse_score_async(job_candidate_data: Any) -> dict[str, Any]:
+        calls.append(job_candidate_data)
+        return {"score": 30.0}
+
+    monkeypatch.setattr(service, "analyse_score_async", fake_analyse_score_async)
+    score_cache.clear()
+    user = create_random_user(db)
+    job_analysis = {"technical_skill": [random_lower_string()]}
+    job = Job(title=random_lower_string(), owner_id=user.id, analysis_result=job_analysis)
+    db.add(job)
+    name = f"{random_lower_string()}.pdf"
+    candidate_analysis = {"technical_skill": ["Python"]}
+    db.add(CandidateAnalysis(file_name=name, original_file_name=name, analysis_result=candidate_analysis))
+    db.commit()
+    save_url = f"{settings.API_V1_STR}/score/save_score_analysis"
+    params = {"job_id": str(job.id), "candidate_file_name": name}
+    data = {"job": job_analysis, "candidate": candidate_analysis}
+    try:
+        # A result the server never computed is stored, but not served as the LLM's
+        r = client.post(save_url, params=params, json={"score": 99.0})
+        assert r.status_code == 200
+        assert r.json()["input_hash"] is None
+        r = client.post(f"{settings.API_V1_STR}/score/score_analyse", json=data)
+        assert r.json() == {"score": 30.0}
+        assert len(calls) == 1
+
+        # Saving the computed result keeps it as the cached one for the pair
+        r = client.post(save_url, params=params, json={"score": 30.0})
+        assert r.json()["input_hash"] == score_cache_key(job_analysis, candidate_analysis)
+        score_cache.clear()
+        r = client.post(f"{settings.API_V1_STR}/score/score_analyse", json=data)
+        assert r.json() == {"score": 30.0}
+        assert len(calls) == 1
+    finally:
+        db.exec(  # type: ignore
+            delete(CandidateAnalysis).where(col(CandidateAnalysis.file_name) == name)
+        )
+        db.delete(job)
+        db.commit()
+
+
+def test_save_score_analysis_skips_non_numeric_scores(
+    client: TestClient, db: Session
+) -> None:
+    user = create_random_user(db)
+    job = Job(title=random_lower_string(), owner_id=user.id)
+    db.add(job)
+    db.commit()
+    url = f"{settings.API_V1_STR}/score/save_score_analysis"
+    params = {"job_id": str(job.id), "candidate_file_name": "cv.pdf"}
+    try:
+        r = client.post(
+            url,
+            params=params,
+            json={
+                "score": 70,
+                "degree": {"score": "high", "comment": ""},
+                "experience": {"score": 70, "comment": ""},
+            },
+        )
+        assert r.status_code == 200
+        assert r.json()["degree_score"] is None
+        assert r.json()["experience_score"] == 70
+
+        r = client.post(url, params=params, json={"score": "high"})
+        assert r.status_code == 400
+        r = client.get(f"{settings.API_V1_STR}/score/score_analysis/{job.id}")
+        assert r.status_code == 200
+        assert [item["score_result"]["score"] for item in r.json()] == [70]
+    finally:
+        db.delete(job)
+        db.commit()
+
+
+def test_save_score_analysis_upserts_per_job_and_candidate(
+    client: TestClient, db: Session
+) -> None:
+    user = create_random_user(db)
+    job = Job(title=random_lower_string(), owner_id=user.id)
+    db.add(job)
+    db.commit()
+    url = f"{settings.API_V1_STR}/score/save_score_analysis"
+    try:
+        ids = []
+        for score in (40, 85):
+            r = client.post(
+                url,
+                params={"job_id": str(job.id), "candidate_file_name": "cv.pdf"},
+                json={"score": score, "degree": {"score": score, "comment": ""}},
+            )
+            assert r.status_code == 200
+            ids.append(r.json()["id"])
+        assert ids[0] == ids[1]
+
+        # Bulk variant, as saved by the batch endpoint
+        service.save_score_analyses(
+            db,
+            job.id,
+            {
+                "cv.pdf": ("key-1", {"score": 60}, None),
+                "other.pdf": ("key-2", {"score": 70}, None),
+                "failed.pdf": ("key-3", None, "LLM error"),
+            },
+        )
+        r = client.get(f"{settings.API_V1_STR}/score/score_analysis/{job.id}")
+        assert [(item["candidate_file_name"], item["score_result"]["score"]) for item in r.json()] == [
+            ("other.pdf", 70),
+            ("cv.pdf", 60),
+        ]
+        stored = db.exec(
+            select(ScoreAnalysis).where(ScoreAnalysis.candidate_file_name == "cv.pdf", ScoreAnalysis.job_id == job.id)
+        ).one()
+        assert str(stored.id) == ids[0]
+        # Section columns follow the new result
+        assert stored.degree_score is None
+        assert stored.input_hash == "key-1"
+    finally:
+        db.delete(job)
+        db.commit()
+
+
+def test_score_batch_prefilters_with_embeddings(
+    client: TestClient, db: Session, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    scored: list[str] = []
+
+    async def fake_analyse_score_async(job_candidate_data: Any) -> dict[str, Any]:
+        scored.append(job_candidate_data.candidate["candidate_name"])
+        return {"score": 50.0}
+
+    monkeypatch.setattr(service, "analyse_score_async", fake_analyse_score_async)
+    monkeypatch.setattr(score_config, "EMBEDDING_INDEX_PATH", str(tmp_path / "index.npz"))
+    user = create_random_user(db)
+    job = Job(
+        title=random_lower_string(),
+        owner_id=user.id,
+        analysis_result={
+            "technical_skill": ["Python", "Django", "PostgreSQL", "REST APIs"],
+            "experience": ["3 years as a Python backend developer"],
+        },
+    )
+    db.add(job)
+    candidates = {
+        "python": {
+            "technical_skill": ["Python", "Django", "PostgreSQL", "Docker"],
+            "experience": ["Backend developer, 4 years of Python and Django"],
+        },
+        "java": {
+            "technical_skill": ["Java", "Spring Boot", "Oracle"],
+            "experience": ["Java developer for 5 years"],
+        },
+        "designer": {
+            "technical_skill": ["Figma", "Photoshop", "Illustrator"],
+            "experience": ["Graphic designer at an agency"],
+        },
+    }
+    file_names = {name: f"{random_lower_string()}.pdf" for name in candidates}
+    db.add_all(
+        [
+            CandidateAnalysis(
+                file_name=file_names[name],
+                original_file_name=file_names[name],
+                analysis_result={"candidate_name": name, **analysis},
+            )
+            for name, analysis in candidates.items()
+        ]
+    )
+    db.commit()
+
+    try:
+        r = client.get(f"{settings.API_V1_STR}/score/shortlist/{job.id}?top_k=50")
+        assert r.status_code == 200
+        shortlist = [item["candidate_file_name"] for item in r.json()]
+        assert shortlist.index(file_names["python"]) < shortlist.index(file_names["java"])
+        assert shortlist.index(file_names["java"]) < shortlist.index(file_names["designer"])
+
+        r = client.post(
+            f"{settings.API_V1_STR}/score/score_analyse_batch",
+            json={
+                "job_id": str(job.id),
+                "candidate_file_names": list(file_names.values()),
+                "top_k": 1,
+            },
+        )
+    finally:
+        db.exec(  # type: ignore
+            delete(CandidateAnalysis).where(
+                col(CandidateAnalysis.file_name).in_(list(file_names.values()))
+            )
+        )
+        db.delete(job)
+        db.commit()
+
+    assert r.status_code == 200
+    assert scored == ["python"]
+    content = r.json()
+    assert content[0]["candidate_file_name"] == file_names["python"]
+    assert {item["error"] for item in content[1:]} == {"Not in the embedding shortlist"}
+    assert (tmp_path / "index.npz").exists()
+
+
+def test_score_shortlist_without_weighted_job_sections(
+    client: TestClient, db: Session, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    monkeypatch.setattr(score_config, "EMBEDDING_INDEX_PATH", str(tmp_path / "index.npz"))
+    user = create_random_user(db)
+    # Only the degree is weighted and the job does not ask for one
+    job = Job(
+        title=random_lower_string(),
+        owner_id=user.id,
+        analysis_result={"technical_skill": ["Python", "Django", "PostgreSQL"]},
+        score_weights={section: 1.0 if section == "degree" else 0.0 for section in SECTIONS},
+    )
+    db.add(job)
+    candidates = {
+        "python": {"technical_skill": ["Python", "Django", "Docker"]},
+        "designer": {"technical_skill": ["Figma", "Photoshop", "Illustrator"]},
+    }
+    file_names = {name: f"{random_lower_string()}.pdf" for name in candidates}
+    db.add_all(
+        [
+            CandidateAnalysis(
+                file_name=file_names[name],
+                original_file_name=file_names[name],
+                analysis_result={"candidate_name": name, **analysis},
+            )
+            for name, analysis in candidates.items()
+        ]
+    )
+    db.commit()
+
+    try:
+        r = client.get(f"{settings.API_V1_STR}/score/shortlist/{job.id}?top_k=1")
+    finally:
+        db.exec(  # type: ignore
+            delete(CandidateAnalysis).where(
+                col(CandidateAnalysis.file_name).in_(list(file_names.values()))
+            )
+        )
+        db.delete(job)
+        db.commit()
+
+    assert r.status_code == 200
+    assert [item["candidate_file_name"] for item in r.json()] == [file_names["python"]]
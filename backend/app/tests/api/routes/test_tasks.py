@@ -0,0 +1,118 @@
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, col, delete
+
+from app.api.candidate import service as candidate_service
+from app.api.candidate.config import candidate_config
+from app.api.score import service as score_service
+from app.api.task import service
+from app.core.config import settings
+from app.models import CandidateAnalysis
+from app.tests.utils.utils import random_lower_string
+
+
+def wait_for_task(client: TestClient, task_id: str, timeout: float = 10) -> Any:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        # Run pending tasks inline as well, in case the pool is disabled
+        service.run_next_task()
+        r = client.get(f"{settings.API_V1_STR}/tasks/{task_id}")
+        assert r.status_code == 200
+        if r.json()["status"] in (service.SUCCEEDED, service.FAILED):
+            return r.json()
+        time.sleep(0.1)
+    raise AssertionError("Task did not finish in time")
+
+
+def test_enqueue_score_task(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    def fake_analyse_score(job_candidate_data: Any) -> dict[str, Any]:
+        return {"score": 73.5, "job": job_candidate_data.job}
+
+    monkeypatch.setattr(score_service, "analyse_score", fake_analyse_score)
+    job = {"technical_skill": [random_lower_string()]}
+    r = client.post(
+        f"{settings.API_V1_STR}/tasks/score",
+        json={"job": job, "candidate": {"technical_skill": ["Python"]}},
+    )
+    assert r.status_code == 200
+    task = r.json()
+    assert task["kind"] == "score"
+
+    task = wait_for_task(client, task["id"])
+    assert task["status"] == service.SUCCEEDED
+    r = client.get(f"{settings.API_V1_STR}/tasks/{task['id']}/result")
+    assert r.status_code == 200
+    assert r.json() == {"score": 73.5, "job": job}
+
+
+def test_enqueue_candidate_task(
+    client: TestClient, db: Session, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    def fake_read_cv_candidate(file_name: str, file_hash: str | None = None) -> str:
+        # The task hands the upload's content hash on to the text cache
+        assert file_hash
+        return file_name
+
+    def fake_analyse_candidate(cv_content: str) -> dict[str, Any]:
+        return {"candidate_name": cv_content}
+
+    monkeypatch.setattr(candidate_config, "CV_UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(candidate_service, "read_cv_candidate", fake_read_cv_candidate)
+    monkeypatch.setattr(candidate_service, "analyse_candidate", fake_analyse_candidate)
+    file_name = f"{random_lower_string()}.pdf"
+    try:
+        r = client.post(
+            f"{settings.API_V1_STR}/tasks/candidate",
+            files={"file": (file_name, b"%PDF-1.4 " + file_name.encode(), "application/pdf")},
+        )
+        assert r.status_code == 200
+        assert r.json()["kind"] == "candidate"
+        task = wait_for_task(client, r.json()["id"])
+    finally:
+        db.exec(  # type: ignore
+            delete(CandidateAnalysis).where(col(CandidateAnalysis.original_file_name) == file_name)
+        )
+        db.commit()
+
+    assert task["status"] == service.SUCCEEDED
+    # The upload was stored under a timestamped name and analysed from there
+    (stored_file_name,) = os.listdir(tmp_path)
+    assert stored_file_name.endswith(file_name)
+    r = client.get(f"{settings.API_V1_STR}/tasks/{task['id']}/result")
+    assert r.json() == {"candidate_name": stored_file_name}
+
+
+def test_enqueue_refused_without_workers(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    monkeypatch.setattr(settings, "DEPLOYMENT_MODE", "serverless")
+    monkeypatch.setattr(candidate_config, "CV_UPLOAD_DIR", str(tmp_path))
+    job = {"technical_skill": ["Python"]}
+    r = client.post(
+        f"{settings.API_V1_STR}/tasks/score", json={"job": job, "candidate": job}
+    )
+    assert r.status_code == 503
+    r = client.post(
+        f"{settings.API_V1_STR}/tasks/job", json={"title": random_lower_string()}
+    )
+    assert r.status_code == 503
+    r = client.post(
+        f"{settings.API_V1_STR}/tasks/candidate",
+        files={"file": ("cv.pdf", b"%PDF-1.4 cv", "application/pdf")},
+    )
+    assert r.status_code == 503
+    assert os.listdir(tmp_path) == []
+
+
+def test_read_task_not_found(client: TestClient) -> None:
+    r = client.get(f"{settings.API_V1_STR}/tasks/{uuid.uuid4()}")
+    assert r.status_code == 404
+    assert r.json()["detail"] == "Task not found"
@@ -0,0 +1,108 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.core.config import settings
+from app.core.db import engine_options, open_session
+from app.core.pool import MeteredQueuePool, PoolMetrics
+from app.core.principal_cache import PrincipalCache
+from app.models import User
+
+
+def test_db_pool_stats(
+    client: TestClient,
+    superuser_token_headers: dict[str, str],
+    normal_user_token_headers: dict[str, str],
+) -> None:
+    r = client.get(f"{settings.API_V1_STR}/utils/db-pool-stats/", headers=superuser_token_headers)
+    assert r.status_code == 200
+    stats = r.json()["sync"]
+    assert r.json()["async"]["pid"] == stats["pid"]
+    # Authenticating the request itself checked out a connection
+    assert stats["checkouts"] >= 1
+    assert stats["pool"]["size"] == settings.DB_POOL_SIZE
+    assert stats["pool"]["checked_out"] >= 0
+    assert stats["checkout_ms"]["max"] >= stats["checkout_ms"]["p50"] >= 0
+
+    r = client.get(f"{settings.API_V1_STR}/utils/db-pool-stats/", headers=normal_user_token_headers)
+    assert r.status_code == 403
+
+
+def test_pool_metrics_count_churn_and_timeouts() -> None:
+    engine = create_engine(
+        str(settings.SQLALCHEMY_DATABASE_URI),
+        poolclass=MeteredQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.1,
+    )
+    metrics = PoolMetrics()
+    metrics.install(engine)
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+            assert metrics.stats()["pool"]["checked_out"] == 1
+            with pytest.raises(PoolTimeoutError):
+                engine.connect()
+        with engine.connect() as connection:
+            connection.invalidate()
+    finally:
+        engine.dispose()
+
+    stats = metrics.stats()
+    assert stats["checkouts"] == 2
+    assert stats["checkins"] == 2
+    assert stats["timeouts"] == 1
+    assert stats["connects"] == 1
+    assert stats["invalidations"] == 1
+    assert stats["max_checked_out"] == 1
+    assert stats["pool"]["checked_out"] == 0
+    # Timed out checkouts are counted apart, not in the latencies
+    assert stats["checkout_ms"]["max"] < 100
+
+
+def test_serverless_session_reuses_one_connection() -> None:
+    engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI), **engine_options("serverless"))
+    metrics = PoolMetrics()
+    metrics.install(engine)
+    try:
+        with open_session(engine, "serverless") as session:
+            session.execute(text("SELECT 1"))
+            session.commit()
+            session.execute(text("SELECT 1"))
+            session.commit()
+        # Nothing is kept open once the invocation is over
+        assert metrics.stats()["closes"] == 1
+    finally:
+        engine.dispose()
+
+    stats = metrics.stats()
+    assert stats["connects"] == 1
+    assert stats["checkouts"] == 1
+    assert "pool" not in stats
+
+
+def test_principal_cache_expires_and_invalidates() -> None:
+    cache = PrincipalCache(maxsize=2, ttl=60)
+    user = User(email="cached@example.com", hashed_password="x")
+    other = User(email="other@example.com", hashed_password="x")
+
+    cache.set("expired", user, time.time() - 1)
+    assert cache.get("expired") is None
+    cache.set("a", user, time.time() + 3600)
+    cache.set("b", user, time.time() + 3600)
+    assert cache.get("a") is user
+    # Least recently used goes first
+    cache.set("c", other, time.time() + 3600)
+    assert cache.get("b") is None
+
+    cache.invalidate_user(user.id)
+    assert cache.get("a") is None
+    assert cache.get("c") is other
+    stats = cache.stats()
+    assert stats["size"] == 1
+    assert (stats["hits"], stats["misses"], stats["invalidations"]) == (2, 3, 1)
+    assert stats["hit_rate"] == 0.4
@@ -0,0 +1,86 @@
+import uuid
+from typing import Any
+
+import pytest
+from sqlmodel import Session, col, select
+
+from app.api.score.service import SCORE_KEY
+from app.models import CandidateAnalysis, Job, ScoreAnalysis
+from app.tests.utils.user import create_random_user
+from app.tests.utils.utils import random_lower_string
+
+
+def explain(session: Session, statement: Any) -> str:
+    """Plan of statement with sequential scans disabled, as on a large table."""
+    compiled = statement.compile(bind=session.get_bind())
+    connection = session.connection()
+    connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+    rows = connection.exec_driver_sql(f"EXPLAIN {compiled}", compiled.params).all()
+    return "\n".join(row[0] for row in rows)
+
+
+@pytest.mark.parametrize(
+    "statement, index",
+    [
+        (
+            select(Job)
+            .where(Job.owner_id == uuid.uuid4())
+            .order_by(col(Job.created_at).desc(), col(Job.id).desc())
+            .limit(10),
+            "ix_job_owner_id_created_at_id",
+        ),
+        (
+            select(Job).order_by(col(Job.created_at).desc(), col(Job.id).desc()).limit(10),
+            "ix_job_created_at_id",
+        ),
+        (
+            select(ScoreAnalysis)
+            .where(ScoreAnalysis.job_id == uuid.uuid4())
+            .order_by(SCORE_KEY.desc(), col(ScoreAnalysis.id).desc())
+            .limit(10),
+            "ix_scoreanalysis_job_id_score",
+        ),
+        (
+            select(CandidateAnalysis)
+            .where(CandidateAnalysis.original_file_name == "cv.pdf")
+            .order_by(col(CandidateAnalysis.created_at).desc())
+            .limit(1),
+            "ix_candidateanalysis_original_file_name_created_at",
+        ),
+    ],
+    ids=["jobs-of-owner", "all-jobs", "scores-of-job", "latest-analysis"],
+)
+def test_listing_queries_use_their_index(db: Session, statement: Any, index: str) -> None:
+    try:
+        plan = explain(db, statement)
+    finally:
+        db.rollback()
+    assert index in plan
+    # The index returns the rows in order, no sort of the whole set
+    assert "Sort" not in plan
+
+
+def test_score_of_pair_is_one_index_lookup(db: Session) -> None:
+    user = create_random_user(db)
+    job = Job(title=random_lower_string(), owner_id=user.id)
+    db.add(job)
+    db.commit()
+    statement = select(ScoreAnalysis).where(
+        ScoreAnalysis.job_id == job.id,
+        ScoreAnalysis.candidate_file_name == "cv-7.pdf",
+    )
+    try:
+        # Many candidates of one job, so job_id alone is not selective
+        db.add_all(
+            ScoreAnalysis(job_id=job.id, candidate_file_name=f"cv-{i}.pdf", score_result={"score": i})
+            for i in range(500)
+        )
+        db.flush()
+        db.connection().exec_driver_sql("ANALYZE scoreanalysis")
+        plan = explain(db, statement)
+    finally:
+        db.rollback()
+        db.delete(job)
+        db.commit()
+    assert "uq_scoreanalysis_job_id_candidate_file_name" in plan
+    assert "Filter" not in plan
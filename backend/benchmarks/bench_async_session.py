@@ -0,0 +1,98 @@
+"""
+Compare concurrent database lookups from async routes: a sync Session on the
+event loop, a sync Session in the threadpool and an AsyncSession.
+
+Run from the backend directory, against the configured database:
+
+    python -m benchmarks.bench_async_session [--requests N] [--concurrency C] [--latency MS]
+
+Each lookup waits --latency ms in the database (pg_sleep), the round trip
+to a hosted Postgres that the event loop either blocks on or overlaps.
+"""
+import argparse
+import asyncio
+import time
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.db import dispose_engines, get_async_engine, get_engine
+
+LOOKUP = text("SELECT pg_sleep(:seconds)")
+
+
+async def blocking_lookup(seconds):
+    """What the routers did: a sync query straight from an async route."""
+    with Session(get_engine()) as session:
+        session.exec(LOOKUP, params={"seconds": seconds})
+
+
+def _sync_lookup(seconds):
+    with Session(get_engine()) as session:
+        session.exec(LOOKUP, params={"seconds": seconds})
+
+
+async def threadpool_lookup(seconds):
+    await run_in_threadpool(_sync_lookup, seconds)
+
+
+async def async_lookup(seconds):
+    async with AsyncSession(get_async_engine()) as session:
+        await session.exec(LOOKUP, params={"seconds": seconds})
+
+
+async def run(name, lookup, requests, concurrency, seconds):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def request():
+        async with semaphore:
+            start = time.perf_counter()
+            await lookup(seconds)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(request() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    print(
+        f"{name:<11} {requests / elapsed:8.1f} req/s  "
+        f"p50 {latencies[len(latencies) // 2] * 1000:7.1f} ms  "
+        f"p95 {latencies[int(len(latencies) * 0.95)] * 1000:7.1f} ms"
+    )
+    return elapsed
+
+
+async def main_async(args):
+    seconds = args.latency / 1000
+    pool_size = get_engine().pool.size()
+    print(
+        f"{args.requests} lookups, {args.concurrency} concurrent, "
+        f"{args.latency} ms in the database, pools of {pool_size}"
+    )
+
+    # Open the pools' connections before timing
+    await run("warm-up", threadpool_lookup, pool_size, pool_size, 0)
+    await run("warm-up", async_lookup, pool_size, pool_size, 0)
+
+    blocking = await run("blocking", blocking_lookup, args.requests, args.concurrency, seconds)
+    threadpool = await run("threadpool", threadpool_lookup, args.requests, args.concurrency, seconds)
+    current = await run("async", async_lookup, args.requests, args.concurrency, seconds)
+    print(f"speedup    {blocking / current:.2f}x over blocking, {threadpool / current:.2f}x over threadpool")
+    await dispose_engines()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=20.0)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
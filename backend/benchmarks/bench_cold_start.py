@@ -0,0 +1,95 @@
+"""
+Compare cold starts of the server and serverless database strategies.
+
+Run from the backend directory, against the configured database:
+
+    python -m benchmarks.bench_cold_start [--starts N]
+
+Each start is a fresh interpreter, as a new serverless instance: import the
+app, serve a first invocation, then a second one from the same instance.
+An invocation is a Session with two queries and a commit between them, the
+way the routes use it. Idle is what a frozen instance keeps open after it.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parents[1]
+
+INSTANCE = """
+import json, time
+start = time.perf_counter()
+import app.main
+from sqlalchemy import text
+from app.core import db
+from app.core.pool import pool_metrics
+imported = time.perf_counter()
+
+def invocation():
+    begin = time.perf_counter()
+    with db.open_session() as session:
+        session.exec(text("SELECT 1"))
+        session.commit()
+        session.exec(text("SELECT 1"))
+        session.commit()
+    return time.perf_counter() - begin
+
+first = invocation()
+second = invocation()
+stats = pool_metrics.stats()
+print(json.dumps({
+    "import": imported - start,
+    "first": first,
+    "second": second,
+    "connects": stats["connects"],
+    "idle": stats.get("pool", {}).get("checked_in", 0),
+}))
+"""
+
+
+def start_instance(mode):
+    env = {**os.environ, "DEPLOYMENT_MODE": mode, "PYTHONWARNINGS": "ignore"}
+    output = subprocess.run(
+        [sys.executable, "-c", INSTANCE],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def run(mode, starts):
+    results = [start_instance(mode) for _ in range(starts)]
+
+    def median_ms(key):
+        return statistics.median(result[key] for result in results) * 1000
+
+    print(
+        f"{mode:<11} import {median_ms('import'):7.1f} ms  "
+        f"first {median_ms('first'):6.1f} ms  "
+        f"second {median_ms('second'):6.1f} ms  "
+        f"connects {results[0]['connects']}  "
+        f"idle {results[0]['idle']}"
+    )
+    return median_ms("import") + median_ms("first")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--starts", type=int, default=5)
+    args = parser.parse_args()
+    print(f"{args.starts} starts per mode, medians")
+
+    server = run("server", args.starts)
+    serverless = run("serverless", args.starts)
+    print(f"cold start {server:.1f} ms server, {serverless:.1f} ms serverless")
+
+
+if __name__ == "__main__":
+    main()
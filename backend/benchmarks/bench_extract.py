@@ -0,0 +1,84 @@
+"""
+Compare CV text extraction: the old LangChain load_and_split path against
+app.api.candidate.extract.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_extract [corpus_dir] [--rounds N]
+
+The corpus defaults to upload/candidate.
+"""
+import argparse
+import time
+import tracemalloc
+from pathlib import Path
+
+from langchain_community.document_loaders import Docx2txtLoader, PyPDFLoader
+
+from app.api.candidate.extract import extract_text
+
+BACKEND_DIR = Path(__file__).parents[1]
+
+
+def legacy_extract_text(file_path):
+    """What read_cv_candidate used to do: split into chunks, then concatenate them back."""
+    loader = (
+        PyPDFLoader(file_path)
+        if file_path.lower().endswith(".pdf")
+        else Docx2txtLoader(file_path)
+    )
+    content = ""
+    for page in loader.load_and_split():
+        content += page.page_content
+    return content
+
+
+def run(name, extract, files, rounds):
+    start = time.perf_counter()
+    chars = 0
+    for _ in range(rounds):
+        for file_path in files:
+            chars += len(extract(str(file_path)))
+    elapsed = time.perf_counter() - start
+
+    # Separate pass for memory, tracemalloc slows everything down
+    tracemalloc.start()
+    for file_path in files:
+        extract(str(file_path))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    processed = len(files) * rounds
+    print(
+        f"{name:<10} {processed / elapsed:8.1f} files/s  "
+        f"{elapsed / processed * 1000:8.2f} ms/file  "
+        f"peak {peak / 1024 / 1024:6.2f} MiB  "
+        f"{chars // rounds} chars/round"
+    )
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("corpus", nargs="?", default=BACKEND_DIR / "upload" / "candidate", type=Path)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    files = sorted(
+        path for path in args.corpus.iterdir() if path.suffix.lower() in (".pdf", ".docx")
+    )
+    if not files:
+        raise SystemExit(f"No PDF/DOCX files in {args.corpus}")
+    print(f"{len(files)} files x {args.rounds} rounds from {args.corpus}")
+
+    # Warm up imports and file caches before timing
+    legacy_extract_text(str(files[0]))
+    extract_text(str(files[0]))
+
+    legacy = run("legacy", legacy_extract_text, files, args.rounds)
+    current = run("extract", extract_text, files, args.rounds)
+    print(f"speedup    {legacy / current:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Compare parsing of LLM function call arguments: the old jsbeautifier-based
+output2json against app.api.output.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_output2json [--rounds N]
+"""
+import argparse
+import json
+import time
+
+import jsbeautifier
+
+from app.api.candidate.prompts import fn_candidate_analysis
+from app.api.output import output2json
+from app.api.score.prompts import fn_matching_analysis
+
+
+def legacy_output2json(output):
+    """What the job, candidate and score services used to do."""
+    opts = jsbeautifier.default_options()
+    return json.loads(jsbeautifier.beautify(output["tool_calls"][0]["function"]["arguments"], opts))
+
+
+def tool_call(name, arguments):
+    return {"tool_calls": [{"function": {"name": name, "arguments": json.dumps(arguments)}}]}
+
+
+def sample_outputs():
+    """Realistically sized score and candidate analysis outputs."""
+    score = {
+        section: {"score": 75, "comment": "The candidate matches most requirements. " * 4}
+        for section in fn_matching_analysis[0]["parameters"]["required"][:-1]
+    }
+    score["summary_comment"] = "Strong candidate overall. " * 8
+    examples = {
+        "string": lambda key: f"{key} with some descriptive text",
+        "integer": lambda key: 3,
+        "array": lambda key: [f"{key} entry {i} with some descriptive text" for i in range(8)],
+    }
+    candidate = {
+        key: examples[schema["type"]](key)
+        for key, schema in fn_candidate_analysis[0]["parameters"]["properties"].items()
+    }
+    return [
+        ("score", tool_call("evaluate", score), fn_matching_analysis),
+        ("candidate", tool_call(fn_candidate_analysis[0]["name"], candidate), fn_candidate_analysis),
+    ]
+
+
+def run(name, parse, rounds, *args):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        parse(*args)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<24} {elapsed / rounds * 1e6:10.1f} us/call")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    for kind, output, functions in sample_outputs():
+        assert legacy_output2json(output) == output2json(output, functions)
+        print(f"{kind}: {len(output['tool_calls'][0]['function']['arguments'])} bytes")
+        legacy = run("  jsbeautifier", legacy_output2json, args.rounds, output)
+        strict = run("  orjson", output2json, args.rounds, output)
+        validated = run("  orjson + validation", output2json, args.rounds, output, functions)
+        print(f"  speedup {legacy / strict:.0f}x, with validation {legacy / validated:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -66,7 +66,9 @@ export class ItemsService {
             url: '/api/v1/items/',
             query: {
                 skip: data.skip,
-                limit: data.limit
+                limit: data.limit,
+                cursor: data.cursor,
+                count: data.count
             },
             errors: {
                 422: 'Validation Error'
@@ -204,6 +206,9 @@ export class JobsService {
             query: {
                 skip: data.skip,
                 limit: data.limit,
+                cursor: data.cursor,
+                count: data.count,
+                q: data.q,
                 title: data.title,
                 description: data.description,
                 created_at: data.createdAt
@@ -484,6 +489,10 @@ export class ScoreService {
             path: {
                 'job_id': data.jobId
             },
+            query: {
+                limit: data.limit,
+                cursor: data.cursor
+            },
             errors: {
                 422: 'Validation Error'
             }
@@ -531,7 +540,9 @@ export class UsersService {
             url: '/api/v1/users/',
             query: {
                 skip: data.skip,
-                limit: data.limit
+                limit: data.limit,
+                cursor: data.cursor,
+                count: data.count
             },
             errors: {
                 422: 'Validation Error'
@@ -17,7 +17,7 @@ export type CandidateAnalysisPublic = {
     id: string;
     file_name: string;
     original_file_name: (string | null);
-    analysis_result: string;
+    analysis_result: { [key: string]: unknown };
     created_at: string;
     updated_at: string;
 };
@@ -40,7 +40,8 @@ export type ItemPublic = {
 
 export type ItemsPublic = {
     data: Array<ItemPublic>;
-    count: number;
+    count: (number | null);
+    next_cursor?: (string | null);
 };
 
 export type ItemUpdate = {
@@ -68,7 +69,7 @@ export type JobPublic = {
     id: string;
     owner_id: string;
     files?: (string | null);
-    analysis_result?: (string | null);
+    analysis_result?: ({ [key: string]: unknown } | null);
     created_at: string;
 };
 
@@ -83,14 +84,15 @@ export type JobResponseSchema = {
 
 export type JobsPublic = {
     data: Array<JobPublic>;
-    count: number;
+    count: (number | null);
+    next_cursor?: (string | null);
 };
 
 export type JobUpdate = {
     title?: (string | null);
     description?: (string | null);
     files?: (string | null);
-    analysis_result?: (string | null);
+    analysis_result?: ({ [key: string]: unknown } | null);
 };
 
 export type Message = {
@@ -152,7 +154,8 @@ export type UserRegister = {
 
 export type UsersPublic = {
     data: Array<UserPublic>;
-    count: number;
+    count: (number | null);
+    next_cursor?: (string | null);
 };
 
 export type UserUpdate = {
@@ -187,6 +190,8 @@ export type CandidateGetCandidateAnalysisResultData = {
 export type CandidateGetCandidateAnalysisResultResponse = (CandidateAnalysisPublic);
 
 export type ItemsReadItemsData = {
+    count?: 'exact' | 'estimate' | 'none';
+    cursor?: (string | null);
     limit?: number;
     skip?: number;
 };
@@ -225,9 +230,12 @@ export type JobAnalyseJobData = {
 export type JobAnalyseJobResponse = (JobResponseSchema);
 
 export type JobsReadJobsData = {
+    count?: 'exact' | 'estimate' | 'none';
     createdAt?: (string | null);
+    cursor?: (string | null);
     description?: (string | null);
     limit?: number;
+    q?: (string | null);
     skip?: number;
     title?: (string | null);
 };
@@ -298,6 +306,8 @@ export type ScoreAnalyseScoreData = {
 export type ScoreAnalyseScoreResponse = (unknown);
 
 export type UsersReadUsersData = {
+    count?: 'exact' | 'estimate' | 'none';
+    cursor?: (string | null);
     limit?: number;
     skip?: number;
 };
@@ -370,7 +380,9 @@ export type ScoreSaveScoreAnalysisData = {
 export type ScoreSaveScoreAnalysisResponse = (ScoreAnalysisPublic);
 
 export type ScoreGetScoreAnalysisByJobData = {
+    cursor?: (string | null);
     jobId: string;
+    limit?: (number | null);
 };
 
 export type ScoreGetScoreAnalysisByJobResponse = (Array<ScoreAnalysisPublic>);
@@ -386,7 +398,7 @@ export type ScoreAnalysisPublic = {
     id: string;
     job_id: string;
     candidate_file_name: string;
-    score_result: string;
+    score_result: { [key: string]: unknown };
     created_at: string;
     updated_at: string;
 };
\ No newline at end of file
@@ -97,8 +97,8 @@ function JobList() {
           })
           
           if (candidateAnalysis && candidateAnalysis.analysis_result) {
-            const candidateData = JSON.parse(candidateAnalysis.analysis_result)
-            const scoreResult = JSON.parse(scoreAnalysis.score_result)
+            const candidateData = candidateAnalysis.analysis_result as Record<string, any>
+            const scoreResult = scoreAnalysis.score_result as Record<string, any>
             
             // Extract candidate name and phone with fallback logic
             let name = "Unknown"
@@ -178,9 +178,7 @@ const JobEditing = () => {
                       fileName: file.name,
                     })
                   if (candidateAnalysis && candidateAnalysis.analysis_result) {
-                    const candidateData = JSON.parse(
-                      candidateAnalysis.analysis_result,
-                    )
+                    const candidateData = candidateAnalysis.analysis_result as Record<string, any>
                     console.log(`Analysis data for ${file.name}:`, candidateData)
                     
                     // Try to extract candidate information from various possible structures
@@ -284,7 +282,7 @@ const JobEditing = () => {
       if (scoreAnalyses && scoreAnalyses.length > 0) {
         const savedScoreResults = scoreAnalyses.reduce((acc, scoreAnalysis) => {
           try {
-            const scoreData = JSON.parse(scoreAnalysis.score_result)
+            const scoreData = scoreAnalysis.score_result as Record<string, any>
             acc[scoreAnalysis.candidate_file_name] = scoreData
           } catch (e) {
             console.error("Error parsing saved score result:", e)
@@ -311,8 +309,8 @@ const JobEditing = () => {
           try {
             const candidateAnalysis = await CandidateService.getCandidateAnalysisResult({ fileName: file.name });
             if (candidateAnalysis && candidateAnalysis.analysis_result) {
-              const candidateData = JSON.parse(candidateAnalysis.analysis_result);
-              const jobAnalysisResult = jobData.analysis_result ? JSON.parse(jobData.analysis_result) : {};
+              const candidateData = candidateAnalysis.analysis_result as Record<string, any>;
+              const jobAnalysisResult = ((jobData.analysis_result ?? {}) as Record<string, any>);
               const scoreData = {
                 job: jobAnalysisResult,
                 candidate: candidateData,
@@ -455,9 +453,7 @@ const JobEditing = () => {
                   fileName: file.name,
                 })
               if (candidateAnalysis && candidateAnalysis.analysis_result) {
-                const candidateData = JSON.parse(
-                  candidateAnalysis.analysis_result,
-                )
+                const candidateData = candidateAnalysis.analysis_result as Record<string, any>
                 console.log(`Analysis data for ${file.name}:`, candidateData)
                 
                 // Try to extract candidate information from various possible structures
@@ -672,14 +668,6 @@ const JobEditing = () => {
       const job = await JobsService.readJob({ id: jobId })
       const jobDetails = { ...job } as any
 
-      if (jobDetails.analysis_result) {
-        try {
-          jobDetails.analysis_result = JSON.parse(jobDetails.analysis_result)
-        } catch (e) {
-          console.error("Error parsing job analysis_result:", e)
-        }
-      }
-
       if (jobDetails.files) {
         try {
           jobDetails.files = JSON.parse(jobDetails.files)
@@ -706,7 +694,7 @@ const JobEditing = () => {
         fileName,
       })
       if (response && response.analysis_result) {
-        const analysis = JSON.parse(response.analysis_result)
+        const analysis = response.analysis_result as Record<string, any>
         setFileAnalysisResult(analysis)
       } else {
         setFileAnalysisResult({
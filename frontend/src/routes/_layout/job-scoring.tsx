@@ -182,9 +182,7 @@ const JobScoring = () => {
                       fileName: file.name,
                     })
                   if (candidateAnalysis && candidateAnalysis.analysis_result) {
-                    const candidateData = JSON.parse(
-                      candidateAnalysis.analysis_result,
-                    )
+                    const candidateData = candidateAnalysis.analysis_result as Record<string, any>
                     const parsedId = parseInt(candidateAnalysis.id, 10)
                     
                     // Extract candidate name with comprehensive fallback logic
@@ -251,7 +249,7 @@ const JobScoring = () => {
       if (scoreAnalyses && scoreAnalyses.length > 0) {
         const savedScoreResults = scoreAnalyses.reduce((acc, scoreAnalysis) => {
           try {
-            const scoreData = JSON.parse(scoreAnalysis.score_result)
+            const scoreData = scoreAnalysis.score_result as Record<string, any>
             acc[scoreAnalysis.candidate_file_name] = scoreData
           } catch (e) {
             console.error("Error parsing saved score result:", e)
@@ -297,8 +295,8 @@ const JobScoring = () => {
             const candidateAnalysis = await CandidateService.getCandidateAnalysisResult({ fileName: file.name });
             if (candidateAnalysis && candidateAnalysis.analysis_result) {
               setAnalysisFileProgress(prev => ({ ...prev, [file.name]: 40 }));
-              const candidateData = JSON.parse(candidateAnalysis.analysis_result);
-              const jobAnalysisResult = jobData.analysis_result ? JSON.parse(jobData.analysis_result) : {};
+              const candidateData = candidateAnalysis.analysis_result as Record<string, any>;
+              const jobAnalysisResult = ((jobData.analysis_result ?? {}) as Record<string, any>);
               const scoreData = {
                 job: jobAnalysisResult,
                 candidate: candidateData,
@@ -446,9 +444,7 @@ const JobScoring = () => {
                   fileName: file.name,
                 })
               if (candidateAnalysis && candidateAnalysis.analysis_result) {
-                const candidateData = JSON.parse(
-                  candidateAnalysis.analysis_result,
-                )
+                const candidateData = candidateAnalysis.analysis_result as Record<string, any>
                 const parsedId = parseInt(candidateAnalysis.id, 10)
                 
                 // Extract candidate name with comprehensive fallback logic
@@ -658,14 +654,6 @@ const JobScoring = () => {
       const job = await JobsService.readJob({ id: jobId })
       const jobDetails = { ...job } as any
 
-      if (jobDetails.analysis_result) {
-        try {
-          jobDetails.analysis_result = JSON.parse(jobDetails.analysis_result)
-        } catch (e) {
-          console.error("Error parsing job analysis_result:", e)
-        }
-      }
-
       if (jobDetails.files) {
         try {
           jobDetails.files = JSON.parse(jobDetails.files)
@@ -692,7 +680,7 @@ const JobScoring = () => {
         fileName,
       })
       if (response && response.analysis_result) {
-        const analysis = JSON.parse(response.analysis_result)
+        const analysis = response.analysis_result as Record<string, any>
         setFileAnalysisResult(analysis)
       } else {
         setFileAnalysisResult({